@@ -0,0 +1,281 @@
+"""partition rag logs and split message scan diagnostics
+
+Revision ID: b4e9d27a6c13
+Revises: f3a8c61d0b52
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4e9d27a6c13"
+down_revision: Union[str, Sequence[str], None] = "f3a8c61d0b52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Later months are created by app.retention.worker.
+_MONTHS_AHEAD = 2
+_DIAGNOSTIC_KEYS = ("signals", "timing_ms_by_stage")
+
+
+def _create_monthly_partitions(table: str, first_row_utc_sql: str) -> None:
+    """Monthly partitions from the oldest row's month (UTC) plus a default."""
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            m date := date_trunc(
+                'month', COALESCE(({first_row_utc_sql}), now() AT TIME ZONE 'UTC')
+            )::date;
+            last_month date := (
+                date_trunc('month', now() AT TIME ZONE 'UTC')
+                + interval '{_MONTHS_AHEAD} months'
+            )::date;
+        BEGIN
+            WHILE m <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF {table} '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(m, 'YYYYMM'),
+                    to_char(m, 'YYYY-MM-DD') || ' 00:00:00+00',
+                    to_char((m + interval '1 month')::date, 'YYYY-MM-DD')
+                        || ' 00:00:00+00'
+                );
+                m := (m + interval '1 month')::date;
+            END LOOP;
+            EXECUTE 'CREATE TABLE IF NOT EXISTS {table}_default '
+                'PARTITION OF {table} DEFAULT';
+        END $$;
+        """
+    )
+
+
+def _compress_column(table: str, column: str) -> None:
+    """lz4 TOAST compression on the parent and its partitions, when available."""
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            rel text;
+        BEGIN
+            FOR rel IN
+                SELECT '{table}'
+                UNION ALL
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = '{table}'::regclass
+            LOOP
+                BEGIN
+                    EXECUTE format(
+                        'ALTER TABLE %I ALTER COLUMN {column} SET COMPRESSION lz4',
+                        rel
+                    );
+                EXCEPTION WHEN OTHERS THEN
+                    RAISE NOTICE 'lz4 not set on %: %', rel, SQLERRM;
+                END;
+            END LOOP;
+        END $$;
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # rag_retrieval_logs -> partitioned by month on created_at.
+    op.rename_table("rag_retrieval_logs", "rag_retrieval_logs_legacy")
+    op.execute(
+        "ALTER TABLE rag_retrieval_logs_legacy "
+        "RENAME CONSTRAINT rag_retrieval_logs_pkey TO rag_retrieval_logs_legacy_pkey"
+    )
+    op.execute(
+        "ALTER TABLE rag_retrieval_logs_legacy RENAME CONSTRAINT "
+        "rag_retrieval_logs_message_id_fkey TO rag_retrieval_logs_legacy_message_id_fkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_rag_retrieval_logs_message_id "
+        "RENAME TO ix_rag_retrieval_logs_legacy_message_id"
+    )
+
+    op.create_table(
+        "rag_retrieval_logs",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("message_id", sa.Uuid(), nullable=True),
+        sa.Column("query", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("top_k", sa.Integer(), nullable=False),
+        sa.Column(
+            "results_json", postgresql.JSONB(astext_type=sa.Text()), nullable=False
+        ),
+        sa.Column("latency_ms", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["message_id"],
+            ["messages.id"],
+        ),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        op.f("ix_rag_retrieval_logs_message_id"),
+        "rag_retrieval_logs",
+        ["message_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_rag_retrieval_logs_created_at",
+        "rag_retrieval_logs",
+        ["created_at"],
+        unique=False,
+    )
+    _create_monthly_partitions(
+        "rag_retrieval_logs",
+        "SELECT min(created_at) AT TIME ZONE 'UTC' FROM rag_retrieval_logs_legacy",
+    )
+    op.execute(
+        "INSERT INTO rag_retrieval_logs "
+        "(id, message_id, query, top_k, results_json, latency_ms, created_at) "
+        "SELECT id, message_id, query, top_k, results_json, latency_ms, created_at "
+        "FROM rag_retrieval_logs_legacy"
+    )
+    op.drop_table("rag_retrieval_logs_legacy")
+    _compress_column("rag_retrieval_logs", "results_json")
+
+    # Cold per-message diagnostics, split off messages.entities_json.
+    op.create_table(
+        "message_scan_diagnostics",
+        sa.Column("message_id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "diagnostics_json",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["message_id"], ["messages.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("message_id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "ix_message_scan_diagnostics_message_created",
+        "message_scan_diagnostics",
+        ["message_id", "created_at"],
+        unique=False,
+    )
+    # messages.created_at is a naive UTC timestamp.
+    _create_monthly_partitions(
+        "message_scan_diagnostics", "SELECT min(created_at) FROM messages"
+    )
+    has_diagnostics = " OR ".join(
+        f"entities_json ? '{key}'" for key in _DIAGNOSTIC_KEYS
+    )
+    op.execute(
+        "INSERT INTO message_scan_diagnostics "
+        "(message_id, created_at, diagnostics_json) "
+        "SELECT id, created_at AT TIME ZONE 'UTC', jsonb_build_object("
+        "'signals', COALESCE(entities_json->'signals', '{}'::jsonb), "
+        "'timing_ms_by_stage', "
+        "COALESCE(entities_json->'timing_ms_by_stage', '{}'::jsonb)) "
+        f"FROM messages WHERE {has_diagnostics}"
+    )
+    op.execute(
+        "UPDATE messages SET entities_json = entities_json "
+        + " ".join(f"- '{key}'" for key in _DIAGNOSTIC_KEYS)
+        + f" WHERE {has_diagnostics}"
+    )
+    _compress_column("message_scan_diagnostics", "diagnostics_json")
+
+    op.create_table(
+        "rag_retrieval_daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("log_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "total_latency_ms", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.Column("max_latency_ms", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("day", "kind"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rag_retrieval_daily_stats")
+
+    op.execute(
+        "UPDATE messages m SET entities_json = "
+        "COALESCE(m.entities_json, '{}'::jsonb) || d.diagnostics_json "
+        "FROM (SELECT DISTINCT ON (message_id) message_id, diagnostics_json "
+        "FROM message_scan_diagnostics ORDER BY message_id, created_at DESC) d "
+        "WHERE d.message_id = m.id"
+    )
+    op.drop_index(
+        "ix_message_scan_diagnostics_message_created",
+        table_name="message_scan_diagnostics",
+    )
+    op.drop_table("message_scan_diagnostics")
+
+    op.rename_table("rag_retrieval_logs", "rag_retrieval_logs_partitioned")
+    op.execute(
+        "ALTER TABLE rag_retrieval_logs_partitioned RENAME CONSTRAINT "
+        "rag_retrieval_logs_pkey TO rag_retrieval_logs_partitioned_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_rag_retrieval_logs_message_id "
+        "RENAME TO ix_rag_retrieval_logs_partitioned_message_id"
+    )
+    op.execute(
+        "ALTER INDEX ix_rag_retrieval_logs_created_at "
+        "RENAME TO ix_rag_retrieval_logs_partitioned_created_at"
+    )
+    op.create_table(
+        "rag_retrieval_logs",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("message_id", sa.Uuid(), nullable=True),
+        sa.Column("query", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("top_k", sa.Integer(), nullable=False),
+        sa.Column(
+            "results_json", postgresql.JSONB(astext_type=sa.Text()), nullable=False
+        ),
+        sa.Column("latency_ms", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["message_id"],
+            ["messages.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_rag_retrieval_logs_message_id"),
+        "rag_retrieval_logs",
+        ["message_id"],
+        unique=False,
+    )
+    op.execute(
+        "INSERT INTO rag_retrieval_logs "
+        "(id, message_id, query, top_k, results_json, latency_ms, created_at) "
+        "SELECT id, message_id, query, top_k, results_json, latency_ms, created_at "
+        "FROM rag_retrieval_logs_partitioned"
+    )
+    op.drop_table("rag_retrieval_logs_partitioned")
@@ -0,0 +1,120 @@
+"""add conversation stats and admin keyset indexes
+
+Revision ID: c7d1f5a2e8b4
+Revises: b4e9d27a6c13
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d1f5a2e8b4"
+down_revision: Union[str, Sequence[str], None] = "b4e9d27a6c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "conversation_stats",
+        sa.Column("conversation_id", sa.Uuid(), nullable=False),
+        sa.Column("message_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("block_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("mask_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("last_message_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["conversation_id"], ["conversations.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("conversation_id"),
+    )
+
+    # Counters follow every messages write: insert adds, delete subtracts, and
+    # an update of final_action (re-scan) moves the block/mask counts.
+    op.execute(
+        """
+        CREATE FUNCTION conversation_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE conversation_stats SET
+                    message_count = message_count - 1,
+                    block_count = block_count
+                        - COALESCE((OLD.final_action = 'block')::int, 0),
+                    mask_count = mask_count
+                        - COALESCE((OLD.final_action = 'mask')::int, 0)
+                WHERE conversation_id = OLD.conversation_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO conversation_stats AS s (
+                    conversation_id, message_count, block_count, mask_count,
+                    last_message_at
+                ) VALUES (
+                    NEW.conversation_id,
+                    1,
+                    COALESCE((NEW.final_action = 'block')::int, 0),
+                    COALESCE((NEW.final_action = 'mask')::int, 0),
+                    NEW.created_at
+                )
+                ON CONFLICT (conversation_id) DO UPDATE SET
+                    message_count = s.message_count + 1,
+                    block_count = s.block_count + EXCLUDED.block_count,
+                    mask_count = s.mask_count + EXCLUDED.mask_count,
+                    last_message_at = GREATEST(
+                        s.last_message_at, EXCLUDED.last_message_at
+                    );
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER trg_messages_conversation_stats_ins_del "
+        "AFTER INSERT OR DELETE ON messages "
+        "FOR EACH ROW EXECUTE FUNCTION conversation_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_messages_conversation_stats_upd "
+        "AFTER UPDATE OF final_action ON messages "
+        "FOR EACH ROW WHEN (OLD.final_action IS DISTINCT FROM NEW.final_action) "
+        "EXECUTE FUNCTION conversation_stats_apply()"
+    )
+
+    op.execute(
+        "INSERT INTO conversation_stats "
+        "(conversation_id, message_count, block_count, mask_count, last_message_at) "
+        "SELECT conversation_id, count(*), "
+        "count(*) FILTER (WHERE final_action = 'block'), "
+        "count(*) FILTER (WHERE final_action = 'mask'), "
+        "max(created_at) "
+        "FROM messages GROUP BY conversation_id"
+    )
+
+    # Keyset order of the admin conversation and block/mask log lists.
+    op.create_index(
+        "ix_conversations_updated_id",
+        "conversations",
+        ["updated_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_messages_final_action_created_id",
+        "messages",
+        ["final_action", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_messages_final_action_created_id", table_name="messages")
+    op.drop_index("ix_conversations_updated_id", table_name="conversations")
+    op.execute("DROP TRIGGER trg_messages_conversation_stats_upd ON messages")
+    op.execute("DROP TRIGGER trg_messages_conversation_stats_ins_del ON messages")
+    op.execute("DROP FUNCTION conversation_stats_apply()")
+    op.drop_table("conversation_stats")
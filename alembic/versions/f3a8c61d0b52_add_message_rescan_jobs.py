@@ -0,0 +1,105 @@
+"""add message rescan jobs
+
+Revision ID: f3a8c61d0b52
+Revises: d91f6e2ab314
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8c61d0b52"
+down_revision: Union[str, Sequence[str], None] = "d91f6e2ab314"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message_rescan_jobs",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("company_id", sa.Uuid(), nullable=False),
+        sa.Column("requested_by", sa.Uuid(), nullable=True),
+        sa.Column("reason", sa.String(length=64), nullable=True),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("total_messages", sa.Integer(), nullable=False),
+        sa.Column("scanned_messages", sa.Integer(), nullable=False),
+        sa.Column("changed_messages", sa.Integer(), nullable=False),
+        sa.Column("failed_messages", sa.Integer(), nullable=False),
+        sa.Column("cursor_created_at", sa.DateTime(), nullable=True),
+        sa.Column("cursor_message_id", sa.Uuid(), nullable=True),
+        sa.Column(
+            "error_json", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_message_rescan_jobs_company_id",
+        "message_rescan_jobs",
+        ["company_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_message_rescan_jobs_status",
+        "message_rescan_jobs",
+        ["status"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_message_rescan_jobs_company_created",
+        "message_rescan_jobs",
+        ["company_id", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_message_rescan_jobs_company_status",
+        "message_rescan_jobs",
+        ["company_id", "status"],
+        unique=False,
+    )
+    # Keyset order of the re-scan batches.
+    op.create_index(
+        "ix_messages_created_id",
+        "messages",
+        ["created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_messages_created_id", table_name="messages")
+    op.drop_index(
+        "ix_message_rescan_jobs_company_status", table_name="message_rescan_jobs"
+    )
+    op.drop_index(
+        "ix_message_rescan_jobs_company_created", table_name="message_rescan_jobs"
+    )
+    op.drop_index("ix_message_rescan_jobs_status", table_name="message_rescan_jobs")
+    op.drop_index(
+        "ix_message_rescan_jobs_company_id", table_name="message_rescan_jobs"
+    )
+    op.drop_table("message_rescan_jobs")
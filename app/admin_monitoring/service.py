@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import base64
+from collections.abc import Callable
+from datetime import datetime
+from threading import Lock
+import time
 from uuid import UUID
 
 import sqlalchemy as sa
@@ -15,7 +20,8 @@ from app.admin_monitoring.schemas import (
 from app.auth.model import User
 from app.common.enums import ConversationStatus, RuleAction
 from app.conversation import service as conversation_service
-from app.conversation.model import Conversation
+from app.conversation.model import Conversation, ConversationStats
+from app.core.config import get_settings
 from app.messages.model import Message
 from app.permissions.core import not_found
 from app.rag.models.rag_retrieval_log import RagRetrievalLog
@@ -42,6 +48,50 @@ def _encode_offset_cursor(*, offset: int, limit: int, has_more: bool) -> str | N
     return str(offset + limit)
 
 
+def _encode_keyset_cursor(*, sort_value: datetime, row_id: UUID) -> str:
+    raw = f"{sort_value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_keyset_cursor(*, cursor: str | None) -> tuple[datetime, UUID] | None:
+    # Unknown or stale (e.g. old offset) cursors restart from the first page.
+    value = str(cursor or "").strip()
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        sort_raw, id_raw = raw.split("|", 1)
+        return datetime.fromisoformat(sort_raw), UUID(id_raw)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+_count_cache: dict[tuple, tuple[float, int]] = {}
+_count_cache_lock = Lock()
+
+
+def _cached_count(key: tuple, compute: Callable[[], int]) -> int:
+    """
+    List totals are shown for orientation only; reuse one for a few seconds
+    instead of counting millions of rows on every page.
+
+    Keys must come from a small fixed set (status / action filters, never
+    free-text search); expired entries are swept on every store.
+    """
+    ttl = float(get_settings().admin_count_cache_ttl_seconds)
+    now = time.monotonic()
+    with _count_cache_lock:
+        hit = _count_cache.get(key)
+        if hit is not None and now - hit[0] < ttl:
+            return hit[1]
+    value = int(compute())
+    with _count_cache_lock:
+        for stale in [k for k, (at, _) in _count_cache.items() if now - at >= ttl]:
+            _count_cache.pop(stale, None)
+        _count_cache[key] = (now, value)
+    return value
+
+
 def _action_value(value: RuleAction | str | None) -> str | None:
     if value is None:
         return None
@@ -81,21 +131,6 @@ def _message_summary(detail: dict) -> str | None:
     return None
 
 
-def _conversation_stats_subquery():
-    block_case = sa.case((Message.final_action == RuleAction.block, 1), else_=0)
-    mask_case = sa.case((Message.final_action == RuleAction.mask, 1), else_=0)
-    return (
-        select(
-            Message.conversation_id.label("conversation_id"),
-            sa.func.count(Message.id).label("message_count"),
-            sa.func.coalesce(sa.func.sum(block_case), 0).label("block_count"),
-            sa.func.coalesce(sa.func.sum(mask_case), 0).label("mask_count"),
-        )
-        .group_by(Message.conversation_id)
-        .subquery()
-    )
-
-
 def list_admin_conversations_paginated(
     *,
     session: Session,
@@ -105,19 +140,21 @@ def list_admin_conversations_paginated(
     q: str | None = None,
 ) -> tuple[list[AdminConversationListItemOut], str | None, bool, int]:
     safe_limit = _normalize_limit(limit=limit)
-    offset = _decode_offset_cursor(cursor=cursor)
-    stats_sq = _conversation_stats_subquery()
+    after = _decode_keyset_cursor(cursor=cursor)
 
     stmt = (
         select(
             Conversation,
             User,
-            stats_sq.c.message_count,
-            stats_sq.c.block_count,
-            stats_sq.c.mask_count,
+            ConversationStats.message_count,
+            ConversationStats.block_count,
+            ConversationStats.mask_count,
+            ConversationStats.last_message_at,
         )
         .join(User, User.id == Conversation.user_id)
-        .outerjoin(stats_sq, stats_sq.c.conversation_id == Conversation.id)
+        .outerjoin(
+            ConversationStats, ConversationStats.conversation_id == Conversation.id
+        )
     )
 
     count_stmt = select(sa.func.count()).select_from(Conversation).join(
@@ -141,24 +178,33 @@ def list_admin_conversations_paginated(
         stmt = stmt.where(search_clause)
         count_stmt = count_stmt.where(search_clause)
 
-    stmt = stmt.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).offset(
-        offset
-    ).limit(safe_limit + 1)
+    if after is not None:
+        stmt = stmt.where(
+            sa.tuple_(Conversation.updated_at, Conversation.id) < sa.tuple_(*after)
+        )
+    stmt = stmt.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(
+        safe_limit + 1
+    )
 
     rows = list(session.exec(stmt).all())
     has_more = len(rows) > safe_limit
     if has_more:
         rows = rows[:safe_limit]
 
-    total = int(session.exec(count_stmt).one())
-    items: list[AdminConversationListItemOut] = []
-    for convo, owner, message_count, block_count, mask_count in rows:
-        last_message_at, last_message_preview = (
-            conversation_service.get_admin_last_message_summary(
-            session=session,
-            conversation_id=convo.id,
-        )
+    if search:
+        # Free-text totals are not reused; caching them would grow without bound.
+        total = int(session.exec(count_stmt).one())
+    else:
+        total = _cached_count(
+            ("conversations", _status_value(status) if status else None),
+            lambda: session.exec(count_stmt).one(),
         )
+    previews = conversation_service.get_admin_last_message_previews(
+        session=session,
+        conversation_ids=[row[0].id for row in rows if row[2]],
+    )
+    items: list[AdminConversationListItemOut] = []
+    for convo, owner, message_count, block_count, mask_count, last_message_at in rows:
         block_total = int(block_count or 0)
         mask_total = int(mask_count or 0)
         items.append(
@@ -176,19 +222,18 @@ def list_admin_conversations_paginated(
                 created_at=convo.created_at,
                 updated_at=convo.updated_at,
                 last_message_at=last_message_at,
-                last_message_preview=last_message_preview,
+                last_message_preview=previews.get(convo.id),
                 message_count=int(message_count or 0),
                 block_count=block_total,
-                mask_count=int(mask_total),
-                has_sensitive_action=(block_total + int(mask_total)) > 0,
+                mask_count=mask_total,
+                has_sensitive_action=(block_total + mask_total) > 0,
             )
         )
 
-    next_cursor = _encode_offset_cursor(
-        offset=offset,
-        limit=safe_limit,
-        has_more=has_more,
-    )
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1][0]
+        next_cursor = _encode_keyset_cursor(sort_value=last.updated_at, row_id=last.id)
     return items, next_cursor, has_more, total
 
 
@@ -197,17 +242,18 @@ def get_admin_conversation_detail(
     session: Session,
     conversation_id: UUID,
 ) -> AdminConversationDetailOut:
-    stats_sq = _conversation_stats_subquery()
     stmt = (
         select(
             Conversation,
             User,
-            stats_sq.c.message_count,
-            stats_sq.c.block_count,
-            stats_sq.c.mask_count,
+            ConversationStats.message_count,
+            ConversationStats.block_count,
+            ConversationStats.mask_count,
         )
         .join(User, User.id == Conversation.user_id)
-        .outerjoin(stats_sq, stats_sq.c.conversation_id == Conversation.id)
+        .outerjoin(
+            ConversationStats, ConversationStats.conversation_id == Conversation.id
+        )
         .where(Conversation.id == conversation_id)
     )
     row = session.exec(stmt).first()
@@ -260,8 +306,16 @@ def list_admin_conversation_messages_page(
     oldest_seq = rows[0].sequence_number if rows else None
     newest_seq = rows[-1].sequence_number if rows else None
     next_before_seq = oldest_seq if has_more else None
+    # This page backs the admin message detail view: merge the cold
+    # signals / stage timings split off into message_scan_diagnostics.
+    diagnostics = conversation_service.load_message_scan_diagnostics_many(
+        session=session, message_ids=[row.id for row in rows]
+    )
     items = [
-        conversation_service.build_admin_message_detail(message=row) for row in rows
+        conversation_service.build_admin_message_detail(
+            message=row, diagnostics=diagnostics.get(row.id)
+        )
+        for row in rows
     ]
     return items, has_more, next_before_seq, oldest_seq, newest_seq
 
@@ -274,7 +328,7 @@ def list_admin_block_mask_logs_paginated(
     action: str | None = None,
 ) -> tuple[list[AdminBlockMaskLogOut], str | None, bool, int]:
     safe_limit = _normalize_limit(limit=limit)
-    offset = _decode_offset_cursor(cursor=cursor)
+    after = _decode_keyset_cursor(cursor=cursor)
     actions: list[RuleAction] = [RuleAction.block, RuleAction.mask]
     normalized_action = str(action or "").strip().lower()
     if normalized_action == "block":
@@ -289,22 +343,32 @@ def list_admin_block_mask_logs_paginated(
         .where(Message.final_action.in_(actions))
     )
 
-    stmt = (
-        base_stmt.order_by(Message.created_at.desc(), Message.id.desc())
-        .offset(offset)
-        .limit(safe_limit + 1)
+    if after is not None:
+        base_stmt = base_stmt.where(
+            sa.tuple_(Message.created_at, Message.id) < sa.tuple_(*after)
+        )
+    stmt = base_stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(
+        safe_limit + 1
     )
     rows = list(session.exec(stmt).all())
     has_more = len(rows) > safe_limit
     if has_more:
         rows = rows[:safe_limit]
 
-    total = int(
-        session.exec(
-            select(sa.func.count())
-            .select_from(Message)
-            .where(Message.final_action.in_(actions))
+    # Summed from the per-conversation counters, not by counting messages.
+    def _count_actions() -> int:
+        block_total, mask_total = session.exec(
+            select(
+                sa.func.coalesce(sa.func.sum(ConversationStats.block_count), 0),
+                sa.func.coalesce(sa.func.sum(ConversationStats.mask_count), 0),
+            )
         ).one()
+        return int(block_total if RuleAction.block in actions else 0) + int(
+            mask_total if RuleAction.mask in actions else 0
+        )
+
+    total = _cached_count(
+        ("block_mask", tuple(a.value for a in actions)), _count_actions
     )
 
     items: list[AdminBlockMaskLogOut] = []
@@ -342,11 +406,10 @@ def list_admin_block_mask_logs_paginated(
             )
         )
 
-    next_cursor = _encode_offset_cursor(
-        offset=offset,
-        limit=safe_limit,
-        has_more=has_more,
-    )
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1][0]
+        next_cursor = _encode_keyset_cursor(sort_value=last.created_at, row_id=last.id)
     return items, next_cursor, has_more, total
 
 
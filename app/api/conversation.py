@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from datetime import datetime
+import json
 from uuid import UUID
 
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 
-from app.api.deps import SessionDep
+from app.api.deps import AsyncSessionDep, SessionDep
 from app.auth.deps import CurrentPrincipal
 from app.common.enums import ConversationStatus, RuleAction
 from app.common.schemas import ApiResponse
@@ -201,10 +203,14 @@ def delete_conversation(
 async def send_message(
     conversation_id: UUID,
     payload: MessageCreateIn,
-    session: SessionDep,
+    session: AsyncSessionDep,
+    guard_session: SessionDep,
     principal: CurrentPrincipal,
     access: ConversationUpdate,
 ):
+    # The access check ran on the sync session; release its connection
+    # before the send, which uses the async session.
+    guard_session.close()
     msg, assistant_message_id = await convo_service.append_user_message_async(
         session=session,
         conversation_id=conversation_id,
@@ -224,6 +230,62 @@ async def send_message(
     return ApiResponse(ok=True, data=out)
 
 
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.post("/conversations/{conversation_id}/messages/stream")
+async def stream_message(
+    conversation_id: UUID,
+    payload: MessageCreateIn,
+    session: AsyncSessionDep,
+    guard_session: SessionDep,
+    principal: CurrentPrincipal,
+    access: ConversationUpdate,
+):
+    """
+    Server-Sent Events variant of send_message.
+
+    Events: `user_message` (SendMessageOut), `delta` ({"text"}), `halted` and
+    `done` (MessageDetailOut of the saved assistant message, whose content is
+    the authoritative fully scanned reply). A blocked user message ends the
+    stream right after `user_message`.
+    """
+    guard_session.close()
+    events = convo_service.stream_user_message_async(
+        session=session,
+        conversation_id=conversation_id,
+        user_id=principal.user_id,
+        content=payload.content,
+        input_type=payload.input_type,
+    )
+    # Run up to the saved user message before responding so ownership and
+    # validation errors still surface as regular API errors.
+    _, user_msg = await anext(events)
+
+    async def _body():
+        user_out = SendMessageOut.model_validate(
+            convo_service.build_safe_message_detail(message=user_msg)
+        )
+        yield _sse("user_message", user_out.model_dump_json())
+        async for event, value in events:
+            if event == "delta":
+                yield _sse("delta", json.dumps({"text": value}, ensure_ascii=False))
+            elif event == "halted":
+                yield _sse("halted", "{}")
+            elif event == "done":
+                done_out = MessageDetailOut.model_validate(
+                    convo_service.build_safe_message_detail(message=value)
+                )
+                yield _sse("done", done_out.model_dump_json())
+
+    return StreamingResponse(
+        _body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/conversations/{conversation_id}/messages/{message_id}",
     response_model=ApiResponse[MessageDetailOut],
@@ -239,8 +301,11 @@ def get_message_detail(
         conversation_id=conversation_id,
         message_id=message_id,
     )
+    diagnostics = convo_service.load_message_scan_diagnostics(
+        session=session, message_id=row.id
+    )
     out = MessageDetailOut.model_validate(
-        convo_service.build_safe_message_detail(message=row)
+        convo_service.build_safe_message_detail(message=row, diagnostics=diagnostics)
     )
     return ApiResponse(ok=True, data=out)
 
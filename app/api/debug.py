@@ -1,3 +1,4 @@
+import time
 from typing import Any
 from uuid import UUID
 
@@ -6,10 +7,15 @@ from pydantic import BaseModel
 
 from app.api.deps import SessionDep
 from app.auth.deps import require_admin
+from app.common.enums import RuleScope
+from app.common.error_codes import ErrorCode
+from app.common.errors import AppError
 from app.company.model import Company
+from app.core.config import get_settings
 from app.decision.scan_engine_local import ScanEngineLocal
 from app.decision.serializers import entity_to_dict, rulematch_to_dict
 from app.permissions.core import not_found
+from app.rag.decision_cache import get_rag_decision_cache
 
 
 router = APIRouter(
@@ -52,6 +58,42 @@ class FullScanResponse(BaseModel):
     final_action: str
 
 
+class BatchScanRequest(BaseModel):
+    rule_set_id: UUID
+    texts: list[str]
+    scope: RuleScope = RuleScope.prompt
+
+
+class BatchScanItemOut(BaseModel):
+    index: int
+    final_action: str
+    risk_score: float
+    ambiguous: bool
+    cache_hit: bool
+    entities: list[EntityOut]
+    matched_rules: list[RuleMatchOut]
+
+
+class BatchScanResponse(BaseModel):
+    ok: bool = True
+    total: int
+    latency_ms: int
+    items: list[BatchScanItemOut]
+
+
+def _matched_rules_out(matches: list) -> list[dict[str, Any]]:
+    return [
+        {
+            "rule_id": row["rule_id"],
+            "stable_key": row["stable_key"],
+            "name": row["name"],
+            "action": row["action"],
+            "priority": row["priority"],
+        }
+        for row in [rulematch_to_dict(m) for m in matches]
+    ]
+
+
 @router.post("/full-scan", response_model=FullScanResponse)
 async def debug_full_scan(
     req: FullScanRequest,
@@ -72,15 +114,57 @@ async def debug_full_scan(
         "ok": True,
         "entities": [entity_to_dict(e) for e in scan_out["entities"]],
         "signals": dict(scan_out["signals"]),
-        "matched_rules": [
+        "matched_rules": _matched_rules_out(scan_out["matches"]),
+        "final_action": scan_out["final_action"].value,
+    }
+
+
+@router.post("/scan-batch", response_model=BatchScanResponse)
+async def debug_scan_batch(
+    req: BatchScanRequest,
+    session: SessionDep,
+):
+    max_texts = int(get_settings().scan_batch_max_texts)
+    if len(req.texts) > max_texts:
+        raise AppError(
+            422,
+            ErrorCode.VALIDATION_ERROR,
+            f"At most {max_texts} texts per batch",
+            details=[{"field": "texts", "reason": "too_many"}],
+        )
+
+    company = session.get(Company, req.rule_set_id)
+    if company is None:
+        raise not_found("Rule set not found", field="rule_set_id")
+
+    t0 = time.perf_counter()
+    scan_outs = await scan_engine.scan_many(
+        session=session,
+        texts=req.texts,
+        company_id=req.rule_set_id,
+        user_id=None,
+        scope=req.scope,
+    )
+
+    return {
+        "ok": True,
+        "total": len(scan_outs),
+        "latency_ms": int((time.perf_counter() - t0) * 1000),
+        "items": [
             {
-                "rule_id": row["rule_id"],
-                "stable_key": row["stable_key"],
-                "name": row["name"],
-                "action": row["action"],
-                "priority": row["priority"],
+                "index": index,
+                "final_action": scan_out["final_action"].value,
+                "risk_score": float(scan_out["risk_score"]),
+                "ambiguous": bool(scan_out["ambiguous"]),
+                "cache_hit": bool(scan_out.get("cache_hit")),
+                "entities": [entity_to_dict(e) for e in scan_out["entities"]],
+                "matched_rules": _matched_rules_out(scan_out["matches"]),
             }
-            for row in [rulematch_to_dict(m) for m in scan_out["matches"]]
+            for index, scan_out in enumerate(scan_outs)
         ],
-        "final_action": scan_out["final_action"].value,
     }
+
+
+@router.get("/rag-cache")
+def debug_rag_cache_stats() -> dict[str, Any]:
+    return {"ok": True, "stats": get_rag_decision_cache().snapshot_stats()}
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import SessionDep
+from app.auth.deps import CurrentPrincipal, require_admin
+from app.common.schemas import ApiResponse
+from app.rescan import service as rescan_service
+from app.rescan.schemas import MessageRescanJobDetailOut, MessageRescanJobOut
+
+router = APIRouter(
+    prefix="/v1",
+    tags=["rule-set-message-rescan"],
+    dependencies=[Depends(require_admin)],
+)
+
+
+@router.post(
+    "/rule-sets/{rule_set_id}/message-rescan-jobs",
+    response_model=ApiResponse[MessageRescanJobOut],
+)
+def create_message_rescan_job(
+    rule_set_id: UUID,
+    session: SessionDep,
+    principal: CurrentPrincipal,
+):
+    row = rescan_service.request_message_rescan(
+        session=session,
+        company_id=rule_set_id,
+        requested_by=principal.user_id,
+        reason="manual",
+    )
+    return ApiResponse(ok=True, data=row)
+
+
+@router.get(
+    "/rule-sets/{rule_set_id}/message-rescan-jobs",
+    response_model=ApiResponse[list[MessageRescanJobOut]],
+)
+def list_message_rescan_jobs(
+    rule_set_id: UUID,
+    session: SessionDep,
+    limit: int = Query(default=50, ge=1, le=200),
+):
+    rows = rescan_service.list_message_rescan_jobs(
+        session=session,
+        company_id=rule_set_id,
+        limit=limit,
+    )
+    return ApiResponse(ok=True, data=rows)
+
+
+@router.get(
+    "/rule-sets/{rule_set_id}/message-rescan-jobs/{job_id}",
+    response_model=ApiResponse[MessageRescanJobDetailOut],
+)
+def get_message_rescan_job_detail(
+    rule_set_id: UUID,
+    job_id: UUID,
+    session: SessionDep,
+):
+    row = rescan_service.get_message_rescan_job_detail(
+        session=session,
+        company_id=rule_set_id,
+        job_id=job_id,
+    )
+    return ApiResponse(ok=True, data=row)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import Optional
 
 
@@ -13,4 +14,20 @@ class ChatProvider(ABC):
         temperature: float = 0.7,
         model_name: Optional[str] = None,
     ) -> str:
-        ...
\ No newline at end of file
+        ...
+
+    async def stream(
+        self,
+        *,
+        system_prompt: Optional[str],
+        user_message: str,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the reply as text deltas; providers without streaming yield it whole."""
+        yield await self.generate(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            temperature=temperature,
+            model_name=model_name,
+        )
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+import json
 from typing import Optional
 
-import httpx
-
+from app.common.http_clients import GEMINI, get_async_client
 from app.core.config import get_settings
 from .base import ChatProvider
 
@@ -36,19 +37,57 @@ class GeminiProvider(ChatProvider):
         contents.append({"role": "user", "parts": [{"text": user_message}]})
 
         # timeout 15s đủ dùng; muốn "fail-fast" hơn thì giảm 8-10s.
-        async with httpx.AsyncClient(timeout=15) as client:
-            r = await client.post(
-                f"{self.base_url}/models/{model}:generateContent",
-                params={"key": self.api_key},
-                json={
-                    "contents": contents,
-                    "generationConfig": {"temperature": float(temperature)},
-                },
-            )
-            r.raise_for_status()
-            data = r.json()
+        client = get_async_client(GEMINI)
+        r = await client.post(
+            f"{self.base_url}/models/{model}:generateContent",
+            timeout=15,
+            params={"key": self.api_key},
+            json={
+                "contents": contents,
+                "generationConfig": {"temperature": float(temperature)},
+            },
+        )
+        r.raise_for_status()
+        data = r.json()
 
         try:
             return data["candidates"][0]["content"]["parts"][0]["text"].strip()
         except Exception:
             return "Sorry, I couldn't generate a response."
+
+    async def stream(
+        self,
+        *,
+        system_prompt: Optional[str],
+        user_message: str,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        model = (model_name or self.default_model).strip()
+
+        contents: list[dict] = []
+        if system_prompt:
+            contents.append({"role": "user", "parts": [{"text": system_prompt}]})
+        contents.append({"role": "user", "parts": [{"text": user_message}]})
+
+        client = get_async_client(GEMINI)
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/models/{model}:streamGenerateContent",
+            timeout=15,
+            params={"key": self.api_key, "alt": "sse"},
+            json={
+                "contents": contents,
+                "generationConfig": {"temperature": float(temperature)},
+            },
+        ) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = json.loads(line[5:].strip())
+                for candidate in (data.get("candidates") or [])[:1]:
+                    for part in (candidate.get("content") or {}).get("parts") or []:
+                        piece = part.get("text") if isinstance(part, dict) else None
+                        if piece:
+                            yield str(piece)
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+import json
 from typing import Any, Optional
 
-import httpx
-
+from app.common.http_clients import GROQ, get_async_client
 from app.core.config import get_settings
 from .base import ChatProvider
 
@@ -15,14 +16,13 @@ class GroqProvider(ChatProvider):
         self.default_model = settings.groq_model
         self.api_key = (settings.groq_api_key or "").strip()
 
-    async def generate(
+    def _request_body(
         self,
         *,
         system_prompt: Optional[str],
         user_message: str,
-        temperature: float = 0.7,
-        model_name: Optional[str] = None,
-    ) -> str:
+        model_name: Optional[str],
+    ) -> tuple[str, list[dict[str, Any]]]:
         if not self.api_key:
             raise RuntimeError("Groq API key missing")
 
@@ -31,20 +31,36 @@ class GroqProvider(ChatProvider):
         if (system_prompt or "").strip():
             messages.append({"role": "system", "content": (system_prompt or "").strip()})
         messages.append({"role": "user", "content": user_message.strip()})
+        return model, messages
 
-        async with httpx.AsyncClient(base_url=self.base_url, timeout=15) as client:
-            r = await client.post(
-                "/chat/completions",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json={
-                    "model": model,
-                    "messages": messages,
-                    "temperature": float(temperature),
-                    "stream": False,
-                },
-            )
-            r.raise_for_status()
-            data: dict[str, Any] = r.json()
+    async def generate(
+        self,
+        *,
+        system_prompt: Optional[str],
+        user_message: str,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None,
+    ) -> str:
+        model, messages = self._request_body(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            model_name=model_name,
+        )
+
+        client = get_async_client(GROQ)
+        r = await client.post(
+            "/chat/completions",
+            timeout=15,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={
+                "model": model,
+                "messages": messages,
+                "temperature": float(temperature),
+                "stream": False,
+            },
+        )
+        r.raise_for_status()
+        data: dict[str, Any] = r.json()
 
         try:
             content = (
@@ -59,3 +75,44 @@ class GroqProvider(ChatProvider):
         if not text:
             raise RuntimeError("Groq empty response")
         return text
+
+    async def stream(
+        self,
+        *,
+        system_prompt: Optional[str],
+        user_message: str,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        model, messages = self._request_body(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            model_name=model_name,
+        )
+
+        client = get_async_client(GROQ)
+        async with client.stream(
+            "POST",
+            "/chat/completions",
+            timeout=15,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={
+                "model": model,
+                "messages": messages,
+                "temperature": float(temperature),
+                "stream": True,
+            },
+        ) as r:
+            r.raise_for_status()
+            # OpenAI-compatible SSE: `data: {...}` lines, ended by `data: [DONE]`.
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                choices = json.loads(payload).get("choices") or []
+                delta = (choices[0].get("delta") or {}) if choices else {}
+                piece = delta.get("content")
+                if piece:
+                    yield str(piece)
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+import json
 from typing import Optional
 
-import httpx
-
+from app.common.http_clients import OLLAMA, get_async_client
 from app.core.config import get_settings
 from .base import ChatProvider
 
@@ -29,20 +30,57 @@ class OllamaProvider(ChatProvider):
             prompt += system_prompt.strip() + "\n\n"
         prompt += user_message.strip()
 
-        async with httpx.AsyncClient(
-            base_url=self.base_url,
+        client = get_async_client(OLLAMA)
+        r = await client.post(
+            "/api/generate",
             timeout=15,
-        ) as client:
-            r = await client.post(
-                "/api/generate",
-                json={
-                    "model": model,  # ✅ use dynamic model
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {"temperature": float(temperature)},
-                },
-            )
-            r.raise_for_status()
-            data = r.json()
+            json={
+                "model": model,  # ✅ use dynamic model
+                "prompt": prompt,
+                "stream": False,
+                "options": {"temperature": float(temperature)},
+            },
+        )
+        r.raise_for_status()
+        data = r.json()
+
+        return (data.get("response") or "").strip()
 
-        return (data.get("response") or "").strip()
\ No newline at end of file
+    async def stream(
+        self,
+        *,
+        system_prompt: Optional[str],
+        user_message: str,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        model = (model_name or self.default_model).strip()
+
+        prompt = ""
+        if system_prompt:
+            prompt += system_prompt.strip() + "\n\n"
+        prompt += user_message.strip()
+
+        client = get_async_client(OLLAMA)
+        async with client.stream(
+            "POST",
+            "/api/generate",
+            timeout=15,
+            json={
+                "model": model,
+                "prompt": prompt,
+                "stream": True,
+                "options": {"temperature": float(temperature)},
+            },
+        ) as r:
+            r.raise_for_status()
+            # One JSON object per line until `"done": true`.
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                piece = data.get("response")
+                if piece:
+                    yield str(piece)
+                if data.get("done"):
+                    break
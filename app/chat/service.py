@@ -1,6 +1,8 @@
 # app/chat/service.py
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+import logging
 from typing import Optional
 
 from app.chat.providers.base import ChatProvider
@@ -9,6 +11,10 @@ from app.chat.providers.groq import GroqProvider
 from app.chat.providers.ollama import OllamaProvider
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_REPLY = "Service temporarily unavailable."
+
 
 def _is_gemini_model(name: Optional[str]) -> bool:
     return bool(name and name.lower().startswith("gemini-"))
@@ -75,6 +81,21 @@ class ChatService:
             model_name=model_name,
         )
 
+    def _provider_chain(
+        self, model_name: Optional[str]
+    ) -> list[tuple[str, Optional[str]]]:
+        if model_name:
+            chosen_provider, routed_model = _resolve_model_route(
+                model_name=model_name,
+                default_provider=self.primary_name,
+            )
+            return [(chosen_provider, routed_model)] + [
+                (p, None)
+                for p in [self.primary_name, *self.fallback_order]
+                if p != chosen_provider
+            ]
+        return [(p, None) for p in [self.primary_name, *self.fallback_order]]
+
     async def generate_reply(
         self,
         *,
@@ -83,38 +104,51 @@ class ChatService:
         temperature: float = 0.7,
         model_name: Optional[str] = None,
     ) -> str:
-        if model_name:
-            chosen_provider, routed_model = _resolve_model_route(
-                model_name=model_name,
-                default_provider=self.primary_name,
-            )
-            chain = [chosen_provider] + [
-                p for p in [self.primary_name, *self.fallback_order] if p != chosen_provider
-            ]
-
-            for idx, provider_name in enumerate(chain):
-                try:
-                    return await self._generate_with_provider(
-                        provider_name=provider_name,
-                        system_prompt=system_prompt,
-                        user_message=user_message,
-                        temperature=temperature,
-                        model_name=routed_model if idx == 0 else None,
-                    )
-                except Exception:
-                    continue
-            return "Service temporarily unavailable."
-
-        chain = [self.primary_name, *self.fallback_order]
-        for provider_name in chain:
+        for provider_name, routed_model in self._provider_chain(model_name):
             try:
                 return await self._generate_with_provider(
                     provider_name=provider_name,
                     system_prompt=system_prompt,
                     user_message=user_message,
                     temperature=temperature,
-                    model_name=None,
+                    model_name=routed_model,
                 )
             except Exception:
                 continue
-        return "Service temporarily unavailable."
+        return UNAVAILABLE_REPLY
+
+    async def stream_reply(
+        self,
+        *,
+        system_prompt: Optional[str],
+        user_message: str,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Same provider routing/fallback as `generate_reply`, as text deltas.
+
+        A provider is only skipped while it has produced nothing; once deltas
+        were yielded, a failure ends the reply with what was received.
+        """
+        for provider_name, routed_model in self._provider_chain(model_name):
+            started = False
+            try:
+                async for piece in self.providers[provider_name].stream(
+                    system_prompt=system_prompt,
+                    user_message=user_message,
+                    temperature=temperature,
+                    model_name=routed_model,
+                ):
+                    started = True
+                    yield piece
+                if started:
+                    return
+            except Exception:
+                if started:
+                    logger.warning(
+                        "chat.stream.interrupted provider=%s", provider_name
+                    )
+                    return
+                continue
+        yield UNAVAILABLE_REPLY
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import json
+import logging
+from threading import Event, Lock, Thread
+from typing import Any, Optional
+from uuid import UUID
+
+import redis
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+RULES_KIND = "rules"
+CONTEXT_TERMS_KIND = "context_terms"
+POLICIES_KIND = "policies"
+
+
+@dataclass(slots=True, frozen=True)
+class CacheInvalidation:
+    kind: str
+    company_id: Optional[UUID]
+    user_id: Optional[UUID]
+    all_scopes: bool
+    version: Optional[int]
+
+
+InvalidationHandler = Callable[[CacheInvalidation], None]
+
+_handlers: dict[str, list[InvalidationHandler]] = {}
+_handlers_lock = Lock()
+
+_publisher: Optional[redis.Redis] = None
+_publisher_lock = Lock()
+
+_listener: Optional["_InvalidationListener"] = None
+_listener_lock = Lock()
+
+# Without Redis the counter of each kind lives in this process only.
+_local_counters: dict[str, int] = {}
+_local_counters_lock = Lock()
+
+# One counter per kind orders every invalidation of that kind; each scope key
+# remembers the counter value of its last invalidation. Atomic, so a slower
+# publisher can never move a scope key back.
+_BUMP_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('SET', KEYS[2], version)
+return version
+"""
+
+
+def _redis_url() -> str:
+    return (get_settings().redis_url or "").strip()
+
+
+def _channel_name() -> str:
+    name = (get_settings().runtime_cache_channel or "").strip()
+    return name or "runtime_cache_invalidation"
+
+
+def _scope_token(
+    *, company_id: Optional[UUID], user_id: Optional[UUID], all_scopes: bool
+) -> str:
+    if all_scopes:
+        return "all"
+    return f"{company_id or '-'}:{user_id or '-'}"
+
+
+def _counter_key(*, kind: str) -> str:
+    return f"{_channel_name()}:counter:{kind}"
+
+
+def _version_key(*, kind: str, scope_token: str) -> str:
+    return f"{_channel_name()}:scope:{kind}:{scope_token}"
+
+
+def _get_publisher() -> Optional[redis.Redis]:
+    global _publisher
+
+    redis_url = _redis_url()
+    if not redis_url:
+        return None
+
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = redis.Redis.from_url(
+                redis_url,
+                decode_responses=True,
+                socket_timeout=1.0,
+                socket_connect_timeout=1.0,
+            )
+        return _publisher
+
+
+def register_invalidation_handler(kind: str, handler: InvalidationHandler) -> None:
+    with _handlers_lock:
+        _handlers.setdefault(kind, []).append(handler)
+
+
+def _dispatch(event: CacheInvalidation) -> None:
+    with _handlers_lock:
+        handlers = list(_handlers.get(event.kind, []))
+    for handler in handlers:
+        try:
+            handler(event)
+        except Exception:
+            logger.exception("cache invalidation handler failed: kind=%s", event.kind)
+
+
+def publish_invalidation(
+    *,
+    kind: str,
+    company_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    all_scopes: bool = False,
+) -> Optional[int]:
+    """
+    Bump the version of a cache scope and broadcast it to every worker.
+
+    Versions of one kind all come from a single monotonic counter, so a scope
+    version and the all-scopes version can be compared and callers store them
+    as-is. Returns the new version (from a process-local counter when Redis is
+    not configured), or None when Redis is configured but not reachable:
+    callers then only drop their local entries.
+    """
+    client = _get_publisher()
+    if client is None:
+        with _local_counters_lock:
+            version = _local_counters.get(kind, 0) + 1
+            _local_counters[kind] = version
+        return version
+
+    scope_token = _scope_token(
+        company_id=company_id, user_id=user_id, all_scopes=all_scopes
+    )
+    try:
+        version = int(
+            client.eval(
+                _BUMP_SCRIPT,
+                2,
+                _counter_key(kind=kind),
+                _version_key(kind=kind, scope_token=scope_token),
+            )
+        )
+        client.publish(
+            _channel_name(),
+            json.dumps(
+                {
+                    "kind": kind,
+                    "company_id": str(company_id) if company_id else None,
+                    "user_id": str(user_id) if user_id else None,
+                    "all": bool(all_scopes),
+                    "version": version,
+                }
+            ),
+        )
+        return version
+    except Exception as exc:
+        logger.warning("cache invalidation publish failed: kind=%s error=%s", kind, exc)
+        return None
+
+
+def fetch_shared_version(
+    *,
+    kind: str,
+    company_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+) -> Optional[int]:
+    """
+    Read the shared version of a scope: the counter value of the latest
+    invalidation of that scope or of all scopes, whichever came last.
+
+    Only meaningful while the listener is connected; returns None otherwise.
+    """
+    if not listener_active():
+        return None
+    client = _get_publisher()
+    if client is None:
+        return None
+
+    scope_token = _scope_token(company_id=company_id, user_id=user_id, all_scopes=False)
+    try:
+        raw = client.mget(
+            _version_key(kind=kind, scope_token="all"),
+            _version_key(kind=kind, scope_token=scope_token),
+        )
+    except Exception:
+        return None
+    return max(int(x or 0) for x in raw)
+
+
+def _parse_uuid(value: Any) -> Optional[UUID]:
+    if not value:
+        return None
+    return UUID(str(value))
+
+
+def _parse_message(data: Any) -> Optional[CacheInvalidation]:
+    try:
+        obj = json.loads(data)
+        version = obj.get("version")
+        return CacheInvalidation(
+            kind=str(obj.get("kind") or ""),
+            company_id=_parse_uuid(obj.get("company_id")),
+            user_id=_parse_uuid(obj.get("user_id")),
+            all_scopes=bool(obj.get("all")),
+            version=int(version) if version is not None else None,
+        )
+    except Exception:
+        logger.warning("skip malformed cache invalidation message: %r", data)
+        return None
+
+
+def _drop_all_local_caches() -> None:
+    with _handlers_lock:
+        kinds = list(_handlers.keys())
+    for kind in kinds:
+        _dispatch(
+            CacheInvalidation(
+                kind=kind,
+                company_id=None,
+                user_id=None,
+                all_scopes=True,
+                version=None,
+            )
+        )
+
+
+class _InvalidationListener:
+    def __init__(self, *, redis_url: str, channel: str):
+        self.redis_url = redis_url
+        self.channel = channel
+        self._stop = Event()
+        self._connected = Event()
+        self._thread = Thread(
+            target=self._run,
+            name="runtime-cache-invalidation",
+            daemon=True,
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, *, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        backoff_s = 0.5
+        while not self._stop.is_set():
+            client = redis.Redis.from_url(self.redis_url, decode_responses=True)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                # Anything published while we were not subscribed is lost, so
+                # start from empty local caches on every (re)connect.
+                _drop_all_local_caches()
+                self._connected.set()
+                backoff_s = 0.5
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message or message.get("type") != "message":
+                        continue
+                    event = _parse_message(message.get("data"))
+                    if event is not None:
+                        _dispatch(event)
+            except Exception as exc:
+                if self._connected.is_set():
+                    logger.warning("cache invalidation listener disconnected: %s", exc)
+            finally:
+                self._connected.clear()
+                try:
+                    pubsub.close()
+                    client.close()
+                except Exception:
+                    pass
+            self._stop.wait(backoff_s)
+            backoff_s = min(10.0, backoff_s * 2)
+
+
+def start_invalidation_listener() -> bool:
+    global _listener
+
+    redis_url = _redis_url()
+    if not redis_url:
+        return False
+
+    with _listener_lock:
+        if _listener is None:
+            _listener = _InvalidationListener(
+                redis_url=redis_url,
+                channel=_channel_name(),
+            )
+            _listener.start()
+    return True
+
+
+def stop_invalidation_listener() -> None:
+    global _listener
+
+    with _listener_lock:
+        listener = _listener
+        _listener = None
+    if listener is not None:
+        listener.stop()
+
+
+def listener_active() -> bool:
+    listener = _listener
+    return bool(listener is not None and listener.connected)
+
+
+def local_cache_ttl_seconds(*, fallback_seconds: float) -> float:
+    """
+    Local runtime caches may live for minutes only while this worker is
+    subscribed to invalidations; otherwise keep the short fallback TTL.
+    """
+    if listener_active():
+        return float(get_settings().runtime_cache_ttl_seconds)
+    return float(fallback_seconds)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import importlib.util
+import logging
+from threading import Lock
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+OLLAMA = "ollama"
+GROQ = "groq"
+GEMINI = "gemini"
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+
+@dataclass(slots=True, frozen=True)
+class _ClientProfile:
+    base_url: str
+    max_connections: int
+    http2: bool
+
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 with the optional `h2` package installed.
+    return importlib.util.find_spec("h2") is not None
+
+
+def _profile(name: str) -> _ClientProfile:
+    settings = get_settings()
+    http2 = bool(settings.http_client_http2) and _http2_available()
+    if name == OLLAMA:
+        # Local Ollama serves plain HTTP/1.1.
+        return _ClientProfile(
+            base_url=settings.ollama_base_url.rstrip("/"),
+            max_connections=settings.ollama_max_connections,
+            http2=False,
+        )
+    if name == GROQ:
+        return _ClientProfile(
+            base_url=settings.groq_base_url.rstrip("/"),
+            max_connections=settings.groq_max_connections,
+            http2=http2,
+        )
+    if name == GEMINI:
+        return _ClientProfile(
+            base_url=GEMINI_BASE_URL,
+            max_connections=settings.gemini_max_connections,
+            http2=http2,
+        )
+    raise ValueError(f"Unknown HTTP client: {name}")
+
+
+def _limits(profile: _ClientProfile) -> httpx.Limits:
+    settings = get_settings()
+    max_connections = max(1, int(profile.max_connections))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=float(settings.http_client_keepalive_expiry_seconds),
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    # Callers pass their own per-request timeout; this is only the default.
+    return httpx.Timeout(30.0, connect=5.0)
+
+
+# Async pools are bound to the event loop that opened their connections, so
+# they are kept per loop (the app has one; scripts and tests may run several).
+_async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]]" = (
+    WeakKeyDictionary()
+)
+_sync_clients: dict[str, httpx.Client] = {}
+_lock = Lock()
+
+
+def get_async_client(name: str) -> httpx.AsyncClient:
+    """Keep-alive AsyncClient for a provider, shared by every caller on this loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(name)
+        if client is None or client.is_closed:
+            profile = _profile(name)
+            client = httpx.AsyncClient(
+                base_url=profile.base_url,
+                http2=profile.http2,
+                limits=_limits(profile),
+                timeout=_timeout(),
+            )
+            clients[name] = client
+        return client
+
+
+def get_sync_client(name: str) -> httpx.Client:
+    """Keep-alive Client for a provider, shared process-wide (thread-safe)."""
+    with _lock:
+        client = _sync_clients.get(name)
+        if client is None or client.is_closed:
+            profile = _profile(name)
+            client = httpx.Client(
+                base_url=profile.base_url,
+                http2=profile.http2,
+                limits=_limits(profile),
+                timeout=_timeout(),
+            )
+            _sync_clients[name] = client
+        return client
+
+
+def start_http_clients() -> None:
+    """Open the async pools up front so the first requests skip client setup."""
+    for name in (OLLAMA, GROQ, GEMINI):
+        get_async_client(name)
+
+
+async def close_http_clients() -> None:
+    loop: Optional[asyncio.AbstractEventLoop]
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _lock:
+        async_clients = list((_async_clients.pop(loop, {}) if loop else {}).values())
+        sync_clients = list(_sync_clients.values())
+        _sync_clients.clear()
+
+    for client in async_clients:
+        try:
+            await client.aclose()
+        except Exception as exc:
+            logger.warning("http client close failed: %s", exc)
+    for client in sync_clients:
+        try:
+            client.close()
+        except Exception as exc:
+            logger.warning("http client close failed: %s", exc)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import atexit
+from collections import deque
+from collections.abc import Callable, Sequence
+import logging
+from threading import Condition, Lock, Thread
+import time
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlmodel import Session, SQLModel
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# What to do with a new row while `max_pending` rows are already waiting.
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_BLOCK = "block"
+_OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK)
+
+# sink(table, rows): insert `rows` (column -> value, same keys) into `table`.
+BatchSink = Callable[[sa.Table, list[dict[str, Any]]], None]
+
+
+def _row_values(row: SQLModel) -> dict[str, Any]:
+    table = row.__table__
+    values: dict[str, Any] = {}
+    for column in table.columns:
+        value = getattr(row, column.name, None)
+        # Unset server-side defaults (e.g. created_at) are left to the DB.
+        if value is None and column.server_default is not None:
+            continue
+        values[column.name] = value
+    return values
+
+
+def _insert_with_engine(table: sa.Table, rows: list[dict[str, Any]]) -> None:
+    from app.db.engine import engine
+
+    with Session(engine) as session:
+        # One executemany: SQLAlchemy folds it into multi-row INSERT ... VALUES.
+        session.execute(sa.insert(table), rows)
+        session.commit()
+
+
+class LogWriteBuffer:
+    """
+    Write-behind buffer for append-only log rows (RAG retrieval logs).
+
+    `submit` only queues the row; a background thread inserts queued rows in
+    batches, once `batch_size` rows are waiting or `flush_interval_seconds`
+    after the oldest one arrived, so logging adds no commit to the request.
+    At most `max_pending` rows wait in memory; past that the `overflow`
+    policy drops the oldest or the new row, or blocks the caller for up to
+    `block_timeout_seconds` (meant for background workers) before dropping.
+
+    Writes are best effort: a batch that fails to insert is logged and
+    dropped, as the inline writes were.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int,
+        flush_interval_seconds: float,
+        max_pending: int,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        block_timeout_seconds: float = 1.0,
+        sink: Optional[BatchSink] = None,
+    ):
+        if overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log writer overflow policy: {overflow}")
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_seconds = max(0.0, float(flush_interval_seconds))
+        self.max_pending = max(self.batch_size, int(max_pending))
+        self.overflow = overflow
+        self.block_timeout_seconds = max(0.0, float(block_timeout_seconds))
+        self.dropped = 0
+        self._sink = sink or _insert_with_engine
+        self._pending: deque[tuple[sa.Table, dict[str, Any]]] = deque()
+        self._first_pending_at: Optional[float] = None
+        self._cond = Condition()
+        self._write_lock = Lock()
+        self._stopping = False
+        self._thread: Optional[Thread] = None
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = Thread(
+                target=self._run, name="log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, row: SQLModel) -> bool:
+        """Queue one row; False when the overflow policy dropped it."""
+        item = (row.__table__, _row_values(row))
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                if not self._make_room():
+                    self.dropped += 1
+                    return False
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append(item)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _make_room(self) -> bool:
+        # Caller holds self._cond.
+        if self.overflow == OVERFLOW_DROP_OLDEST:
+            self._pending.popleft()
+            self.dropped += 1
+            return True
+        if self.overflow == OVERFLOW_BLOCK:
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: len(self._pending) < self.max_pending,
+                timeout=self.block_timeout_seconds,
+            )
+        return False
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows written."""
+        written = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def stop(self) -> None:
+        with self._cond:
+            thread = self._thread
+            self._thread = None
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout=max(5.0, self.flush_interval_seconds * 2))
+        self.flush()
+
+    def _take_batch(self) -> list[tuple[sa.Table, dict[str, Any]]]:
+        with self._cond:
+            n = min(self.batch_size, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(n)]
+            self._first_pending_at = time.monotonic() if self._pending else None
+            if batch:
+                self._cond.notify_all()
+            return batch
+
+    def _write(self, batch: Sequence[tuple[sa.Table, dict[str, Any]]]) -> int:
+        # Rows of one table with the same columns share one multi-row insert.
+        groups: dict[tuple[str, tuple[str, ...]], list[dict[str, Any]]] = {}
+        tables: dict[str, sa.Table] = {}
+        for table, values in batch:
+            key = (table.name, tuple(sorted(values)))
+            groups.setdefault(key, []).append(values)
+            tables[table.name] = table
+
+        written = 0
+        with self._write_lock:
+            for (table_name, _), rows in groups.items():
+                try:
+                    self._sink(tables[table_name], rows)
+                    written += len(rows)
+                except Exception as exc:
+                    self.dropped += len(rows)
+                    logger.warning(
+                        "log writer dropped %s %s rows: %s",
+                        len(rows),
+                        table_name,
+                        exc,
+                    )
+        return written
+
+    def _due(self) -> bool:
+        # Caller holds self._cond.
+        if not self._pending:
+            return False
+        if self._stopping or len(self._pending) >= self.batch_size:
+            return True
+        waited = time.monotonic() - (self._first_pending_at or 0.0)
+        return waited >= self.flush_interval_seconds
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._stopping:
+                        return
+                    timeout = None
+                    if self._pending:
+                        timeout = self.flush_interval_seconds - (
+                            time.monotonic() - (self._first_pending_at or 0.0)
+                        )
+                    self._cond.wait(timeout=timeout)
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+
+_writer: Optional[LogWriteBuffer] = None
+_writer_lock = Lock()
+
+
+def get_log_writer() -> Optional[LogWriteBuffer]:
+    """Shared started buffer, or None when write-behind logging is disabled."""
+    global _writer
+
+    settings = get_settings()
+    if not settings.log_write_behind_enabled:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriteBuffer(
+                batch_size=settings.log_write_batch_size,
+                flush_interval_seconds=settings.log_write_flush_interval_seconds,
+                max_pending=settings.log_write_max_pending,
+                overflow=settings.log_write_overflow,
+                block_timeout_seconds=settings.log_write_block_timeout_seconds,
+            )
+            _writer.start()
+            # Workers have no lifespan hook; still drain the queue on exit.
+            atexit.register(shutdown_log_writer)
+        return _writer
+
+
+def defer_log_row(row: SQLModel) -> bool:
+    """
+    Hand a log row to the shared write-behind buffer.
+
+    False when write-behind is disabled; the caller then writes the row itself.
+    A row dropped by the overflow policy still counts as handled.
+    """
+    writer = get_log_writer()
+    if writer is None:
+        return False
+    writer.submit(row)
+    return True
+
+
+def shutdown_log_writer() -> None:
+    global _writer
+
+    with _writer_lock:
+        writer = _writer
+        _writer = None
+    if writer is not None:
+        writer.stop()
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
@@ -14,6 +15,7 @@ class Conversation(TimestampMixin, SQLModel, table=True):
     __table_args__ = (
         Index("ix_conversations_user_created", "user_id", "created_at"),
         Index("ix_conversations_company_user", "company_id", "user_id"),
+        Index("ix_conversations_updated_id", "updated_at", "id"),
     )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -50,3 +52,39 @@ class Conversation(TimestampMixin, SQLModel, table=True):
     messages: list["Message"] = Relationship(back_populates="conversation")
 
 
+
+
+class ConversationStats(SQLModel, table=True):
+    """
+    Per-conversation message counters for admin monitoring.
+
+    Maintained by the `messages` insert/update/delete trigger (migration
+    c7d1f5a2e8b4), so every write path keeps it current; never written by
+    the app.
+    """
+
+    __tablename__ = "conversation_stats"
+
+    conversation_id: UUID = Field(
+        sa_column=sa.Column(
+            sa.Uuid,
+            sa.ForeignKey("conversations.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    message_count: int = Field(
+        default=0,
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"),
+    )
+    block_count: int = Field(
+        default=0,
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"),
+    )
+    mask_count: int = Field(
+        default=0,
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"),
+    )
+    # Same clock as messages.created_at (naive UTC).
+    last_message_at: Optional[datetime] = Field(
+        default=None, sa_column=sa.Column(sa.DateTime, nullable=True)
+    )
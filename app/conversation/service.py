@@ -1,19 +1,25 @@
 # app/conversation/service.py
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 import hashlib
 import re
 import unicodedata
+from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
 from uuid import UUID
 
 import anyio
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import distinct_on
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.chat.service import ChatService
 from app.company import service as company_service
 from app.common.error_codes import ErrorCode
+from app.common.log_writer import defer_log_row
 from app.common.errors import AppError
 from app.common.enums import (
     ConversationStatus,
@@ -27,11 +33,13 @@ from app.common.enums import (
 from app.auth.model import User
 from app.company.model import Company
 from app.conversation.model import Conversation
+from app.conversation.streaming import StreamingOutputGuard
 from app.core.config import get_settings
+from app.db.async_bridge import run_db
 from app.decision.scan_engine_local import ScanEngineLocal
 from app.decision.serializers import entity_to_dict, rulematch_to_dict
 from app.masking.service import MaskService
-from app.messages.model import Message
+from app.messages.model import Message, MessageScanDiagnostics
 from app.permissions.core import not_found
 from app.permissions.loaders.conversation import load_rule_set_owner_active_or_403
 from app.rule.model import Rule
@@ -370,25 +378,22 @@ def create_company_conversation(
     )
 
 
-async def append_user_message_async(
-    *,
-    session: Session,
-    conversation_id: UUID,
-    user_id: UUID,
-    content: str,
-    input_type: MessageInputType = MessageInputType.user_input,
-) -> tuple[Message, UUID | None]:
-    """
-    Async flow:
-      1) Save USER message (scan + mask/block)
-      2) Call ChatService
-      3) Save ASSISTANT message (scan + mask/block)
-    Return: (user_msg, assistant_message_id)
-    """
-    stmt = (
-        select(Conversation).where(Conversation.id == conversation_id).with_for_update()
-    )
-    c = session.exec(stmt).first()
+@dataclass(frozen=True, slots=True)
+class _SendContext:
+    """Conversation values a send needs once the DB connection is released."""
+
+    conversation_id: UUID
+    company_id: UUID | None
+    user_id: UUID
+    system_prompt: str | None
+    temperature: float
+    model_name: str | None
+
+
+def _load_send_context(
+    *, session: Session, conversation_id: UUID, user_id: UUID
+) -> _SendContext:
+    c = session.get(Conversation, conversation_id)
     if not c:
         raise not_found("Conversation not found", field="conversation_id")
 
@@ -404,152 +409,440 @@ async def append_user_message_async(
             field="conversation_id",
             reason="conversation_archived",
         )
+    return _SendContext(
+        conversation_id=c.id,
+        company_id=c.company_id,
+        user_id=user_id,
+        system_prompt=_resolve_system_prompt(session=session, conversation=c),
+        temperature=float(c.temperature or 0.7),
+        model_name=c.model_name,
+    )
+
+
+def _reserve_sequence_numbers(
+    *, session: Session, conversation_id: UUID, count: int
+) -> int:
+    """
+    Atomically take `count` consecutive sequence numbers; returns the first.
+
+    The UPDATE row lock only lasts until the caller's insert commits, so
+    concurrent sends are serialized on this statement alone rather than
+    across scans and the LLM round-trip.
+    """
+    stmt = (
+        sa.update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(last_sequence_number=Conversation.last_sequence_number + count)
+        .returning(Conversation.last_sequence_number)
+        .execution_options(synchronize_session=False)
+    )
+    last = session.execute(stmt).scalar_one()
+    return int(last) - count + 1
 
-    # STEP 1: user message
-    c.last_sequence_number = (c.last_sequence_number or 0) + 1
-    user_seq = c.last_sequence_number
 
-    user_scan = await _scan.scan(
+def _end_transaction(*, session: Session) -> None:
+    # Returns the pooled connection before a long await; nothing is pending.
+    session.commit()
+
+
+def _mask_scanned_text(
+    *, session: Session, text: str, entities: list, scan: dict
+) -> str:
+    forced_terms = _extract_forced_mask_terms_from_matches(
         session=session,
-        text=content,
-        company_id=c.company_id,
-        user_id=user_id,
-        scope=RuleScope.chat,
+        matches=scan["matches"],
+    )
+    return _mask_with_forced_terms(
+        text=text, entities=entities, scan=scan, forced_terms=forced_terms
     )
 
-    user_final: RuleAction = user_scan["final_action"]
-    user_entities = user_scan["entities"]
-    user_matches = user_scan["matches"]
 
-    user_blocked = user_final == RuleAction.block
+def _mask_with_forced_terms(
+    *, text: str, entities: list, scan: dict, forced_terms: list[str]
+) -> str:
+    return _mask_service.mask(
+        text,
+        entities,
+        extra_terms=_extract_code_like_mask_terms(scan),
+        force_terms=forced_terms,
+    )
 
-    user_masked = None
-    if user_final == RuleAction.mask:
-        forced_terms = _extract_forced_mask_terms_from_matches(
-            session=session,
-            matches=user_matches,
-        )
-        user_masked = _mask_service.mask(
-            content,
-            user_entities,
-            extra_terms=_extract_code_like_mask_terms(user_scan),
-            force_terms=forced_terms,
+
+def build_message_scan_fields(*, session: Session, content: str, scan: dict) -> dict:
+    """Message columns derived from a scan result (shared with re-scan jobs)."""
+    final: RuleAction = scan["final_action"]
+    entities = scan["entities"]
+    matches = scan["matches"]
+
+    masked = None
+    if final == RuleAction.mask:
+        masked = _mask_scanned_text(
+            session=session, text=content, entities=entities, scan=scan
         )
 
-    user_entities_json = {
-        "entities": [entity_to_dict(e) for e in user_entities],
-        "signals": user_scan["signals"],
-        "matched_rules": [rulematch_to_dict(m) for m in user_matches],
-        "timing_ms_by_stage": user_scan.get("timing_ms_by_stage") or {},
+    # Signals and stage timing go to MessageScanDiagnostics instead.
+    entities_json = {
+        "entities": [entity_to_dict(e) for e in entities],
+        "matched_rules": [rulematch_to_dict(m) for m in matches],
     }
-    user_matched_rule_ids = [str(m.rule_id) for m in user_matches]
 
-    user_msg = Message(
-        conversation_id=c.id,
-        role=MessageRole.user,
-        sequence_number=user_seq,
+    return {
+        "content_masked": masked,
+        "scan_status": ScanStatus.done,
+        "final_action": final,
+        "risk_score": scan["risk_score"],
+        "ambiguous": scan["ambiguous"],
+        "matched_rule_ids": [str(m.rule_id) for m in matches],
+        "entities_json": entities_json,
+    }
+
+
+def build_message_scan_diagnostics(scan: dict) -> dict:
+    return {
+        "signals": scan.get("signals") or {},
+        "timing_ms_by_stage": scan.get("timing_ms_by_stage") or {},
+    }
+
+
+def _save_scan_diagnostics(*, session: Session, row: MessageScanDiagnostics) -> None:
+    # Diagnostics are best effort and must never fail the message.
+    try:
+        session.add(row)
+        session.commit()
+    except Exception:
+        session.rollback()
+
+
+def record_message_scan_diagnostics(
+    *, session: Session, message_id: UUID, scan: dict
+) -> None:
+    """Store the cold part of a scan; the message row must already exist."""
+    row = MessageScanDiagnostics(
+        message_id=message_id,
+        diagnostics_json=build_message_scan_diagnostics(scan),
+    )
+    if not defer_log_row(row):
+        _save_scan_diagnostics(session=session, row=row)
+
+
+def load_message_scan_diagnostics(
+    *, session: Session, message_id: UUID
+) -> dict | None:
+    return session.exec(
+        select(MessageScanDiagnostics.diagnostics_json)
+        .where(MessageScanDiagnostics.message_id == message_id)
+        .order_by(MessageScanDiagnostics.created_at.desc())
+        .limit(1)
+    ).first()
+
+
+def load_message_scan_diagnostics_many(
+    *, session: Session, message_ids: list[UUID]
+) -> dict[UUID, dict]:
+    """Latest diagnostics of each message of a page, in one query."""
+    if not message_ids:
+        return {}
+    rows = session.exec(
+        select(
+            MessageScanDiagnostics.message_id,
+            MessageScanDiagnostics.diagnostics_json,
+        )
+        .where(MessageScanDiagnostics.message_id.in_(message_ids))
+        .ext(distinct_on(MessageScanDiagnostics.message_id))
+        .order_by(
+            MessageScanDiagnostics.message_id,
+            MessageScanDiagnostics.created_at.desc(),
+        )
+    ).all()
+    return {message_id: diagnostics for message_id, diagnostics in rows}
+
+
+def _build_scanned_message(
+    *,
+    session: Session,
+    conversation_id: UUID,
+    role: MessageRole,
+    input_type: MessageInputType,
+    content: str,
+    scan: dict,
+) -> Message:
+    return Message(
+        conversation_id=conversation_id,
+        role=role,
+        sequence_number=0,  # assigned in _save_message
         input_type=input_type,
         content=content,
         content_hash=_sha256_hex(content),
-        content_masked=user_masked,
-        scan_status=ScanStatus.done,
         pre_rag_action=None,
-        final_action=user_final,
-        risk_score=user_scan["risk_score"],
-        ambiguous=user_scan["ambiguous"],
-        matched_rule_ids=user_matched_rule_ids,
-        entities_json=user_entities_json,
         rag_evidence_json=None,
-        latency_ms=user_scan["latency_ms"],
+        latency_ms=scan["latency_ms"],
+        **build_message_scan_fields(session=session, content=content, scan=scan),
     )
 
-    session.add(user_msg)
-    session.add(c)
-    session.commit()
-    session.refresh(user_msg)
 
-    if user_blocked:
-        return user_msg, None
+def _save_message(
+    *, session: Session, message: Message, sequence_number: int
+) -> Message:
+    message.sequence_number = sequence_number
+    session.add(message)
+    session.flush()
+    # Every column is set in Python, so the detached row stays readable after
+    # the commit without a reload opening a new transaction.
+    session.expunge(message)
+    session.commit()
+    return message
 
-    # STEP 2: call chat provider
-    llm_input = user_masked or content
-    system_prompt = _resolve_system_prompt(session=session, conversation=c)
-    temperature = float(c.temperature or 0.7)
-    model_name = c.model_name
 
-    assistant_text = await _chat.generate_reply(
-        system_prompt=system_prompt,
-        user_message=llm_input,
-        temperature=temperature,
-        model_name=model_name,
-    )
-
-    assistant_scan = await _scan.scan(
+async def _scan_chat_text(
+    *,
+    session: Session | AsyncSession,
+    ctx: _SendContext,
+    text: str,
+    local_only: bool = False,
+) -> dict:
+    return await _scan.scan(
         session=session,
-        text=assistant_text,
-        company_id=c.company_id,
-        user_id=user_id,
+        text=text,
+        company_id=ctx.company_id,
+        user_id=ctx.user_id,
         scope=RuleScope.chat,
+        local_only=local_only,
+        release_session=partial(run_db, session, _end_transaction),
     )
 
-    # STEP 3: assistant message
-    c.last_sequence_number = (c.last_sequence_number or 0) + 1
-    asst_seq = c.last_sequence_number
-
-    asst_final: RuleAction = assistant_scan["final_action"]
-    asst_entities = assistant_scan["entities"]
-    asst_matches = assistant_scan["matches"]
 
-    asst_blocked = asst_final == RuleAction.block
+async def _save_user_message_async(
+    *,
+    session: Session | AsyncSession,
+    conversation_id: UUID,
+    user_id: UUID,
+    content: str,
+    input_type: MessageInputType,
+) -> tuple[_SendContext, Message]:
+    """
+    Scan and save the user message; returns with no transaction open.
 
-    asst_masked = None
-    if asst_final == RuleAction.mask:
-        forced_terms = _extract_forced_mask_terms_from_matches(
-            session=session,
-            matches=asst_matches,
-        )
-        asst_masked = _mask_service.mask(
-            assistant_text,
-            asst_entities,
-            extra_terms=_extract_code_like_mask_terms(assistant_scan),
-            force_terms=forced_terms,
-        )
+    A non-blocked message also reserves the next sequence number for the
+    assistant reply (`user_msg.sequence_number + 1`), so concurrent sends to
+    one conversation keep each question/answer pair adjacent.
+    """
+    ctx = await run_db(
+        session,
+        _load_send_context,
+        conversation_id=conversation_id,
+        user_id=user_id,
+    )
+    await run_db(session, _end_transaction)
+    user_scan = await _scan_chat_text(session=session, ctx=ctx, text=content)
+    user_msg = await run_db(
+        session,
+        _build_scanned_message,
+        conversation_id=ctx.conversation_id,
+        role=MessageRole.user,
+        input_type=input_type,
+        content=content,
+        scan=user_scan,
+    )
+    first = await run_db(
+        session,
+        _reserve_sequence_numbers,
+        conversation_id=ctx.conversation_id,
+        count=1 if user_msg.final_action == RuleAction.block else 2,
+    )
+    user_msg = await run_db(
+        session, _save_message, message=user_msg, sequence_number=first
+    )
+    await run_db(
+        session,
+        record_message_scan_diagnostics,
+        message_id=user_msg.id,
+        scan=user_scan,
+    )
+    return ctx, user_msg
 
-    asst_entities_json = {
-        "entities": [entity_to_dict(e) for e in asst_entities],
-        "signals": assistant_scan["signals"],
-        "matched_rules": [rulematch_to_dict(m) for m in asst_matches],
-        "timing_ms_by_stage": assistant_scan.get("timing_ms_by_stage") or {},
-    }
-    asst_matched_rule_ids = [str(m.rule_id) for m in asst_matches]
 
-    assistant_msg = Message(
-        conversation_id=c.id,
+async def _save_assistant_message(
+    *,
+    session: Session | AsyncSession,
+    ctx: _SendContext,
+    user_msg: Message,
+    assistant_text: str,
+    assistant_scan: dict,
+) -> Message:
+    assistant_msg = await run_db(
+        session,
+        _build_scanned_message,
+        conversation_id=ctx.conversation_id,
         role=MessageRole.assistant,
-        sequence_number=asst_seq,
         input_type=MessageInputType.tool_result,
         content=assistant_text,
-        content_hash=_sha256_hex(assistant_text),
-        content_masked=asst_masked,
-        scan_status=ScanStatus.done,
-        pre_rag_action=None,
-        final_action=asst_final,
-        risk_score=assistant_scan["risk_score"],
-        ambiguous=assistant_scan["ambiguous"],
-        matched_rule_ids=asst_matched_rule_ids,
-        entities_json=asst_entities_json,
-        rag_evidence_json=None,
-        latency_ms=assistant_scan["latency_ms"],
+        scan=assistant_scan,
+    )
+    assistant_msg = await run_db(
+        session,
+        _save_message,
+        message=assistant_msg,
+        sequence_number=user_msg.sequence_number + 1,
+    )
+    await run_db(
+        session,
+        record_message_scan_diagnostics,
+        message_id=assistant_msg.id,
+        scan=assistant_scan,
     )
+    return assistant_msg
 
-    session.add(assistant_msg)
-    session.add(c)
-    session.commit()
-    session.refresh(assistant_msg)
 
+async def append_user_message_async(
+    *,
+    session: Session | AsyncSession,
+    conversation_id: UUID,
+    user_id: UUID,
+    content: str,
+    input_type: MessageInputType = MessageInputType.user_input,
+) -> tuple[Message, UUID | None]:
+    """
+    Async flow, as short transactions:
+      1) Save USER message (scan + mask/block, reserve sequence numbers)
+      2) Call ChatService while holding no DB connection
+      3) Save ASSISTANT message (scan + mask/block)
+    Return: (user_msg, assistant_message_id)
+    """
+    # STEP 1: user message
+    ctx, user_msg = await _save_user_message_async(
+        session=session,
+        conversation_id=conversation_id,
+        user_id=user_id,
+        content=content,
+        input_type=input_type,
+    )
+    if user_msg.final_action == RuleAction.block:
+        return user_msg, None
+
+    # STEP 2: call chat provider
+    assistant_text = await _chat.generate_reply(
+        system_prompt=ctx.system_prompt,
+        user_message=user_msg.content_masked or content,
+        temperature=ctx.temperature,
+        model_name=ctx.model_name,
+    )
+
+    assistant_scan = await _scan_chat_text(
+        session=session, ctx=ctx, text=assistant_text
+    )
+
+    # STEP 3: assistant message
+    assistant_msg = await _save_assistant_message(
+        session=session,
+        ctx=ctx,
+        user_msg=user_msg,
+        assistant_text=assistant_text,
+        assistant_scan=assistant_scan,
+    )
     return user_msg, assistant_msg.id
 
 
+async def stream_user_message_async(
+    *,
+    session: Session | AsyncSession,
+    conversation_id: UUID,
+    user_id: UUID,
+    content: str,
+    input_type: MessageInputType = MessageInputType.user_input,
+) -> AsyncIterator[tuple[str, Message | str | None]]:
+    """
+    Streaming variant of `append_user_message_async`.
+
+    Yields `(event, value)` pairs:
+      - ("user_message", Message): the saved user message (scan + mask/block);
+        the stream ends here when it was blocked
+      - ("delta", str): safe assistant text released by StreamingOutputGuard
+      - ("halted", None): a checkpoint scan blocked the reply, no more deltas
+      - ("done", Message): the saved assistant message (full scan)
+    """
+    ctx, user_msg = await _save_user_message_async(
+        session=session,
+        conversation_id=conversation_id,
+        user_id=user_id,
+        content=content,
+        input_type=input_type,
+    )
+    yield "user_message", user_msg
+    if user_msg.final_action == RuleAction.block:
+        return
+
+    # The guard masks synchronously, so forced terms of each scan's matched
+    # rules are looked up (async-capable) right after the scan.
+    forced_terms: dict[tuple[str, ...], list[str]] = {}
+
+    def _forced_terms_key(scan: dict) -> tuple[str, ...]:
+        return tuple(sorted(str(getattr(m, "rule_id", "")) for m in scan["matches"]))
+
+    async def _scan_for_stream(text: str, *, local_only: bool) -> dict:
+        scan = await _scan_chat_text(
+            session=session, ctx=ctx, text=text, local_only=local_only
+        )
+        key = _forced_terms_key(scan)
+        if key not in forced_terms:
+            forced_terms[key] = await run_db(
+                session,
+                _extract_forced_mask_terms_from_matches,
+                matches=scan["matches"],
+            )
+        return scan
+
+    async def _checkpoint(text: str) -> dict:
+        return await _scan_for_stream(text, local_only=True)
+
+    def _mask(segment: str, entities: list, scan: dict) -> str:
+        return _mask_with_forced_terms(
+            text=segment,
+            entities=entities,
+            scan=scan,
+            forced_terms=forced_terms[_forced_terms_key(scan)],
+        )
+
+    guard = StreamingOutputGuard(
+        scan=_checkpoint,
+        mask=_mask,
+        holdback_chars=_settings.chat_stream_holdback_chars,
+        scan_interval_chars=_settings.chat_stream_scan_interval_chars,
+        lookback_chars=_settings.chat_stream_scan_lookback_chars,
+    )
+    async for piece in _chat.stream_reply(
+        system_prompt=ctx.system_prompt,
+        user_message=user_msg.content_masked or content,
+        temperature=ctx.temperature,
+        model_name=ctx.model_name,
+    ):
+        released = await guard.feed(piece)
+        # A checkpoint scan may have opened a transaction; do not pin its
+        # connection while waiting for the next provider chunk.
+        await run_db(session, _end_transaction)
+        if released.text:
+            yield "delta", released.text
+        if released.halted:
+            yield "halted", None
+            break
+
+    assistant_scan = await _scan_for_stream(guard.text, local_only=False)
+    if not guard.halted:
+        released = guard.finish(assistant_scan)
+        if released.text:
+            yield "delta", released.text
+        if released.halted:
+            yield "halted", None
+
+    assistant_msg = await _save_assistant_message(
+        session=session,
+        ctx=ctx,
+        user_msg=user_msg,
+        assistant_text=guard.text,
+        assistant_scan=assistant_scan,
+    )
+    yield "done", assistant_msg
+
+
 def append_user_message(
     *,
     session: Session,
@@ -691,20 +984,23 @@ def get_last_message_summary(
     return row.created_at, _truncate_preview(safe_content)
 
 
-def get_admin_last_message_summary(
-    *, session: Session, conversation_id: UUID
-) -> tuple[datetime | None, str | None]:
-    row = session.exec(
+def get_admin_last_message_previews(
+    *, session: Session, conversation_ids: list[UUID]
+) -> dict[UUID, str | None]:
+    """Preview of the last message of each conversation of a page, in one query."""
+    if not conversation_ids:
+        return {}
+    rows = session.exec(
         select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.sequence_number.desc())
-        .limit(1)
-    ).first()
-    if row is None:
-        return None, None
-
-    raw_or_safe_content, _ = _admin_message_content(row)
-    return row.created_at, _truncate_preview(raw_or_safe_content)
+        .where(Message.conversation_id.in_(conversation_ids))
+        .ext(distinct_on(Message.conversation_id))
+        .order_by(Message.conversation_id, Message.sequence_number.desc())
+    ).all()
+    out: dict[UUID, str | None] = {}
+    for row in rows:
+        raw_or_safe_content, _ = _admin_message_content(row)
+        out[row.conversation_id] = _truncate_preview(raw_or_safe_content)
+    return out
 
 
 def get_message_for_conversation_or_404(
@@ -754,7 +1050,18 @@ def _extract_message_matched_rules(message: Message) -> list[dict]:
     return out
 
 
-def build_safe_message_detail(*, message: Message) -> dict:
+def _entities_json_with_diagnostics(
+    message: Message, diagnostics: dict | None
+) -> dict | None:
+    if not diagnostics:
+        return message.entities_json
+    return {**(message.entities_json or {}), **diagnostics}
+
+
+def build_safe_message_detail(
+    *, message: Message, diagnostics: dict | None = None
+) -> dict:
+    """`diagnostics` (load_message_scan_diagnostics) is only passed by detail views."""
     safe_content, is_blocked = _safe_message_content(message)
     return {
         "id": message.id,
@@ -792,7 +1099,7 @@ def build_safe_message_detail(*, message: Message) -> dict:
         "ambiguous": bool(message.ambiguous),
         "matched_rule_ids": message.matched_rule_ids,
         "matched_rules": _extract_message_matched_rules(message),
-        "entities_json": message.entities_json,
+        "entities_json": _entities_json_with_diagnostics(message, diagnostics),
         "rag_evidence_json": message.rag_evidence_json,
         "latency_ms": message.latency_ms,
         "blocked": is_blocked,
@@ -801,7 +1108,10 @@ def build_safe_message_detail(*, message: Message) -> dict:
     }
 
 
-def build_admin_message_detail(*, message: Message) -> dict:
+def build_admin_message_detail(
+    *, message: Message, diagnostics: dict | None = None
+) -> dict:
+    """`diagnostics` (load_message_scan_diagnostics) is only passed by detail views."""
     admin_content, is_blocked = _admin_message_content(message)
     return {
         "id": message.id,
@@ -839,7 +1149,7 @@ def build_admin_message_detail(*, message: Message) -> dict:
         "ambiguous": bool(message.ambiguous),
         "matched_rule_ids": message.matched_rule_ids,
         "matched_rules": _extract_message_matched_rules(message),
-        "entities_json": message.entities_json,
+        "entities_json": _entities_json_with_diagnostics(message, diagnostics),
         "rag_evidence_json": message.rag_evidence_json,
         "latency_ms": message.latency_ms,
         "blocked": is_blocked,
@@ -0,0 +1,175 @@
+# app/conversation/streaming.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from app.common.enums import RuleAction
+
+ScanFn = Callable[[str], Awaitable[dict[str, Any]]]
+MaskFn = Callable[[str, list, dict[str, Any]], str]
+
+
+@dataclass(slots=True)
+class StreamRelease:
+    text: str = ""
+    halted: bool = False
+
+
+@dataclass(slots=True)
+class _SegmentEntity:
+    type: str
+    start: int
+    end: int
+    score: float
+    source: str
+
+
+def _shift_entities(scan: dict[str, Any], offset: int) -> dict[str, Any]:
+    """Move entity offsets of a window scan back onto the whole reply."""
+    return {
+        **scan,
+        "entities": [
+            _SegmentEntity(
+                type=str(getattr(e, "type", "")),
+                start=int(getattr(e, "start", 0)) + offset,
+                end=int(getattr(e, "end", 0)) + offset,
+                score=float(getattr(e, "score", 0.0) or 0.0),
+                source=str(getattr(e, "source", "")),
+            )
+            for e in scan.get("entities") or []
+        ],
+    }
+
+
+def _action_name(action: Any) -> str:
+    return str(getattr(action, "value", action) or "").strip().lower()
+
+
+class StreamingOutputGuard:
+    """
+    Incremental output scanner for a streamed assistant reply.
+
+    Deltas are accumulated and, every `scan_interval_chars`, the text not yet
+    released is scanned together with the last `lookback_chars` already
+    released (entities and context words straddling the release point), so
+    each checkpoint costs the same however long the reply grows. Only text
+    older than the last `holdback_chars` is
+    released, and the release point is moved back before any entity that
+    straddles it and to the last whitespace, so a PII/secret span still being
+    generated is never emitted half-way. Released text is masked with the
+    checkpoint scan when it says mask; a block decision halts the stream.
+
+    Released text cannot be recalled: `finish` applies the final (full) scan
+    to the tail only, and callers send the persisted safe content at the end.
+    """
+
+    def __init__(
+        self,
+        *,
+        scan: ScanFn,
+        mask: MaskFn,
+        holdback_chars: int,
+        scan_interval_chars: int,
+        lookback_chars: int = 256,
+    ):
+        self._scan = scan
+        self._mask = mask
+        self.holdback_chars = max(0, int(holdback_chars))
+        self.scan_interval_chars = max(1, int(scan_interval_chars))
+        self.lookback_chars = max(0, int(lookback_chars))
+        self.text = ""
+        self.released = 0
+        self.halted = False
+        self._scanned_len = 0
+
+    async def feed(self, chunk: str) -> StreamRelease:
+        if self.halted:
+            return StreamRelease(halted=True)
+        self.text += chunk or ""
+        if len(self.text) - self._scanned_len < self.scan_interval_chars:
+            return StreamRelease()
+        self._scanned_len = len(self.text)
+        start = self._window_start()
+        checkpoint = await self._scan(self.text[start:])
+        if start:
+            checkpoint = _shift_entities(checkpoint, start)
+        return self._release(
+            checkpoint,
+            boundary=len(self.text) - self.holdback_chars,
+            final=False,
+        )
+
+    def finish(self, final_scan: dict[str, Any]) -> StreamRelease:
+        if self.halted:
+            return StreamRelease(halted=True)
+        return self._release(final_scan, boundary=len(self.text), final=True)
+
+    def _window_start(self) -> int:
+        start = self.released - self.lookback_chars
+        if start <= 0:
+            return 0
+        # Start on a word break so the window does not open mid-token.
+        floor = max(0, start - self.lookback_chars)
+        space = max(
+            self.text.rfind(" ", floor, start),
+            self.text.rfind("\n", floor, start),
+        )
+        return space + 1 if space >= 0 else start
+
+    def _safe_boundary(self, boundary: int, entities: list) -> int:
+        moved = True
+        while moved:
+            moved = False
+            for e in entities:
+                start = int(getattr(e, "start", 0))
+                end = int(getattr(e, "end", 0))
+                if start < boundary < end:
+                    boundary = start
+                    moved = True
+        space = max(
+            self.text.rfind(" ", self.released, boundary),
+            self.text.rfind("\n", self.released, boundary),
+        )
+        if space >= 0:
+            return space + 1
+        # No word break yet: keep waiting unless the run is longer than the
+        # holdback window itself (long unbroken tokens, e.g. code).
+        if boundary - self.released <= self.holdback_chars:
+            return self.released
+        return boundary
+
+    def _release(
+        self, scan: dict[str, Any], *, boundary: int, final: bool
+    ) -> StreamRelease:
+        action = _action_name(scan.get("final_action"))
+        if action == _action_name(RuleAction.block):
+            self.halted = True
+            return StreamRelease(halted=True)
+
+        entities = list(scan.get("entities") or [])
+        if not final:
+            boundary = self._safe_boundary(boundary, entities)
+        if boundary <= self.released:
+            return StreamRelease()
+
+        lo = self.released
+        segment = self.text[lo:boundary]
+        self.released = boundary
+        if action != _action_name(RuleAction.mask):
+            return StreamRelease(text=segment)
+
+        # Entities are clipped to the segment: a span that started in already
+        # released text still gets its remaining part masked.
+        shifted = [
+            _SegmentEntity(
+                type=str(getattr(e, "type", "")),
+                start=max(int(getattr(e, "start", 0)), lo) - lo,
+                end=min(int(getattr(e, "end", 0)), boundary) - lo,
+                score=float(getattr(e, "score", 0.0) or 0.0),
+                source=str(getattr(e, "source", "")),
+            )
+            for e in entities
+            if int(getattr(e, "end", 0)) > lo and int(getattr(e, "start", 0)) < boundary
+        ]
+        return StreamRelease(text=self._mask(segment, shifted, scan))
@@ -5,9 +5,62 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     database_url: str
+    # Async engine pool (chat send/stream path, app.db.session.get_async_session).
+    db_async_pool_size: int = 20
+    db_async_max_overflow: int = 10
     redis_url: str | None = None
     default_ruleset_admin_email: str | None = None
     policy_ingest_queue_name: str = "policy_ingest_jobs"
+    # Background re-scan of stored messages after rule edits (app.rescan).
+    message_rescan_queue_name: str = "message_rescan_jobs"
+    message_rescan_batch_size: int = 500
+    message_rescan_on_rule_change: bool = True
+    # Rule/context-term runtime caches: long TTL is only used while the worker
+    # is subscribed to the Redis invalidation channel.
+    runtime_cache_channel: str = "runtime_cache_invalidation"
+    runtime_cache_ttl_seconds: float = 300.0
+    scan_executor_enabled: bool = True
+    scan_executor_max_workers: int = 8
+    scan_detector_concurrency: int = 4
+    scan_embedding_concurrency: int = 2
+    scan_presidio_concurrency: int = 2
+    scan_db_concurrency: int = 4
+    presidio_pool_workers: int = 0
+    presidio_batch_max_size: int = 16
+    presidio_batch_linger_ms: float = 5.0
+    scan_cache_enabled: bool = True
+    scan_cache_max_entries: int = 2048
+    scan_cache_ttl_seconds: float = 600.0
+    # ScanEngineLocal.scan_many / POST /v1/debug/scan-batch
+    scan_batch_concurrency: int = 4
+    scan_batch_max_texts: int = 1000
+    rag_cache_enabled: bool = True
+    rag_cache_max_entries: int = 1024
+    rag_cache_ttl_seconds: float = 900.0
+    rag_cache_near_duplicate_enabled: bool = False
+    rag_cache_similarity_threshold: float = 0.97
+    # Write-behind RAG retrieval logs (app.common.log_writer); overflow is
+    # drop_oldest | drop_newest | block.
+    log_write_behind_enabled: bool = True
+    log_write_batch_size: int = 200
+    log_write_flush_interval_seconds: float = 1.0
+    log_write_max_pending: int = 5000
+    log_write_overflow: str = "drop_oldest"
+    log_write_block_timeout_seconds: float = 1.0
+    # Monthly partitions and retention (app.retention.worker); 0 days keeps all.
+    storage_partition_months_ahead: int = 2
+    storage_maintenance_interval_seconds: float = 3600.0
+    rag_log_retention_days: int = 90
+    message_diagnostics_retention_days: int = 90
+    # Admin monitoring list totals are cached this long per filter.
+    admin_count_cache_ttl_seconds: float = 30.0
+    # Shared keep-alive HTTP pools (app.common.http_clients); HTTP/2 is used
+    # for Groq/Gemini only when the optional `h2` package is installed.
+    http_client_http2: bool = True
+    http_client_keepalive_expiry_seconds: float = 30.0
+    ollama_max_connections: int = 8
+    groq_max_connections: int = 20
+    gemini_max_connections: int = 20
     rule_duplicate_top_k: int = 5
     rule_duplicate_exact_threshold: float = 0.92
     rule_duplicate_near_threshold: float = 0.82
@@ -27,6 +80,12 @@ class Settings(BaseSettings):
     groq_api_key: str | None = None
     chat_provider: str = "groq"  # groq | gemini | ollama
     default_system_prompt: str | None = "You are a helpful assistant."
+    # Streaming replies: text newer than the holdback window is not released
+    # until a checkpoint scan has seen it.
+    chat_stream_holdback_chars: int = 128
+    chat_stream_scan_interval_chars: int = 160
+    # Already released text re-scanned with each checkpoint window.
+    chat_stream_scan_lookback_chars: int = 256
 
     # CORS: comma-separated values; use * only when you do not need credentials.
     cors_allowed_origins: str = (
@@ -1,8 +1,8 @@
 from app.auth.model import User
 from app.company.model import Company
 from app.company_member.model import CompanyMember
-from app.conversation.model import Conversation
-from app.messages.model import Message
+from app.conversation.model import Conversation, ConversationStats
+from app.messages.model import Message, MessageScanDiagnostics
 from app.prompt_entitity.model import PromptEntity
 from app.rule.model import Rule
 from app.rule.rule_context_term_link import RuleContextTermLink
@@ -15,7 +15,9 @@ from app.rag.models.policy_chunk_embedding import PolicyChunkEmbedding
 from app.rag.models.policy_document import PolicyDocument
 from app.rag.models.policy_ingest_job import PolicyIngestJob
 from app.rag.models.policy_ingest_job_item import PolicyIngestJobItem
+from app.rag.models.rag_retrieval_daily_stat import RagRetrievalDailyStat
 from app.rag.models.rag_retrieval_log import RagRetrievalLog
+from app.rescan.model import MessageRescanJob
 from app.rule_change_log.model import RuleChangeLog
 from app.suggestion.models.rule_suggestion import RuleSuggestion
 from app.suggestion.models.rule_suggestion_log import RuleSuggestionLog
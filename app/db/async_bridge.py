@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+T = TypeVar("T")
+
+
+async def run_db(
+    session: Session | AsyncSession, fn: Callable[..., T], /, **kwargs: Any
+) -> T:
+    """
+    Call sync ORM code `fn(session=..., **kwargs)` with either session kind.
+
+    With an AsyncSession, `fn` runs through `run_sync` on the async driver, so
+    its queries do not block the event loop. A sync Session is called inline;
+    callers that must stay off the loop hand it to ScanExecutor instead.
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(
+            lambda sync_session: fn(session=sync_session, **kwargs)
+        )
+    return fn(session=session, **kwargs)
+
+
+def sibling_session(session: Session | AsyncSession) -> Session | AsyncSession:
+    """New session of the same kind on the same bind (for concurrent lanes)."""
+    if isinstance(session, AsyncSession):
+        return AsyncSession(session.bind, expire_on_commit=False)
+    return Session(session.get_bind())
+
+
+async def close_session(session: Session | AsyncSession) -> None:
+    if isinstance(session, AsyncSession):
+        await session.close()
+    else:
+        session.close()
@@ -1,3 +1,4 @@
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import create_engine
 import app.db.all_models
 from app.core.config import get_settings
@@ -9,3 +10,12 @@ engine = create_engine(
     echo=False,
     pool_pre_ping=True,
 )
+
+# Same URL on psycopg's native async dialect, for the chat hot path.
+async_engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=settings.db_async_pool_size,
+    max_overflow=settings.db_async_max_overflow,
+)
@@ -1,10 +1,19 @@
+from collections.abc import AsyncGenerator
 from typing import Generator
 
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.engine import engine
+from app.db.engine import async_engine, engine
 
 
 def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    # Rows are read after commits (e.g. to build responses); keep them loaded
+    # instead of lazily refreshing, which an AsyncSession cannot do.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
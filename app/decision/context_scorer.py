@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-import re
-import unicodedata
 from typing import Any, Optional
 
 import yaml
 
+from app.decision.detectors.folded_text import fold_term, fold_text
+from app.decision.keyword_automaton import AutomatonCache, KeywordAutomaton
+from app.decision.scan_text import ScanText
+
 
 @dataclass(slots=True)
 class ContextSignals:
@@ -16,6 +18,16 @@ class ContextSignals:
     risk_boost: float
 
 
+@dataclass(slots=True, frozen=True)
+class _PersonaKeywordIndex:
+    keywords: dict[str, list[str]]
+    automaton: KeywordAutomaton
+    # folded keyword -> [(persona, position in keywords[persona])]
+    owners: dict[str, tuple[tuple[str, int], ...]]
+    # keywords that fold to nothing and can only match on the raw lowercase text
+    raw_only: tuple[tuple[str, int, str], ...]
+
+
 class ContextScorer:
     """
     Build context signals only (no entity span creation).
@@ -30,30 +42,14 @@ class ContextScorer:
             persona: [kw.lower() for kw in (cfg.get("keywords") or [])]
             for persona, cfg in personas.items()
         }
+        self._base_index = self._build_keyword_index(None)
 
     def _fold_text(self, text: str) -> str:
-        raw = str(text or "").lower().replace("\u0111", "d")
-        normalized = unicodedata.normalize("NFKD", raw)
-        no_marks = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-        return re.sub(r"\s+", " ", no_marks).strip()
-
-    def _keyword_in_text(self, *, text_raw: str, text_fold: str, keyword: str) -> bool:
-        kw_raw = str(keyword or "").lower().strip()
-        if not kw_raw:
-            return False
-        if kw_raw in text_raw:
-            return True
-        return self._fold_text(kw_raw) in text_fold
-
-    def score(
-        self,
-        text: str,
-        *,
-        persona_keywords_override: dict[str, list[str]] | None = None,
-    ) -> ContextSignals:
-        text_raw = (text or "").lower()
-        text_fold = self._fold_text(text)
+        return fold_text(text)
 
+    def _merge_keywords(
+        self, persona_keywords_override: dict[str, list[str]] | None
+    ) -> dict[str, list[str]]:
         active_keywords: dict[str, list[str]] = {
             k: list(v) for k, v in self.persona_keywords.items()
         }
@@ -70,16 +66,79 @@ class ContextScorer:
                         seen.add(keyword)
                         deduped.append(keyword)
                     active_keywords[persona] = deduped
+        return active_keywords
+
+    def _build_keyword_index(
+        self, persona_keywords_override: dict[str, list[str]] | None
+    ) -> _PersonaKeywordIndex:
+        keywords = self._merge_keywords(persona_keywords_override)
+        owners: dict[str, list[tuple[str, int]]] = {}
+        raw_only: list[tuple[str, int, str]] = []
+        for persona, kws in keywords.items():
+            for idx, keyword in enumerate(kws):
+                kw_raw = str(keyword or "").lower().strip()
+                if not kw_raw:
+                    continue
+                folded = fold_term(kw_raw)
+                if folded:
+                    owners.setdefault(folded, []).append((persona, idx))
+                else:
+                    raw_only.append((persona, idx, kw_raw))
+
+        return _PersonaKeywordIndex(
+            keywords=keywords,
+            automaton=KeywordAutomaton(owners.keys()),
+            owners={k: tuple(v) for k, v in owners.items()},
+            raw_only=tuple(raw_only),
+        )
+
+    def _keyword_index(
+        self,
+        persona_keywords_override: dict[str, list[str]] | None,
+        automata: AutomatonCache | None,
+    ) -> _PersonaKeywordIndex:
+        if not persona_keywords_override:
+            return self._base_index
+        if automata is None:
+            return self._build_keyword_index(persona_keywords_override)
+        return automata.get_or_build(
+            ("context_scorer.persona", str(self.yaml_path)),
+            lambda: self._build_keyword_index(persona_keywords_override),
+        )
+
+    def score(
+        self,
+        text: "str | ScanText",
+        *,
+        persona_keywords_override: dict[str, list[str]] | None = None,
+        automata: AutomatonCache | None = None,
+    ) -> ContextSignals:
+        """
+        `automata` is the cache attached to the tenant's ContextRuntimeOverrides;
+        when given, the keyword automaton for `persona_keywords_override` is
+        built once and reused across messages.
+        """
+        scan_text = ScanText.of(text)
+        index = self._keyword_index(persona_keywords_override, automata)
+
+        # A keyword found in the lowercase text is always found in the folded
+        # text too, so one pass over the folded text covers both checks.
+        hit_positions: dict[str, list[int]] = {}
+        for folded in index.automaton.matched_terms(scan_text.folded):
+            for persona, idx in index.owners[folded]:
+                hit_positions.setdefault(persona, []).append(idx)
+        for persona, idx, kw_raw in index.raw_only:
+            if kw_raw in scan_text.lower:
+                hit_positions.setdefault(persona, []).append(idx)
 
         best_persona: Optional[str] = None
         best_hits: list[str] = []
 
-        for persona, kws in active_keywords.items():
-            hits = [
-                kw
-                for kw in kws
-                if self._keyword_in_text(text_raw=text_raw, text_fold=text_fold, keyword=kw)
-            ]
+        for persona, kws in index.keywords.items():
+            positions = hit_positions.get(persona)
+            if not positions:
+                continue
+            hits = [kws[idx] for idx in sorted(positions)]
             if len(hits) > len(best_hits):
                 best_persona = persona
                 best_hits = hits
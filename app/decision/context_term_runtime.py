@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import time
 from threading import RLock
 from typing import Optional
@@ -8,7 +8,16 @@ from uuid import UUID
 
 from sqlmodel import Session, select
 
+from app.common.cache_bus import (
+    CONTEXT_TERMS_KIND,
+    CacheInvalidation,
+    fetch_shared_version,
+    local_cache_ttl_seconds,
+    publish_invalidation,
+    register_invalidation_handler,
+)
 from app.decision.detectors.local_regex_detector import ContextHint
+from app.decision.keyword_automaton import AutomatonCache
 from app.rag.models.context_term import ContextTerm
 
 
@@ -17,11 +26,17 @@ class ContextRuntimeOverrides:
     regex_hints: dict[str, list[ContextHint]]
     persona_keywords: dict[str, list[str]]
     exact_terms: list[str]
+    version: int = 0
+    # Keyword automata built from these overrides; shared by clones so they are
+    # built once per cached entry and dropped with it.
+    automata: AutomatonCache = field(default_factory=AutomatonCache)
 
 
+# Fallback TTL when this worker is not subscribed to cross-worker invalidations.
 _CACHE_TTL_SECONDS = 5.0
 _cache_lock = RLock()
 _cache: dict[Optional[UUID], tuple[float, ContextRuntimeOverrides]] = {}
+_versions: dict[Optional[UUID], int] = {}
 
 
 def _clone_overrides(data: ContextRuntimeOverrides) -> ContextRuntimeOverrides:
@@ -29,6 +44,8 @@ def _clone_overrides(data: ContextRuntimeOverrides) -> ContextRuntimeOverrides:
         regex_hints={k: list(v) for k, v in data.regex_hints.items()},
         persona_keywords={k: list(v) for k, v in data.persona_keywords.items()},
         exact_terms=list(data.exact_terms),
+        version=data.version,
+        automata=data.automata,
     )
 
 
@@ -45,15 +62,61 @@ def _get_cached(company_id: Optional[UUID]) -> ContextRuntimeOverrides | None:
 
 
 def _set_cached(company_id: Optional[UUID], data: ContextRuntimeOverrides) -> None:
+    ttl_seconds = local_cache_ttl_seconds(fallback_seconds=_CACHE_TTL_SECONDS)
     with _cache_lock:
-        _cache[company_id] = (time.monotonic() + _CACHE_TTL_SECONDS, data)
+        if _versions.get(company_id, 0) != data.version:
+            # Invalidated while loading; do not cache stale terms.
+            return
+        _cache[company_id] = (time.monotonic() + ttl_seconds, data)
 
 
-def invalidate_context_runtime_cache(company_id: Optional[UUID]) -> None:
+def _current_version(company_id: Optional[UUID]) -> int:
+    shared_version = fetch_shared_version(
+        kind=CONTEXT_TERMS_KIND,
+        company_id=company_id,
+    )
+    with _cache_lock:
+        version = max(_versions.get(company_id, 0), shared_version or 0)
+        _versions[company_id] = version
+        return version
+
+
+def _apply_invalidation(
+    company_id: Optional[UUID], shared_version: Optional[int]
+) -> None:
     with _cache_lock:
+        if shared_version is None:
+            # Redis unreachable: nothing to agree on, just drop the entry.
+            _cache.pop(company_id, None)
+            return
+        if shared_version <= _versions.get(company_id, 0):
+            # Already applied (e.g. our own broadcast echoing back).
+            return
+        # Versions come from one counter (see publish_invalidation); keep as-is.
+        _versions[company_id] = shared_version
         _cache.pop(company_id, None)
 
 
+def _on_invalidation(event: CacheInvalidation) -> None:
+    if event.version is None:
+        # Listener (re)connected: bumps may have been missed, start cold.
+        with _cache_lock:
+            _cache.clear()
+        return
+    _apply_invalidation(event.company_id, event.version)
+
+
+def invalidate_context_runtime_cache(company_id: Optional[UUID]) -> None:
+    shared_version = publish_invalidation(
+        kind=CONTEXT_TERMS_KIND,
+        company_id=company_id,
+    )
+    _apply_invalidation(company_id, shared_version)
+
+
+register_invalidation_handler(CONTEXT_TERMS_KIND, _on_invalidation)
+
+
 def load_context_runtime_overrides(
     *,
     session: Session,
@@ -63,6 +126,8 @@ def load_context_runtime_overrides(
     if cached is not None:
         return cached
 
+    version = _current_version(company_id)
+
     # Tenant filtering (legacy storage key `company_id`):
     # - no rule_set scope: only global context terms
     # - scoped conversation: global + personal context terms
@@ -128,6 +193,7 @@ def load_context_runtime_overrides(
         regex_hints=regex_hints,
         persona_keywords=persona_keywords,
         exact_terms=exact_terms,
+        version=version,
     )
     _set_cached(company_id, out)
     return _clone_overrides(out)
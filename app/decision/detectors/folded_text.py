@@ -1,9 +1,33 @@
 from __future__ import annotations
 
+from functools import lru_cache
+import re
 import unicodedata
 
+_WS_RE = re.compile(r"\s+")
 
-def fold_text_with_mapping(text: str) -> tuple[str, list[int]]:
+
+def fold_text(text: str) -> str:
+    raw = str(text or "").lower().replace("\u0111", "d")
+    normalized = unicodedata.normalize("NFKD", raw)
+    no_marks = "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    return _WS_RE.sub(" ", no_marks).strip()
+
+
+@lru_cache(maxsize=4096)
+def fold_term(term: str) -> str:
+    """`fold_text` for short keywords/terms that are folded over and over."""
+    return fold_text(term)
+
+
+def fold_text_with_mapping(
+    text: str, *, keep_placeholders: bool = True
+) -> tuple[str, list[int]]:
+    """
+    Fold `text` char by char; `mapping[i]` is the original index of folded
+    char `i` (non-decreasing). Chars that fold to nothing become a space unless
+    `keep_placeholders` is False.
+    """
     folded_chars: list[str] = []
     mapping: list[int] = []
 
@@ -19,7 +43,7 @@ def fold_text_with_mapping(text: str) -> tuple[str, list[int]]:
             mapping.append(index)
             emitted = True
 
-        if not emitted:
+        if not emitted and keep_placeholders:
             folded_chars.append(" ")
             mapping.append(index)
 
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import List
+from typing import Iterable, List
 
+from app.decision.detectors.streaming import StreamingDetector
+from app.decision.keyword_automaton import TermPositions
+from app.decision.scan_text import ScanText
 
 # -----------------------------------
 # Unified Entity Model
@@ -57,6 +60,16 @@ class LocalRegexDetector:
         re.compile(r"\bghp_[A-Za-z0-9_-]{3,}\b", flags=re.IGNORECASE),
         re.compile(r"\bAKIA[0-9A-Z]{4,}\b"),
     ]
+
+    # Cheap literal anchors: a pattern only runs when its anchor occurs, so
+    # prose and logs without candidates skip most full-text passes.
+    API_SECRET_ANCHORS = ("AKIA", "ghp_", "sk-", "sk_", "sk-")
+    # Checked against the lowercased text (shared through ScanText), so the
+    # case-insensitive heuristics need no extra pass of their own.
+    API_SECRET_PREFIX_ANCHORS = ("sk-live-", "sk-test-", "ghp_", "akia")
+    # Every phone / CCCD / tax id / card candidate contains 9+ digits with at
+    # most one separator between them.
+    DIGIT_RUN_PREFILTER = re.compile(r"\d(?:[\s.\-]?\d){8}")
     API_SECRET_CONTEXT_TERMS = ("key", "token", "secret", "debug")
     API_SECRET_PLACEHOLDER_TERMS = ("xxxxx", "example", "demo")
 
@@ -71,18 +84,24 @@ class LocalRegexDetector:
         "TAX_ID": [ContextHint(term=t) for t in TAX_CONTEXT],
     }
 
+    # Longest entity a stream finalizes in one piece (254 is the RFC 5321
+    # address limit; cards/phones/tax ids are far shorter).
+    STREAM_MAX_ENTITY_CHARS = 256
+
     def scan(
         self,
-        text: str,
+        text: "str | ScanText",
         *,
         context_hints_by_entity: dict[str, list[ContextHint]] | None = None,
     ) -> List[Entity]:
+        scan_text = ScanText.of(text)
+        text = scan_text.raw
         entities: List[Entity] = []
-        lower_text = (text or "").lower()
         hints = self._resolve_context_hints(context_hints_by_entity)
+        has_digit_run = self.DIGIT_RUN_PREFILTER.search(text) is not None
 
         # EMAIL
-        for m in self.EMAIL_PATTERN.finditer(text):
+        for m in self._finditer_if("@" in text, self.EMAIL_PATTERN, text):
             entities.append(
                 Entity(
                     type="EMAIL",
@@ -96,9 +115,9 @@ class LocalRegexDetector:
             )
 
         # PHONE
-        for m in self.PHONE_PATTERN.finditer(text):
+        for m in self._finditer_if(has_digit_run, self.PHONE_PATTERN, text):
             normalized = self._normalize_phone(m.group())
-            context_level = self._context_level(lower_text, m.start(), hints["PHONE"])
+            context_level = self._context_level(scan_text, m.start(), hints["PHONE"])
             score = 0.90 if context_level == 2 else 0.80 if context_level == 1 else 0.70
 
             entities.append(
@@ -117,8 +136,8 @@ class LocalRegexDetector:
             )
 
         # CCCD
-        for m in self.CCCD_PATTERN.finditer(text):
-            context_level = self._context_level(lower_text, m.start(), hints["CCCD"])
+        for m in self._finditer_if(has_digit_run, self.CCCD_PATTERN, text):
+            context_level = self._context_level(scan_text, m.start(), hints["CCCD"])
             score = 0.95 if context_level == 2 else 0.85 if context_level == 1 else 0.65
 
             entities.append(
@@ -134,8 +153,8 @@ class LocalRegexDetector:
             )
 
         # TAX ID
-        for m in self.TAX_ID_PATTERN.finditer(text):
-            context_level = self._context_level(lower_text, m.start(), hints["TAX_ID"])
+        for m in self._finditer_if(has_digit_run, self.TAX_ID_PATTERN, text):
+            context_level = self._context_level(scan_text, m.start(), hints["TAX_ID"])
             score = 0.90 if context_level == 2 else 0.80 if context_level == 1 else 0.65
 
             entities.append(
@@ -154,7 +173,9 @@ class LocalRegexDetector:
             )
 
         # CREDIT CARD
-        for m in self.CREDIT_CARD_CANDIDATE_PATTERN.finditer(text):
+        for m in self._finditer_if(
+            has_digit_run, self.CREDIT_CARD_CANDIDATE_PATTERN, text
+        ):
             raw_value = m.group()
             digits = re.sub(r"[^\d]", "", raw_value)
             if len(digits) < 13 or len(digits) > 19:
@@ -174,8 +195,8 @@ class LocalRegexDetector:
                 )
             )
         # API SECRET
-        for pattern in self.API_SECRET_PATTERNS:
-            for m in pattern.finditer(text):
+        for pattern, anchor in zip(self.API_SECRET_PATTERNS, self.API_SECRET_ANCHORS):
+            for m in self._finditer_if(anchor in text, pattern, text):
                 entities.append(
                     Entity(
                         type="API_SECRET",
@@ -193,14 +214,16 @@ class LocalRegexDetector:
             for entity in entities
             if str(entity.type) == "API_SECRET"
         }
-        for pattern in self.API_SECRET_PREFIX_HEURISTICS:
-            for m in pattern.finditer(text):
+        for pattern, anchor in zip(
+            self.API_SECRET_PREFIX_HEURISTICS, self.API_SECRET_PREFIX_ANCHORS
+        ):
+            for m in self._finditer_if(anchor in scan_text.lower, pattern, text):
                 span = (m.start(), m.end())
                 if span in existing_api_secret_spans:
                     continue
                 if self._looks_like_placeholder_secret(m.group()):
                     continue
-                if not self._has_api_secret_context(lower_text, m.start(), m.end()):
+                if not self._has_api_secret_context(scan_text):
                     continue
                 existing_api_secret_spans.add(span)
                 entities.append(
@@ -217,6 +240,48 @@ class LocalRegexDetector:
 
         return entities
 
+    def stream(
+        self,
+        *,
+        context_hints_by_entity: dict[str, list[ContextHint]] | None = None,
+    ) -> StreamingDetector:
+        """
+        Chunked `scan` for streamed or very large text: `feed(chunk)` returns
+        entities that are final, `close()` the rest.
+
+        The API secret prefix heuristic needs a secret-ish word anywhere in
+        the text; in a stream it counts every word fed so far.
+        """
+        hints = self._resolve_context_hints(context_hints_by_entity)
+        context_chars = max(
+            (
+                max(int(h.window_1), int(h.window_2))
+                for entity_hints in hints.values()
+                for h in entity_hints
+            ),
+            default=0,
+        )
+        seen_secret_context = False
+
+        def _scan_window(window: ScanText) -> List[Entity]:
+            nonlocal seen_secret_context
+            seen_secret_context = seen_secret_context or any(
+                term in window.lower for term in self.API_SECRET_CONTEXT_TERMS
+            )
+            window.memo("local_regex.api_secret_context", lambda: seen_secret_context)
+            return self.scan(window, context_hints_by_entity=hints)
+
+        return StreamingDetector(
+            _scan_window,
+            max_entity_chars=self.STREAM_MAX_ENTITY_CHARS,
+            context_chars=context_chars,
+        )
+
+    def _finditer_if(
+        self, enabled: bool, pattern: re.Pattern[str], text: str
+    ) -> Iterable[re.Match[str]]:
+        return pattern.finditer(text) if enabled else ()
+
     def _is_valid_credit_card_number(self, digits: str) -> bool:
         total = 0
         reverse_digits = digits[::-1]
@@ -253,7 +318,15 @@ class LocalRegexDetector:
                 resolved[et] = incoming
         return resolved
 
-    def _context_level(self, text: str, pos: int, hints: List[ContextHint]) -> int:
+    def _context_positions(
+        self, scan_text: ScanText, terms: tuple[str, ...]
+    ) -> TermPositions:
+        return scan_text.memo(
+            ("local_regex.context", terms),
+            lambda: TermPositions(scan_text.lower, terms),
+        )
+
+    def _context_level(self, scan_text: ScanText, pos: int, hints: List[ContextHint]) -> int:
         """
         0 = no context
         1 = keyword within +/- window_1
@@ -262,41 +335,36 @@ class LocalRegexDetector:
         if not hints:
             return 0
 
+        terms = tuple((hint.term or "").strip().lower() for hint in hints)
+        positions = self._context_positions(scan_text, terms)
+        text_len = len(scan_text.lower)
+
         # Stronger window first.
-        for hint in hints:
-            term = (hint.term or "").strip().lower()
+        for hint, term in zip(hints, terms):
             if not term:
                 continue
             w2 = max(1, int(hint.window_2))
-            start = max(0, pos - w2)
-            end = min(len(text), pos + w2)
-            if term in text[start:end]:
+            if positions.occurs_within(term, max(0, pos - w2), min(text_len, pos + w2)):
                 return 2
 
-        for hint in hints:
-            term = (hint.term or "").strip().lower()
+        for hint, term in zip(hints, terms):
             if not term:
                 continue
             w1 = max(1, int(hint.window_1))
-            start = max(0, pos - w1)
-            end = min(len(text), pos + w1)
-            if term in text[start:end]:
+            if positions.occurs_within(term, max(0, pos - w1), min(text_len, pos + w1)):
                 return 1
 
         return 0
 
-    def _has_api_secret_context(self, text: str, start_pos: int, end_pos: int) -> bool:
-        window_1_start = max(0, int(start_pos) - 24)
-        window_1_end = min(len(text), int(end_pos) + 24)
-        if any(term in text[window_1_start:window_1_end] for term in self.API_SECRET_CONTEXT_TERMS):
-            return True
-
-        window_2_start = max(0, int(start_pos) - 60)
-        window_2_end = min(len(text), int(end_pos) + 60)
-        if any(term in text[window_2_start:window_2_end] for term in self.API_SECRET_CONTEXT_TERMS):
-            return True
-
-        return any(term in text for term in self.API_SECRET_CONTEXT_TERMS)
+    def _has_api_secret_context(self, scan_text: ScanText) -> bool:
+        # The +/-24 and +/-60 windows always fell back to a whole-text check,
+        # so the answer does not depend on the candidate: compute it once.
+        return scan_text.memo(
+            "local_regex.api_secret_context",
+            lambda: any(
+                term in scan_text.lower for term in self.API_SECRET_CONTEXT_TERMS
+            ),
+        )
 
     def _looks_like_placeholder_secret(self, token: str) -> bool:
         lowered = str(token or "").strip().lower()
@@ -3,11 +3,10 @@ from __future__ import annotations
 import re
 from typing import List
 
-from app.decision.detectors.folded_text import (
-    fold_text_with_mapping,
-    original_span_from_folded,
-)
+from app.decision.detectors.folded_text import original_span_from_folded
 from app.decision.detectors.local_regex_detector import Entity
+from app.decision.detectors.streaming import StreamingDetector
+from app.decision.scan_text import ScanText
 
 
 class ObfuscatedEmailDetector:
@@ -44,12 +43,13 @@ class ObfuscatedEmailDetector:
         "protonmail",
     }
 
-    def scan(self, text: str) -> List[Entity]:
-        raw_text = str(text or "")
+    def scan(self, text: "str | ScanText") -> List[Entity]:
+        scan_text = ScanText.of(text)
+        raw_text = scan_text.raw
         if not raw_text:
             return []
 
-        folded_text, mapping = fold_text_with_mapping(raw_text)
+        folded_text, mapping = scan_text.folded_with_mapping
         entities: list[Entity] = []
         seen_spans: set[tuple[int, int]] = set()
 
@@ -111,6 +111,12 @@ class ObfuscatedEmailDetector:
 
         return entities
 
+    def stream(self) -> StreamingDetector:
+        """Chunked `scan`: `feed(chunk)` returns final entities, `close()` the rest."""
+        # Spoken local parts look back 96 folded chars from the "at"; with the
+        # domain that stays well inside 256 raw chars.
+        return StreamingDetector(self.scan, max_entity_chars=256)
+
     def _extract_left_local_part(
         self,
         *,
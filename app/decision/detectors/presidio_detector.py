@@ -1,11 +1,22 @@
 # app/decision/detectors/presidio_detector.py
 from __future__ import annotations
 
+from concurrent.futures import Future
 from dataclasses import dataclass, field
 from typing import Any, Iterable, List
 
 from presidio_analyzer import AnalyzerEngine
-from presidio_analyzer.nlp_engine import SpacyNlpEngine
+
+from app.core.config import get_settings
+from app.decision.detectors.presidio_pool import (
+    DEFAULT_MODEL_NAME,
+    RawResult,
+    analyze_texts,
+    get_presidio_pool,
+    get_shared_analyzer,
+    get_shared_batch_analyzer,
+    to_raw_results,
+)
 
 
 @dataclass(slots=True)
@@ -31,40 +42,85 @@ class PresidioDetector:
     def __init__(
         self,
         *,
-        model_name: str = "en_core_web_sm",
+        model_name: str = DEFAULT_MODEL_NAME,
         drop_types: Iterable[str] | None = None,
         min_score: float = 0.5,
     ):
-        nlp_engine = SpacyNlpEngine(
-            models=[{"lang_code": "en", "model_name": model_name}]
-        )
-        self.analyzer = AnalyzerEngine(nlp_engine=nlp_engine)
+        # The spaCy model is shared per process (or lives in the Presidio pool)
+        # and only loaded on first use, not once per detector instance.
+        self.model_name = model_name
 
         self.drop_types = (
             set(drop_types) if drop_types is not None else set(self.DEFAULT_DROP_TYPES)
         )
         self.min_score = float(min_score)
 
+    @property
+    def analyzer(self) -> AnalyzerEngine:
+        return get_shared_analyzer(self.model_name)
+
+    @property
+    def pooled(self) -> bool:
+        pool = get_presidio_pool()
+        return pool is not None and pool.model_name == self.model_name
+
     def scan(self, text: str) -> List[Entity]:
+        if self.pooled:
+            return self.submit(text).result()
         results = self.analyzer.analyze(text=text, language="en")
-        out: list[Entity] = []
+        return self._to_entities(text, to_raw_results(results))
+
+    def scan_many(self, texts: list[str]) -> list[List[Entity]]:
+        """
+        `scan` for many texts as nlp.pipe batches: through the pool when it
+        runs (its batcher groups the queued texts), in-process otherwise.
+        """
+        if not texts:
+            return []
+        if self.pooled:
+            futures = [self.submit(text) for text in texts]
+            return [future.result() for future in futures]
+        raw = analyze_texts(
+            get_shared_batch_analyzer(self.model_name),
+            list(texts),
+            batch_size=get_settings().presidio_batch_max_size,
+        )
+        return [self._to_entities(text, results) for text, results in zip(texts, raw)]
 
-        for r in results:
-            et = str(r.entity_type)
+    def submit(self, text: str) -> Future:
+        """Queue `text` on the Presidio pool; resolves to List[Entity]."""
+        pool = get_presidio_pool()
+        if pool is None:
+            raise RuntimeError("Presidio pool is not running")
+
+        out: Future = Future()
+
+        def _convert(done: Future) -> None:
+            try:
+                out.set_result(self._to_entities(text, done.result()))
+            except Exception as exc:
+                out.set_exception(exc)
+
+        pool.submit(text).add_done_callback(_convert)
+        return out
+
+    def _to_entities(self, text: str, results: list[RawResult]) -> List[Entity]:
+        out: list[Entity] = []
 
+        for et, start, end, score in results:
             if et in self.drop_types:
                 continue
 
-            if float(r.score) < self.min_score:
+            if score < self.min_score:
                 continue
 
-            frag = text[r.start : r.end]
+            frag = text[start:end]
             out.append(
                 Entity(
                     type=et,
-                    start=int(r.start),
-                    end=int(r.end),
-                    score=float(r.score),
+                    start=start,
+                    end=end,
+                    score=score,
                     source="presidio",
                     text=frag,
                     metadata={},
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+import logging
+import multiprocessing
+import queue
+from threading import Lock, Thread
+import time
+from typing import Optional
+
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
+from presidio_analyzer.nlp_engine import SpacyNlpEngine
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# (entity_type, start, end, score): all a caller needs, cheap to pickle.
+RawResult = tuple[str, int, int, float]
+
+DEFAULT_MODEL_NAME = "en_core_web_sm"
+
+
+@lru_cache(maxsize=4)
+def get_shared_analyzer(model_name: str = DEFAULT_MODEL_NAME) -> AnalyzerEngine:
+    """One AnalyzerEngine (and spaCy model) per process, however many detectors."""
+    nlp_engine = SpacyNlpEngine(models=[{"lang_code": "en", "model_name": model_name}])
+    return AnalyzerEngine(nlp_engine=nlp_engine)
+
+
+def to_raw_results(results) -> list[RawResult]:
+    return [
+        (str(r.entity_type), int(r.start), int(r.end), float(r.score)) for r in results
+    ]
+
+
+_worker_engine: Optional[BatchAnalyzerEngine] = None
+
+
+def _init_worker(model_name: str) -> None:
+    global _worker_engine
+    _worker_engine = BatchAnalyzerEngine(analyzer_engine=get_shared_analyzer(model_name))
+
+
+def analyze_texts(
+    engine: BatchAnalyzerEngine, texts: list[str], *, batch_size: int
+) -> list[list[RawResult]]:
+    # analyze_iterator feeds the texts through spaCy's nlp.pipe.
+    results = engine.analyze_iterator(
+        texts=texts,
+        language="en",
+        batch_size=max(1, int(batch_size)),
+    )
+    return [to_raw_results(r) for r in results]
+
+
+@lru_cache(maxsize=4)
+def get_shared_batch_analyzer(model_name: str = DEFAULT_MODEL_NAME) -> BatchAnalyzerEngine:
+    return BatchAnalyzerEngine(analyzer_engine=get_shared_analyzer(model_name))
+
+
+def _analyze_batch(texts: list[str]) -> list[list[RawResult]]:
+    assert _worker_engine is not None
+    return analyze_texts(_worker_engine, texts, batch_size=len(texts))
+
+
+class PresidioPool:
+    """
+    Worker processes that each load the spaCy model once.
+
+    `submit` queues one text; a batcher thread groups queued texts (up to
+    `max_batch_size`, waiting at most `linger_ms` for more) and sends each group
+    to a worker as a single nlp.pipe batch.
+
+    A worker that dies (e.g. OOM-killed) breaks the whole ProcessPoolExecutor:
+    the batches it held fail and a fresh executor takes the next ones. After
+    `shutdown`, texts still queued or submitted later fail instead of waiting
+    forever.
+    """
+
+    def __init__(
+        self,
+        *,
+        model_name: str,
+        workers: int,
+        max_batch_size: int,
+        linger_ms: float,
+    ):
+        self.model_name = model_name
+        self.workers = max(1, int(workers))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.linger_s = max(0.0, float(linger_ms)) / 1000.0
+        self.restarts = 0
+        self._queue: queue.Queue[Optional[tuple[str, Future]]] = queue.Queue()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = Lock()
+        self._closed = False
+        self._batcher: Optional[Thread] = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn: the parent runs threads, which fork does not copy safely.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name,),
+        )
+
+    def start(self) -> None:
+        self._executor = self._new_executor()
+        # Warm every worker so the first real messages do not pay model load.
+        warmups = [self._executor.submit(_analyze_batch, [""]) for _ in range(self.workers)]
+        for f in warmups:
+            f.result()
+
+        self._batcher = Thread(target=self._run, name="presidio-batcher", daemon=True)
+        self._batcher.start()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        with self._executor_lock:
+            if self._closed:
+                future.set_exception(RuntimeError("Presidio pool is shut down"))
+                return future
+            self._queue.put((str(text or ""), future))
+        return future
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+        """Swap in a fresh executor unless another batch already did."""
+        with self._executor_lock:
+            if self._closed:
+                return None
+            if self._executor is broken:
+                logger.warning("presidio pool broken, restarting workers")
+                self._executor = self._new_executor()
+                self.restarts += 1
+                broken.shutdown(wait=False, cancel_futures=True)
+            return self._executor
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.linger_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[tuple[str, Future]]) -> None:
+        futures = [f for _, f in batch]
+        texts = [t for t, _ in batch]
+        executor = self._executor
+        try:
+            assert executor is not None
+            try:
+                pool_future = executor.submit(_analyze_batch, texts)
+            except BrokenProcessPool:
+                # Broken before this batch reached it: retry once on a new one.
+                executor = self._replace_broken(executor)
+                if executor is None:
+                    raise
+                pool_future = executor.submit(_analyze_batch, texts)
+        except Exception as exc:
+            for f in futures:
+                f.set_exception(exc)
+            return
+
+        def _resolve(done: Future) -> None:
+            try:
+                results = done.result()
+            except Exception as exc:
+                logger.warning("presidio batch failed: size=%s error=%s", len(futures), exc)
+                if isinstance(exc, BrokenProcessPool):
+                    self._replace_broken(executor)
+                for f in futures:
+                    f.set_exception(exc)
+                return
+            for f, r in zip(futures, results):
+                f.set_result(r)
+
+        pool_future.add_done_callback(_resolve)
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            self._closed = True
+            executor = self._executor
+        self._queue.put(None)
+        if self._batcher is not None:
+            self._batcher.join(timeout=2.0)
+        if executor is not None:
+            # Batches already sent fail with CancelledError via _resolve.
+            executor.shutdown(wait=False, cancel_futures=True)
+        stopped = RuntimeError("Presidio pool is shut down")
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and not item[1].done():
+                item[1].set_exception(stopped)
+
+
+_pool: Optional[PresidioPool] = None
+_pool_lock = Lock()
+
+
+def get_presidio_pool() -> Optional[PresidioPool]:
+    """The running pool, or None (detectors then analyze in-process)."""
+    return _pool
+
+
+def start_presidio_pool() -> Optional[PresidioPool]:
+    """
+    Start the shared pool when PRESIDIO_POOL_WORKERS > 0; otherwise load the
+    in-process analyzer so a missing model still fails at startup.
+    """
+    global _pool
+
+    settings = get_settings()
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        if int(settings.presidio_pool_workers) <= 0:
+            get_shared_analyzer(DEFAULT_MODEL_NAME)
+            return None
+        pool = PresidioPool(
+            model_name=DEFAULT_MODEL_NAME,
+            workers=settings.presidio_pool_workers,
+            max_batch_size=settings.presidio_batch_max_size,
+            linger_ms=settings.presidio_batch_linger_ms,
+        )
+        pool.start()
+        _pool = pool
+        return pool
+
+
+def shutdown_presidio_pool() -> None:
+    global _pool
+
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+    if pool is not None:
+        pool.shutdown()
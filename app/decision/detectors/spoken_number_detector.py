@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 import re
 import unicodedata
 from typing import List
 
 from app.decision.detectors.local_regex_detector import Entity
+from app.decision.keyword_automaton import TermPositions
 from app.decision.normalizers.digit_normalizer import DigitNormalizer
+from app.decision.scan_text import ScanText
+
+_SYMBOLS_RE = re.compile(r"[^a-z0-9\s:/._-]+")
+_WS_RE = re.compile(r"\s+")
 
 
 class SpokenNumberDetector:
@@ -41,23 +47,24 @@ class SpokenNumberDetector:
             "tin",
         ]
 
-    def scan(self, text: str) -> List[Entity]:
+    def scan(self, text: "str | ScanText") -> List[Entity]:
+        scan_text = ScanText.of(text)
+        text = scan_text.raw
         candidates = self.norm.extract(text)
         results: List[Entity] = []
-        lower_text = str(text or "").lower()
 
         for c in candidates:
             digits = c.digits
             etype = self._guess_type(
                 digits=digits,
-                lower_text=lower_text,
+                scan_text=scan_text,
                 start=int(c.start),
             )
             if not etype:
                 continue
 
             base_score = float(c.confidence)
-            context_level = self._context_level(lower_text, int(c.start), etype)
+            context_level = self._context_level(scan_text, int(c.start), etype)
             if context_level == 2:
                 score = min(0.95, base_score + 0.15)
             elif context_level == 1:
@@ -86,13 +93,13 @@ class SpokenNumberDetector:
 
         return results
 
-    def _guess_type(self, digits: str, *, lower_text: str, start: int) -> str | None:
+    def _guess_type(
+        self, digits: str, *, scan_text: ScanText, start: int
+    ) -> str | None:
         n = len(digits)
-        ctx = self._context_window(lower_text, start, 60)
-
-        has_cccd_ctx = any(k in ctx for k in self.KW_CCCD)
-        has_tax_ctx = any(k in ctx for k in self.KW_TAX_STRONG)
-        has_phone_ctx = any(k in ctx for k in self.KW_PHONE)
+        has_cccd_ctx = self._has_keyword_near(scan_text, start, 60, self.KW_CCCD)
+        has_tax_ctx = self._has_keyword_near(scan_text, start, 60, self.KW_TAX_STRONG)
+        has_phone_ctx = self._has_keyword_near(scan_text, start, 60, self.KW_PHONE)
 
         if n in (12, 13) and has_cccd_ctx:
             return "CCCD"
@@ -117,7 +124,7 @@ class SpokenNumberDetector:
 
         return None
 
-    def _context_level(self, text: str, pos: int, etype: str) -> int:
+    def _context_level(self, text: ScanText, pos: int, etype: str) -> int:
         """
         0 = no context
         1 = keyword within +-60 chars
@@ -133,22 +140,52 @@ class SpokenNumberDetector:
             return 0
 
         for window, level in ((20, 2), (60, 1)):
-            snippet = self._context_window(text, pos, window)
-            if any(k in snippet for k in keywords):
+            if self._has_keyword_near(text, pos, window, keywords):
                 return level
         return 0
 
-    def _context_window(self, text: str, pos: int, window: int) -> str:
+    def _context_index(self, scan_text: ScanText) -> tuple[TermPositions, list[int]]:
+        """
+        Keyword positions over the whole text, normalized the way
+        `_fold_text` normalizes a window, plus the offset mapping back to
+        raw positions.
+        """
+        keywords = tuple(self.KW_PHONE + self.KW_CCCD + self.KW_TAX_STRONG)
+
+        def _build() -> tuple[TermPositions, list[int]]:
+            folded, folded_mapping = scan_text.folded_chars
+            chars: list[str] = []
+            mapping: list[int] = []
+            for ch, raw_index in zip(folded, folded_mapping):
+                if ch.isspace() or _SYMBOLS_RE.match(ch):
+                    if chars and chars[-1] == " ":
+                        continue
+                    ch = " "
+                chars.append(ch)
+                mapping.append(raw_index)
+            return TermPositions("".join(chars), keywords), mapping
+
+        return scan_text.memo(("spoken_number.context", keywords), _build)
+
+    def _has_keyword_near(
+        self, scan_text: ScanText, pos: int, window: int, keywords: list[str]
+    ) -> bool:
+        positions, mapping = self._context_index(scan_text)
         start = max(0, int(pos) - int(window))
-        end = min(len(text), int(pos) + int(window))
-        return self._fold_text(text[start:end])
+        end = min(len(scan_text), int(pos) + int(window))
+        lo = bisect_left(mapping, start)
+        hi = bisect_left(mapping, end)
+        return any(positions.occurs_within(k, lo, hi) for k in keywords)
 
     def _fold_text(self, text: str) -> str:
         raw = str(text or "").lower().replace("\u0111", "d")
         normalized = unicodedata.normalize("NFKD", raw)
         no_marks = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-        no_symbols = re.sub(r"[^a-z0-9\s:/._-]+", " ", no_marks)
-        return re.sub(r"\s+", " ", no_symbols).strip()
+        return self._strip_symbols(no_marks)
+
+    def _strip_symbols(self, folded: str) -> str:
+        no_symbols = _SYMBOLS_RE.sub(" ", folded)
+        return _WS_RE.sub(" ", no_symbols).strip()
 
     def _expand_end(self, text: str, end: int) -> int:
         # Extend end index to include trailing alphabetic chars in partially-tokenized words.
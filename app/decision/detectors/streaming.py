@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import replace
+from typing import Any, List
+
+from app.decision.scan_text import ScanText
+
+# Detectors return `Entity` dataclasses (see local_regex_detector).
+WindowScan = Callable[[ScanText], List[Any]]
+
+
+class StreamingDetector:
+    """
+    Chunked driver for a whole-text detector.
+
+    Chunks are appended to a bounded window that is rescanned once enough new
+    text has arrived. An entity is finalized (returned once, with absolute
+    offsets) when it starts at least `max_entity_chars + context_chars` before
+    the end of the text fed so far: no later chunk can still extend it or
+    change its context score. The window then drops everything older than the
+    same distance before the finalized position, so memory stays bounded by
+    roughly twice that look-back plus one chunk.
+
+    Entities longer than `max_entity_chars` may be reported partially.
+    """
+
+    def __init__(
+        self,
+        scan: WindowScan,
+        *,
+        max_entity_chars: int,
+        context_chars: int = 0,
+    ):
+        self._scan = scan
+        # +1 keeps the char before a candidate for \b and lookbehind checks.
+        self.lookahead = max(1, int(max_entity_chars) + max(0, int(context_chars)))
+        self.lookback = self.lookahead + 1
+        self.finalized_upto = 0
+        self._buffer = ""
+        self._offset = 0
+
+    @property
+    def position(self) -> int:
+        """Absolute length of the text fed so far."""
+        return self._offset + len(self._buffer)
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._buffer += chunk or ""
+        horizon = self.position - self.lookahead
+        # Rescan only after `lookahead` new finalizable chars, so tiny chunks
+        # do not rescan the whole window each time.
+        if horizon - self.finalized_upto < self.lookahead:
+            return []
+        return self._finalize(horizon)
+
+    def close(self) -> List[Any]:
+        """Finalize everything left; the stream must not be fed afterwards."""
+        if self.position <= self.finalized_upto:
+            return []
+        return self._finalize(self.position)
+
+    def _finalize(self, horizon: int) -> List[Any]:
+        offset = self._offset
+        out: List[Any] = []
+        for entity in self._scan(ScanText(self._buffer)):
+            start = int(entity.start) + offset
+            if self.finalized_upto <= start < horizon:
+                out.append(
+                    replace(entity, start=start, end=int(entity.end) + offset)
+                )
+        self.finalized_upto = horizon
+
+        keep_from = max(0, horizon - self.lookback - offset)
+        if keep_from:
+            self._buffer = self._buffer[keep_from:]
+            self._offset = offset + keep_from
+
+        out.sort(key=lambda e: (e.start, e.end))
+        return out
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import re
-import unicodedata
 from typing import List
 
 from app.decision.detectors.folded_text import (
-    fold_text_with_mapping,
+    fold_text,
     original_span_from_folded,
 )
 from app.decision.detectors.local_regex_detector import Entity
+from app.decision.scan_text import ScanText
 
 
 class VietnameseAddressDetector:
@@ -130,12 +130,13 @@ class VietnameseAddressDetector:
     _LOCATION_TERMS = ("duong", "pho", "ngo", "quan")
     _HEURISTIC_BOUNDARY = re.compile(r"[\r\n]|[.!?;](?:\s|$)")
 
-    def scan(self, text: str) -> List[Entity]:
-        raw_text = str(text or "")
+    def scan(self, text: "str | ScanText") -> List[Entity]:
+        scan_text = ScanText.of(text)
+        raw_text = scan_text.raw
         if not raw_text:
             return []
 
-        folded_text, mapping = fold_text_with_mapping(raw_text)
+        folded_text, mapping = scan_text.folded_with_mapping
         entities: list[Entity] = []
         seen_spans: set[tuple[int, int]] = set()
 
@@ -302,10 +303,7 @@ class VietnameseAddressDetector:
         return self._has_house_number_signal(text)
 
     def _fold_text(self, text: str) -> str:
-        raw = str(text or "").lower().replace("\u0111", "d")
-        normalized = unicodedata.normalize("NFKD", raw)
-        no_marks = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-        return re.sub(r"\s+", " ", no_marks).strip()
+        return fold_text(text)
 
     def _has_strong_cue(self, folded_text: str) -> bool:
         return any(
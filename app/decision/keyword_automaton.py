@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+import re
+from threading import Lock
+from typing import Any, Optional
+
+
+class KeywordAutomaton:
+    """
+    Multi-keyword matcher: finds every occurrence of every term in one pass.
+
+    The terms are compiled into a single trie-shaped regex, so at each text
+    position the C regex engine walks the trie once (cost bounded by the longest
+    term) instead of testing each term separately. The lookahead yields the
+    longest term starting at each position; shorter terms at the same position
+    are exactly its term-prefixes, which are precomputed.
+    """
+
+    __slots__ = ("terms", "_pattern", "_prefix_terms")
+
+    def __init__(self, terms: Iterable[str]):
+        unique = sorted({str(t) for t in terms if t})
+        self.terms: tuple[str, ...] = tuple(unique)
+
+        trie: dict[str, Any] = {}
+        for term in unique:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[""] = True
+
+        self._pattern: Optional[re.Pattern[str]] = (
+            re.compile(f"(?=({_trie_regex(trie)}))") if unique else None
+        )
+
+        term_set = set(unique)
+        self._prefix_terms: dict[str, tuple[str, ...]] = {
+            term: tuple(
+                term[:i] for i in range(len(term) - 1, 0, -1) if term[:i] in term_set
+            )
+            for term in unique
+        }
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int, str]]:
+        """Yield `(start, end, term)` for all (overlapping) occurrences."""
+        if self._pattern is None:
+            return
+        for m in self._pattern.finditer(text):
+            start = m.start()
+            longest = m.group(1)
+            yield (start, start + len(longest), longest)
+            for term in self._prefix_terms[longest]:
+                yield (start, start + len(term), term)
+
+    def matched_terms(self, text: str) -> set[str]:
+        found: set[str] = set()
+        if self._pattern is None:
+            return found
+        for m in self._pattern.finditer(text):
+            longest = m.group(1)
+            if longest in found:
+                continue
+            found.add(longest)
+            found.update(self._prefix_terms[longest])
+        return found
+
+
+def _trie_regex(node: dict[str, Any]) -> str:
+    alternatives = [
+        re.escape(ch) + _trie_regex(child)
+        for ch, child in sorted(node.items())
+        if ch != ""
+    ]
+    if not alternatives:
+        return ""
+    body = (
+        alternatives[0]
+        if len(alternatives) == 1
+        else "(?:" + "|".join(alternatives) + ")"
+    )
+    if "" in node:
+        # Greedy optional group: prefer the longer term, fall back to this one.
+        return f"(?:{body})?"
+    return body
+
+
+@lru_cache(maxsize=256)
+def cached_automaton(terms: frozenset[str]) -> KeywordAutomaton:
+    return KeywordAutomaton(terms)
+
+
+class TermPositions:
+    """
+    Sorted start offsets of every term occurrence in one text.
+
+    Built with a single automaton pass; "does term T occur inside window
+    [start, end)" then becomes a bisect instead of slicing and searching.
+    """
+
+    __slots__ = ("_starts",)
+
+    def __init__(self, text: str, terms: Iterable[str]):
+        self._starts: dict[str, list[int]] = {}
+        # finditer yields increasing starts, so each list is already sorted.
+        for start, _end, term in cached_automaton(frozenset(terms)).finditer(text):
+            self._starts.setdefault(term, []).append(start)
+
+    def occurs_within(self, term: str, start: int, end: int) -> bool:
+        starts = self._starts.get(term)
+        if not starts:
+            return False
+        i = bisect_left(starts, start)
+        return i < len(starts) and starts[i] + len(term) <= end
+
+
+class AutomatonCache:
+    """
+    Lazily built automata that live as long as the data they were built from.
+
+    ContextRuntimeOverrides carries one instance, shared by its clones, so an
+    automaton is built once per tenant and dropped on invalidation.
+    """
+
+    __slots__ = ("_lock", "_items")
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._items: dict[Any, Any] = {}
+
+    def get_or_build(self, key: Any, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._items:
+                return self._items[key]
+        built = build()
+        with self._lock:
+            return self._items.setdefault(key, built)
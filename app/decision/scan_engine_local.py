@@ -1,30 +1,64 @@
 # app/decision/scan_engine_local.py
 from __future__ import annotations
 
-import re
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+import logging
 import time
-import unicodedata
 from typing import Any, Optional
 from uuid import UUID
 
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.common.enums import RuleAction, RuleScope
+from app.core.config import get_settings
+from app.db.async_bridge import close_session, sibling_session
 from app.decision.context_scorer import ContextScorer
-from app.decision.context_term_runtime import load_context_runtime_overrides
+from app.decision.context_term_runtime import (
+    ContextRuntimeOverrides,
+    load_context_runtime_overrides,
+)
 from app.decision.decision_resolver import DecisionResolver
 from app.decision.detectors.local_regex_detector import LocalRegexDetector
 from app.decision.detectors.obfuscated_email_detector import ObfuscatedEmailDetector
 from app.decision.detectors.presidio_detector import PresidioDetector
 from app.decision.detectors.security_injection_detector import SecurityInjectionDetector
+from app.decision.detectors.folded_text import fold_term, fold_text
 from app.decision.detectors.spoken_number_detector import SpokenNumberDetector
 from app.decision.detectors.vn_address_detector import VietnameseAddressDetector
 from app.decision.entity_merger import EntityMerger, MergeConfig
 from app.decision.entity_type_normalizer import EntityTypeNormalizer
+from app.decision.keyword_automaton import AutomatonCache, KeywordAutomaton
 from app.decision.rule_layering import compact_matches
+from app.decision.scan_executor import (
+    DETECTORS_STAGE,
+    EMBEDDING_STAGE,
+    PRESIDIO_STAGE,
+    get_scan_executor,
+)
+from app.decision.scan_result_cache import (
+    build_scan_result_cache,
+    make_scan_cache_key,
+)
+from app.decision.scan_text import ScanText
 from app.rag.rag_verifier import RagVerifier
-from app.rule.engine import RuleEngine, RuleMatch
-from app.rule_embedding.service import evaluate_semantic_assist_candidates
+from app.rule.engine import RuleEngine, RuleMatch, RuleSetSnapshot
+from app.rule_embedding.service import (
+    embed_rule_query,
+    evaluate_semantic_assist_candidates,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _PreparedScan:
+    entities: list
+    signals: dict[str, Any]
+    sec: Any
+    should_rag_gate: bool
 
 
 class ScanEngineLocal:
@@ -71,7 +105,7 @@ class ScanEngineLocal:
     def _find_runtime_rule_by_stable_key(
         self,
         *,
-        runtime_rules: list[Any],
+        runtime_rules: tuple[Any, ...],
         stable_key: str,
     ) -> Any | None:
         normalized_key = str(stable_key or "").strip().lower()
@@ -94,6 +128,9 @@ class ScanEngineLocal:
         self.rule_engine = RuleEngine()
         self.resolver = DecisionResolver()
         self.rag = RagVerifier()
+        # Blocking stages run here so the event loop stays responsive.
+        self.executor = get_scan_executor()
+        self.result_cache = build_scan_result_cache()
 
         self.type_norm = EntityTypeNormalizer()
         self.merger = EntityMerger(
@@ -118,7 +155,7 @@ class ScanEngineLocal:
     def _should_run_presidio(
         self,
         *,
-        text: str,
+        text: "str | ScanText",
         sec_decision: str,
         regex_entities: list[Any],
         spoken_entities: list[Any],
@@ -129,8 +166,9 @@ class ScanEngineLocal:
         if sec_decision == "BLOCK":
             return False
 
-        raw = text or ""
-        lower = raw.lower()
+        scan_text = ScanText.of(text)
+        raw = scan_text.raw
+        lower = scan_text.lower
 
         if "@" in raw or "http://" in lower or "https://" in lower:
             return True
@@ -145,7 +183,7 @@ class ScanEngineLocal:
     def _should_call_rag(
         self,
         *,
-        text: str,
+        text: "str | ScanText",
         sec_decision: str,
         sec_score: float,
         persona: Optional[str],
@@ -159,7 +197,7 @@ class ScanEngineLocal:
         if sec_decision == "REVIEW":
             return True
 
-        folded_text = self._fold_text(text)
+        folded_text = ScanText.of(text).folded
         if any(cue in folded_text for cue in self._RAG_EXAMPLE_SUPPRESSION_CUES):
             return False
 
@@ -223,41 +261,62 @@ class ScanEngineLocal:
         return has_supported
 
     def _fold_text(self, text: str) -> str:
-        raw = str(text or "").lower().replace("\u0111", "d")
-        normalized = unicodedata.normalize("NFKD", raw)
-        no_marks = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-        return re.sub(r"\s+", " ", no_marks).strip()
+        return fold_text(text)
+
+    def _build_exact_term_automaton(
+        self, exact_terms: list[str]
+    ) -> tuple[KeywordAutomaton, dict[str, tuple[int, ...]]]:
+        owners: dict[str, list[int]] = {}
+        for idx, term in enumerate(exact_terms):
+            folded_term = fold_term(str(term or "").strip().lower())
+            if folded_term:
+                owners.setdefault(folded_term, []).append(idx)
+        return (
+            KeywordAutomaton(owners.keys()),
+            {k: tuple(v) for k, v in owners.items()},
+        )
 
     def _match_exact_terms_in_text(
         self,
         *,
-        text: str,
+        text: "str | ScanText",
         exact_terms: list[str],
         limit: int = 20,
         min_length: int = 2,
+        automata: AutomatonCache | None = None,
     ) -> list[str]:
         if not exact_terms:
             return []
 
-        raw_text = str(text or "").lower()
-        fold_text = self._fold_text(text)
+        scan_text = ScanText.of(text)
+        if automata is None:
+            automaton, owners = self._build_exact_term_automaton(exact_terms)
+        else:
+            automaton, owners = automata.get_or_build(
+                "scan_engine.exact_terms",
+                lambda: self._build_exact_term_automaton(exact_terms),
+            )
+
+        # A term found in the lowercase text is always found in the folded
+        # text too, so one pass over the folded text covers both checks.
+        matched_positions: list[int] = []
+        for folded_term in automaton.matched_terms(scan_text.folded):
+            matched_positions.extend(owners[folded_term])
+
         out: list[str] = []
         seen: set[str] = set()
         safe_limit = max(1, int(limit))
 
-        for term in exact_terms:
-            normalized_term = str(term or "").strip().lower()
+        for idx in sorted(matched_positions):
+            normalized_term = str(exact_terms[idx] or "").strip().lower()
             if len(normalized_term) < max(1, int(min_length)):
                 continue
             if normalized_term in seen:
                 continue
-
-            fold_term = self._fold_text(normalized_term)
-            if normalized_term in raw_text or (fold_term and fold_term in fold_text):
-                seen.add(normalized_term)
-                out.append(normalized_term)
-                if len(out) >= safe_limit:
-                    break
+            seen.add(normalized_term)
+            out.append(normalized_term)
+            if len(out) >= safe_limit:
+                break
         return out
 
     def _merge_context_keywords(
@@ -283,73 +342,346 @@ class ScanEngineLocal:
     def _get_effective_rag_toggles(
         self,
         *,
-        session: Session,
-        company_id: Optional[UUID],
-        user_id: Optional[UUID],
+        runtime_rules: tuple[Any, ...],
     ) -> tuple[bool, bool]:
-        runtime_rules = self.rule_engine.load_rules(
-            session=session,
-            company_id=company_id,
-            user_id=user_id,
-        )
         keys = {str(r.stable_key) for r in runtime_rules}
         return (self._RAG_BLOCK_KEY in keys, self._RAG_MASK_KEY in keys)
 
+    def _run_local_detectors(
+        self,
+        *,
+        scan_text: ScanText,
+        overrides: Any,
+        timing_ms_by_stage: dict[str, int],
+    ) -> tuple[list[Any], list[Any], list[Any], list[Any], Any]:
+        ts = time.perf_counter()
+        regex_entities = self.local.scan(
+            scan_text,
+            context_hints_by_entity=overrides.regex_hints,
+        )
+        timing_ms_by_stage["detect_regex"] = int((time.perf_counter() - ts) * 1000)
+
+        ts = time.perf_counter()
+        spoken_entities = self.spoken.scan(scan_text)
+        timing_ms_by_stage["detect_spoken"] = int((time.perf_counter() - ts) * 1000)
+
+        ts = time.perf_counter()
+        obfuscated_email_entities = self.obfuscated_email.scan(scan_text)
+        timing_ms_by_stage["detect_obfuscated_email"] = int(
+            (time.perf_counter() - ts) * 1000
+        )
+
+        ts = time.perf_counter()
+        address_entities = self.address.scan(scan_text)
+        timing_ms_by_stage["detect_address"] = int((time.perf_counter() - ts) * 1000)
+
+        ts = time.perf_counter()
+        sec = self.security.scan(scan_text.raw)
+        timing_ms_by_stage["detect_security"] = int((time.perf_counter() - ts) * 1000)
+
+        return (
+            regex_entities,
+            spoken_entities,
+            obfuscated_email_entities,
+            address_entities,
+            sec,
+        )
+
     async def scan(
         self,
         *,
-        session: Session,
+        session: Session | AsyncSession,
         text: str,
         company_id: Optional[UUID],
         user_id: Optional[UUID] = None,
         scope: RuleScope = RuleScope.prompt,
+        local_only: bool = False,
+        release_session: Optional[Callable[[], Awaitable[None]]] = None,
     ) -> dict[str, Any]:
+        """
+        `local_only` stops after the phase-1 (local detector/rule) decision and
+        never calls semantic assist, semantic verify or RAG. It is meant for
+        cheap intermediate checkpoints, e.g. while a reply is being streamed;
+        such partial results are not written to the result cache.
+        `release_session` is handed to the semantic verify and RAG stages, which
+        await it after their DB reads and before their LLM call.
+        """
         t0 = time.perf_counter()
         timing_ms_by_stage: dict[str, int] = {}
 
+        # Rule snapshot and context terms are loaded first: their versions key
+        # the result cache, and the pipeline reuses them on a miss.
         ts = time.perf_counter()
-        overrides = load_context_runtime_overrides(
+        overrides = await self.executor.run_db(
+            load_context_runtime_overrides,
             session=session,
             company_id=company_id,
         )
         timing_ms_by_stage["overrides"] = int((time.perf_counter() - ts) * 1000)
 
         ts = time.perf_counter()
-        regex_entities = self.local.scan(
-            text,
-            context_hints_by_entity=overrides.regex_hints,
+        rule_snapshot = await self.executor.run_db(
+            self.rule_engine.load_snapshot,
+            session=session,
+            company_id=company_id,
+            user_id=user_id,
         )
-        timing_ms_by_stage["detect_regex"] = int((time.perf_counter() - ts) * 1000)
+        timing_ms_by_stage["rule_snapshot"] = int((time.perf_counter() - ts) * 1000)
 
         ts = time.perf_counter()
-        spoken_entities = self.spoken.scan(text)
-        timing_ms_by_stage["detect_spoken"] = int((time.perf_counter() - ts) * 1000)
+        cache_key = make_scan_cache_key(
+            text=text,
+            scope=scope,
+            company_id=company_id,
+            user_id=user_id,
+            rules_version=rule_snapshot.version,
+            context_terms_version=overrides.version,
+        )
+        cached = await self.result_cache.get(cache_key)
+        timing_ms_by_stage["scan_cache"] = int((time.perf_counter() - ts) * 1000)
+        if cached is not None:
+            latency_ms = int((time.perf_counter() - t0) * 1000)
+            timing_ms_by_stage["total"] = latency_ms
+            cached["latency_ms"] = latency_ms
+            cached["timing_ms_by_stage"] = timing_ms_by_stage
+            cached["cache_hit"] = True
+            return cached
 
-        ts = time.perf_counter()
-        obfuscated_email_entities = self.obfuscated_email.scan(text)
-        timing_ms_by_stage["detect_obfuscated_email"] = int(
-            (time.perf_counter() - ts) * 1000
+        out = await self._scan_uncached(
+            session=session,
+            text=text,
+            company_id=company_id,
+            user_id=user_id,
+            scope=scope,
+            overrides=overrides,
+            rule_snapshot=rule_snapshot,
+            local_only=local_only,
+            t0=t0,
+            timing_ms_by_stage=timing_ms_by_stage,
+            release_session=release_session,
         )
+        if not local_only:
+            await self.result_cache.set(cache_key, out)
+        out["cache_hit"] = False
+        return out
 
-        ts = time.perf_counter()
-        address_entities = self.address.scan(text)
-        timing_ms_by_stage["detect_address"] = int((time.perf_counter() - ts) * 1000)
+    async def scan_many(
+        self,
+        *,
+        session: Session | AsyncSession,
+        texts: Sequence[str],
+        company_id: Optional[UUID],
+        user_id: Optional[UUID] = None,
+        scope: RuleScope = RuleScope.prompt,
+        concurrency: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        `scan` for many texts against one rule set; results keep input order.
+
+        Rules and context overrides are loaded once. Local detectors fan out
+        over the scan executor, Presidio runs as nlp.pipe batches, and policy
+        embeddings of every text that may reach RAG are fetched in one call.
+        The DB/LLM decision stages then run over `concurrency` lanes; lanes
+        beyond the first use their own session (same kind, same bind), since
+        a session must not be shared across concurrent calls.
+
+        `latency_ms` of each result is measured from the start of the batch.
+        """
+        texts = [str(text or "") for text in texts]
+        if not texts:
+            return []
+        t0 = time.perf_counter()
 
-        ts = time.perf_counter()
-        sec = self.security.scan(text)
-        timing_ms_by_stage["detect_security"] = int((time.perf_counter() - ts) * 1000)
+        overrides = await self.executor.run_db(
+            load_context_runtime_overrides,
+            session=session,
+            company_id=company_id,
+        )
+        rule_snapshot = await self.executor.run_db(
+            self.rule_engine.load_snapshot,
+            session=session,
+            company_id=company_id,
+            user_id=user_id,
+        )
+
+        results: list[Optional[dict[str, Any]]] = [None] * len(texts)
+        cache_keys = [
+            make_scan_cache_key(
+                text=text,
+                scope=scope,
+                company_id=company_id,
+                user_id=user_id,
+                rules_version=rule_snapshot.version,
+                context_terms_version=overrides.version,
+            )
+            for text in texts
+        ]
+        for i, key in enumerate(cache_keys):
+            cached = await self.result_cache.get(key)
+            if cached is not None:
+                latency_ms = int((time.perf_counter() - t0) * 1000)
+                cached["latency_ms"] = latency_ms
+                cached["timing_ms_by_stage"] = {"scan_cache": 0, "total": latency_ms}
+                cached["cache_hit"] = True
+                results[i] = cached
+
+        pending = [i for i, out in enumerate(results) if out is None]
+        if not pending:
+            return results  # type: ignore[return-value]
+
+        timings: dict[int, dict[str, int]] = {i: {} for i in pending}
+        scan_texts = {i: ScanText(texts[i]) for i in pending}
+        detections = await asyncio.gather(
+            *(
+                self.executor.run(
+                    DETECTORS_STAGE,
+                    self._run_local_detectors,
+                    scan_text=scan_texts[i],
+                    overrides=overrides,
+                    timing_ms_by_stage=timings[i],
+                )
+                for i in pending
+            )
+        )
+        detections_by_index = dict(zip(pending, detections))
 
         ts = time.perf_counter()
-        if self._should_run_presidio(
-            text=text,
+        presidio_indexes = [
+            i
+            for i in pending
+            if self._needs_presidio(
+                scan_text=scan_texts[i], detections=detections_by_index[i]
+            )
+        ]
+        presidio_out = (
+            await self.executor.run(
+                PRESIDIO_STAGE,
+                self.presidio.scan_many,
+                [texts[i] for i in presidio_indexes],
+            )
+            if presidio_indexes
+            else []
+        )
+        presidio_by_index = dict(zip(presidio_indexes, presidio_out))
+        presidio_ms = int((time.perf_counter() - ts) * 1000)
+
+        prepared: dict[int, _PreparedScan] = {}
+        for i in pending:
+            timings[i]["detect_presidio"] = presidio_ms if i in presidio_by_index else 0
+            prepared[i] = await self._prepare_scan(
+                scan_text=scan_texts[i],
+                overrides=overrides,
+                timing_ms_by_stage=timings[i],
+                detections=detections_by_index[i],
+                presidio_entities=presidio_by_index.get(i, []),
+            )
+
+        policy_embeddings: dict[str, list[float]] = {}
+        rag_block_on, rag_mask_on = self._get_effective_rag_toggles(
+            runtime_rules=rule_snapshot.rules,
+        )
+        rag_texts = [texts[i] for i in pending if prepared[i].should_rag_gate]
+        if rag_texts and (rag_block_on or rag_mask_on):
+            try:
+                policy_embeddings = await self.rag.retriever.embed_many(rag_texts)
+            except Exception as exc:
+                # Each RAG call then embeds its own query as usual.
+                logger.warning("scan_many policy embedding batch failed: %s", exc)
+
+        queue = iter(pending)
+
+        async def _lane(lane_session: Session | AsyncSession) -> None:
+            for i in queue:
+                out = await self._scan_uncached(
+                    session=lane_session,
+                    text=texts[i],
+                    company_id=company_id,
+                    user_id=user_id,
+                    scope=scope,
+                    overrides=overrides,
+                    rule_snapshot=rule_snapshot,
+                    local_only=False,
+                    t0=t0,
+                    timing_ms_by_stage=timings[i],
+                    prepared=prepared[i],
+                    policy_query_embedding=policy_embeddings.get(texts[i]),
+                )
+                await self.result_cache.set(cache_keys[i], out)
+                out["cache_hit"] = False
+                results[i] = out
+
+        lanes = max(
+            1,
+            min(int(concurrency or get_settings().scan_batch_concurrency), len(pending)),
+        )
+        extra_sessions = [sibling_session(session) for _ in range(lanes - 1)]
+        try:
+            await asyncio.gather(
+                _lane(session), *(_lane(extra) for extra in extra_sessions)
+            )
+        finally:
+            for extra in extra_sessions:
+                await close_session(extra)
+
+        return results  # type: ignore[return-value]
+
+    def _needs_presidio(self, *, scan_text: ScanText, detections: tuple) -> bool:
+        regex_entities, spoken_entities, obfuscated_email_entities, address_entities, sec = (
+            detections
+        )
+        return self._should_run_presidio(
+            text=scan_text,
             sec_decision=str(sec.decision),
             regex_entities=regex_entities + obfuscated_email_entities + address_entities,
             spoken_entities=spoken_entities,
-        ):
-            presidio_entities = self.presidio.scan(text)
-        else:
-            presidio_entities = []
-        timing_ms_by_stage["detect_presidio"] = int((time.perf_counter() - ts) * 1000)
+        )
+
+    async def _prepare_scan(
+        self,
+        *,
+        scan_text: ScanText,
+        overrides: ContextRuntimeOverrides,
+        timing_ms_by_stage: dict[str, int],
+        detections: Optional[tuple] = None,
+        presidio_entities: Optional[list] = None,
+    ) -> "_PreparedScan":
+        """
+        Detection, context scoring and the RAG gate: everything before rule
+        evaluation. `scan_many` passes detector and Presidio output it already
+        computed in bulk.
+        """
+        if detections is None:
+            detections = await self.executor.run(
+                DETECTORS_STAGE,
+                self._run_local_detectors,
+                scan_text=scan_text,
+                overrides=overrides,
+                timing_ms_by_stage=timing_ms_by_stage,
+            )
+        (
+            regex_entities,
+            spoken_entities,
+            obfuscated_email_entities,
+            address_entities,
+            sec,
+        ) = detections
+
+        if presidio_entities is None:
+            ts = time.perf_counter()
+            if self._needs_presidio(scan_text=scan_text, detections=detections):
+                if self.presidio.pooled:
+                    presidio_entities = await asyncio.wrap_future(
+                        self.presidio.submit(scan_text.raw)
+                    )
+                else:
+                    presidio_entities = await self.executor.run(
+                        PRESIDIO_STAGE, self.presidio.scan, scan_text.raw
+                    )
+            else:
+                presidio_entities = []
+            timing_ms_by_stage["detect_presidio"] = int(
+                (time.perf_counter() - ts) * 1000
+            )
 
         ts = time.perf_counter()
         all_entities = (
@@ -371,8 +703,9 @@ class ScanEngineLocal:
 
         ts = time.perf_counter()
         ctx = self.context.score(
-            text,
+            scan_text,
             persona_keywords_override=overrides.persona_keywords,
+            automata=overrides.automata,
         )
         signals = self.context.to_signals_dict(ctx)
         signals["semantic_assist"] = self._default_semantic_assist_signal()
@@ -383,8 +716,9 @@ class ScanEngineLocal:
             signals["semantic_verify_enforced_reason"],
         ) = self._default_semantic_verify_enforcement_state()
         matched_exact_terms = self._match_exact_terms_in_text(
-            text=text,
+            text=scan_text,
             exact_terms=overrides.exact_terms,
+            automata=overrides.automata,
         )
         signals["context_keywords"] = self._merge_context_keywords(
             context_keywords=list(signals.get("context_keywords") or []),
@@ -403,7 +737,7 @@ class ScanEngineLocal:
 
         ts = time.perf_counter()
         should_rag_gate = self._should_call_rag(
-            text=text,
+            text=scan_text,
             sec_decision=str(sec.decision),
             sec_score=float(sec.score),
             persona=signals.get("persona"),
@@ -413,15 +747,55 @@ class ScanEngineLocal:
         )
         timing_ms_by_stage["gate_rag"] = int((time.perf_counter() - ts) * 1000)
 
+        return _PreparedScan(
+            entities=entities,
+            signals=signals,
+            sec=sec,
+            should_rag_gate=should_rag_gate,
+        )
+
+    async def _scan_uncached(
+        self,
+        *,
+        session: Session | AsyncSession,
+        text: str,
+        company_id: Optional[UUID],
+        user_id: Optional[UUID],
+        scope: RuleScope,
+        overrides: ContextRuntimeOverrides,
+        rule_snapshot: RuleSetSnapshot,
+        local_only: bool,
+        t0: float,
+        timing_ms_by_stage: dict[str, int],
+        prepared: Optional["_PreparedScan"] = None,
+        policy_query_embedding: Optional[list[float]] = None,
+        release_session: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> dict[str, Any]:
+        if prepared is None:
+            # Folded/lowercased views are shared by every detector and scorer.
+            prepared = await self._prepare_scan(
+                scan_text=ScanText(text),
+                overrides=overrides,
+                timing_ms_by_stage=timing_ms_by_stage,
+            )
+        entities = prepared.entities
+        signals = prepared.signals
+        sec = prepared.sec
+        should_rag_gate = prepared.should_rag_gate
+
         # Phase 1: evaluate local/policy rules without rag.* rules.
+        # The snapshot loaded by scan() is reused by every later stage.
         ts = time.perf_counter()
-        phase1_matches = self.rule_engine.evaluate(
-            session=session,
-            company_id=company_id,
-            user_id=user_id,
+        phase1_positions = self.rule_engine.match_positions(
+            snapshot=rule_snapshot,
             entities=entities,
             signals=signals,
         )
+        phase1_matches = self.rule_engine.build_matches(
+            snapshot=rule_snapshot,
+            positions=phase1_positions,
+            company_id=company_id,
+        )
         phase1_matches = [
             m for m in phase1_matches if not self._is_rag_rule_key(m.stable_key)
         ]
@@ -431,7 +805,7 @@ class ScanEngineLocal:
         phase1_decision = self.resolver.resolve(phase1_matches)
         timing_ms_by_stage["resolve_phase1"] = int((time.perf_counter() - ts) * 1000)
 
-        if self._action_name(phase1_decision.final_action) != "allow":
+        if local_only or self._action_name(phase1_decision.final_action) != "allow":
             signals.pop("rag", None)
             signals["semantic_assist"] = self._default_semantic_assist_signal()
             signals["semantic_verify"] = self._default_semantic_verify_signal()
@@ -476,21 +850,25 @@ class ScanEngineLocal:
             }
 
         ts = time.perf_counter()
-        runtime_rules = self.rule_engine.load_rules(
-            session=session,
-            company_id=company_id,
-            user_id=user_id,
-        )
+        runtime_rules = rule_snapshot.rules
         semantic_runtime_rule_ids = [
             row.rule_id
             for row in runtime_rules
             if not self._is_rag_rule_key(row.stable_key)
         ]
-        signals["semantic_assist"] = evaluate_semantic_assist_candidates(
+        # The query vector used by semantic assist and RAG rule retrieval is
+        # only needed once phase 1 allowed; it has its own stage so it never
+        # waits behind (or holds) a detector slot.
+        query_embedding = await self.executor.run(
+            EMBEDDING_STAGE, embed_rule_query, text
+        )
+        signals["semantic_assist"] = await self.executor.run_db(
+            evaluate_semantic_assist_candidates,
             session=session,
             query=text,
             runtime_rule_ids=semantic_runtime_rule_ids,
             matched_context_keywords=list(signals.get("context_keywords") or []),
+            query_embedding=query_embedding,
         )
         timing_ms_by_stage["semantic_assist"] = int((time.perf_counter() - ts) * 1000)
 
@@ -511,6 +889,7 @@ class ScanEngineLocal:
                 matched_context_keywords=list(signals.get("context_keywords") or []),
                 semantic_confidence=semantic_top_confidence,
                 message_id=None,
+                release_session=release_session,
             )
             signals["semantic_verify"] = {
                 "called": bool(getattr(verify_out, "called", False)),
@@ -606,9 +985,7 @@ class ScanEngineLocal:
 
         ts = time.perf_counter()
         rag_block_on, rag_mask_on = self._get_effective_rag_toggles(
-            session=session,
-            company_id=company_id,
-            user_id=user_id,
+            runtime_rules=runtime_rules,
         )
         timing_ms_by_stage["resolve_rag_toggles"] = int(
             (time.perf_counter() - ts) * 1000
@@ -635,6 +1012,10 @@ class ScanEngineLocal:
                 user_id=user_id,
                 message_id=None,
                 runtime_scope=scope,
+                rules_version=rule_snapshot.version,
+                rule_query_embedding=query_embedding,
+                policy_query_embedding=policy_query_embedding,
+                release_session=release_session,
             )
             raw_rag_decision = str(rag_out.decision).upper()
             effective_rag_decision = raw_rag_decision
@@ -656,13 +1037,26 @@ class ScanEngineLocal:
             signals.pop("rag", None)
         timing_ms_by_stage["rag"] = int((time.perf_counter() - ts) * 1000)
 
+        # Phase 2: only rules reading rag.* / semantic_* signals can change
+        # outcome; everything else keeps its phase-1 result.
         ts = time.perf_counter()
-        matches = self.rule_engine.evaluate(
-            session=session,
+        rag_dependent = rule_snapshot.rag_dependent_positions
+        phase2_positions = [
+            pos for pos in phase1_positions if pos not in rag_dependent
+        ]
+        if rag_dependent:
+            phase2_positions.extend(
+                self.rule_engine.match_positions(
+                    snapshot=rule_snapshot,
+                    entities=entities,
+                    signals=signals,
+                    only=rag_dependent,
+                )
+            )
+        matches = self.rule_engine.build_matches(
+            snapshot=rule_snapshot,
+            positions=phase2_positions,
             company_id=company_id,
-            user_id=user_id,
-            entities=entities,
-            signals=signals,
         )
         timing_ms_by_stage["rule_eval"] = int((time.perf_counter() - ts) * 1000)
 
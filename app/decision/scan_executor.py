@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from threading import Lock
+from typing import Any, Optional, TypeVar
+import weakref
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.db.async_bridge import run_db
+
+T = TypeVar("T")
+
+# Stages offloaded by ScanEngineLocal.scan.
+DETECTORS_STAGE = "detectors"
+EMBEDDING_STAGE = "embedding"
+PRESIDIO_STAGE = "presidio"
+DB_STAGE = "db"
+
+
+class ScanExecutor:
+    """
+    Bounded thread pool for the blocking parts of a scan.
+
+    `run` hands a sync callable to the pool so the event loop keeps serving
+    other requests, and caps how many calls of one stage run at once (e.g. only
+    a couple of Presidio analyses per worker), so a burst of long messages
+    cannot occupy every thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int,
+        stage_limits: dict[str, int],
+        enabled: bool = True,
+    ):
+        self.enabled = bool(enabled)
+        self.max_workers = max(1, int(max_workers))
+        self.stage_limits = {k: max(1, int(v)) for k, v in stage_limits.items()}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = Lock()
+        # asyncio primitives belong to one loop; keep a set per running loop.
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="scan",
+                )
+            return self._pool
+
+    def _semaphore(
+        self, loop: asyncio.AbstractEventLoop, stage: str
+    ) -> Optional[asyncio.Semaphore]:
+        limit = self.stage_limits.get(stage)
+        if limit is None:
+            return None
+        per_loop = self._semaphores.setdefault(loop, {})
+        sem = per_loop.get(stage)
+        if sem is None:
+            sem = asyncio.Semaphore(limit)
+            per_loop[stage] = sem
+        return sem
+
+    async def run(self, stage: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        sem = self._semaphore(loop, stage)
+        if sem is None:
+            return await loop.run_in_executor(self._get_pool(), call)
+        async with sem:
+            return await loop.run_in_executor(self._get_pool(), call)
+
+    async def run_db(self, fn: Callable[..., T], /, *, session: Any, **kwargs: Any) -> T:
+        """
+        DB stage call `fn(session=session, **kwargs)`: an AsyncSession runs it
+        natively (see app.db.async_bridge.run_db), a sync Session on this pool.
+        """
+        if isinstance(session, AsyncSession):
+            return await run_db(session, fn, **kwargs)
+        return await self.run(DB_STAGE, fn, session=session, **kwargs)
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[ScanExecutor] = None
+_executor_lock = Lock()
+
+
+def get_scan_executor() -> ScanExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            settings = get_settings()
+            _executor = ScanExecutor(
+                max_workers=settings.scan_executor_max_workers,
+                stage_limits={
+                    DETECTORS_STAGE: settings.scan_detector_concurrency,
+                    EMBEDDING_STAGE: settings.scan_embedding_concurrency,
+                    PRESIDIO_STAGE: settings.scan_presidio_concurrency,
+                    DB_STAGE: settings.scan_db_concurrency,
+                },
+                enabled=settings.scan_executor_enabled,
+            )
+        return _executor
+
+
+def shutdown_scan_executor() -> None:
+    global _executor
+
+    with _executor_lock:
+        executor = _executor
+        _executor = None
+    if executor is not None:
+        executor.shutdown()
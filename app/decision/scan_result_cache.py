@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+from threading import Lock
+import time
+from typing import Any, Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+
+from app.common.cache_bus import listener_active, local_cache_ttl_seconds
+from app.common.enums import RuleAction
+from app.core.config import get_settings
+from app.decision.detectors.local_regex_detector import Entity
+from app.decision.serializers import entity_to_dict, rulematch_to_dict
+from app.rule.engine import RuleMatch
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload shape or the detector pipeline changes meaning,
+# so entries written by an older deploy are never read back.
+_FORMAT_VERSION = 2
+
+# Without the invalidation listener the rule/context-term versions are only
+# process-local and other workers' edits show up after the runtime caches'
+# short fallback TTL; local scan results must not outlive that.
+_FALLBACK_TTL_SECONDS = 5.0
+
+_redis: Optional[redis.Redis] = None
+
+
+def _get_redis() -> Optional[redis.Redis]:
+    global _redis
+
+    redis_url = (get_settings().redis_url or "").strip()
+    if not redis_url:
+        return None
+
+    if _redis is None:
+        _redis = redis.from_url(
+            redis_url,
+            decode_responses=True,
+            socket_timeout=1.0,
+            socket_connect_timeout=1.0,
+        )
+    return _redis
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_scan_cache_key(
+    *,
+    text: str,
+    scope: Any,
+    company_id: Optional[UUID],
+    user_id: Optional[UUID],
+    rules_version: int,
+    context_terms_version: int,
+) -> str:
+    scope_value = str(getattr(scope, "value", scope) or "")
+    # Same scoping as RuleEngine: the user only matters for personal scans.
+    if company_id is not None:
+        user_id = None
+    return (
+        f"scan:result:v{_FORMAT_VERSION}:{scope_value}:"
+        f"{company_id or '-'}:{user_id or '-'}:"
+        f"r{int(rules_version)}:c{int(context_terms_version)}:{content_hash(text)}"
+    )
+
+
+def is_cacheable(result: dict[str, Any]) -> bool:
+    """
+    Only fully local verdicts are reused: once RAG or the semantic verifier
+    (both LLM calls) took part, the same text may legitimately come out
+    differently next time.
+    """
+    if result.get("ambiguous"):
+        return False
+    signals = result.get("signals") or {}
+    # RuleEngine fills in {"decision": "SKIPPED"} when RAG did not run.
+    rag = signals.get("rag")
+    if rag is not None and not (
+        isinstance(rag, dict) and rag.get("decision") in (None, "SKIPPED")
+    ):
+        return False
+    semantic_verify = signals.get("semantic_verify") or {}
+    return semantic_verify.get("called") is not True
+
+
+def dump_result(result: dict[str, Any]) -> str:
+    final_action = result.get("final_action")
+    return json.dumps(
+        {
+            "entities": [entity_to_dict(e) for e in result.get("entities") or []],
+            "signals": result.get("signals") or {},
+            "matches": [rulematch_to_dict(m) for m in result.get("matches") or []],
+            "final_action": getattr(final_action, "value", final_action),
+            "risk_score": float(result.get("risk_score") or 0.0),
+        },
+        ensure_ascii=False,
+    )
+
+
+def load_result(payload: str) -> dict[str, Any]:
+    obj = json.loads(payload)
+    return {
+        "entities": [
+            Entity(
+                type=str(e.get("type") or ""),
+                start=int(e.get("start") or 0),
+                end=int(e.get("end") or 0),
+                score=float(e.get("score") or 0.0),
+                source=str(e.get("source") or ""),
+                text=str(e.get("text") or ""),
+                metadata=dict(e.get("metadata") or {}),
+            )
+            for e in obj.get("entities") or []
+        ],
+        "signals": dict(obj.get("signals") or {}),
+        "matches": [
+            RuleMatch(
+                rule_id=UUID(str(m["rule_id"])),
+                stable_key=str(m.get("stable_key") or ""),
+                name=str(m.get("name") or ""),
+                action=RuleAction(m["action"]),
+                priority=int(m.get("priority") or 0),
+            )
+            for m in obj.get("matches") or []
+        ],
+        "final_action": RuleAction(obj["final_action"]),
+        "risk_score": float(obj.get("risk_score") or 0.0),
+        "ambiguous": False,
+    }
+
+
+class ScanResultCache:
+    """
+    Two-tier cache of full scan verdicts.
+
+    Entries are stored serialized, so every hit hands out fresh objects that
+    callers may mutate freely. The Redis tier is only consulted while this
+    worker follows the shared rule/context-term versions (see
+    app.common.cache_bus); otherwise the versions in the key are not
+    comparable across workers. Verdicts with detected entities stay in the
+    in-process tier: their text and normalized values are the user's PII and
+    secrets, which must not be copied to the shared Redis.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        max_entries: int,
+        ttl_seconds: float,
+    ):
+        self.enabled = bool(enabled) and int(max_entries) > 0
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def _local_ttl_seconds(self) -> float:
+        return min(
+            self.ttl_seconds,
+            local_cache_ttl_seconds(fallback_seconds=_FALLBACK_TTL_SECONDS),
+        )
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def _set_local(self, key: str, payload: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._local_ttl_seconds(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        if not self.enabled:
+            return None
+
+        payload = self._get_local(key)
+        if payload is None and listener_active():
+            r = _get_redis()
+            if r is not None:
+                try:
+                    payload = await r.get(key)
+                except Exception as exc:
+                    logger.warning("scan cache redis get failed: %s", exc)
+                    payload = None
+                if payload:
+                    self._set_local(key, payload)
+        if not payload:
+            return None
+
+        try:
+            return load_result(payload)
+        except Exception:
+            logger.warning("drop unreadable scan cache entry: key=%s", key)
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+    async def set(self, key: str, result: dict[str, Any]) -> None:
+        if not self.enabled or not is_cacheable(result):
+            return
+
+        try:
+            payload = dump_result(result)
+        except Exception as exc:
+            logger.warning("skip unserializable scan result: %s", exc)
+            return
+
+        self._set_local(key, payload)
+        if not listener_active() or result.get("entities"):
+            return
+        r = _get_redis()
+        if r is None:
+            return
+        try:
+            await r.set(key, payload, ex=max(1, int(self.ttl_seconds)))
+        except Exception as exc:
+            logger.warning("scan cache redis set failed: %s", exc)
+
+
+def build_scan_result_cache() -> ScanResultCache:
+    settings = get_settings()
+    return ScanResultCache(
+        enabled=settings.scan_cache_enabled,
+        max_entries=settings.scan_cache_max_entries,
+        ttl_seconds=settings.scan_cache_ttl_seconds,
+    )
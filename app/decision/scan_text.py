@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import Any, Optional
+
+from app.decision.detectors.folded_text import fold_text, fold_text_with_mapping
+
+
+class ScanText:
+    """
+    One scanned text plus its derived views.
+
+    Built once per scan and handed to every detector and the context scorer, so
+    the lowercase/folded/offset-mapped forms are each computed at most once
+    (lazily: a view nobody asks for is never built).
+    """
+
+    __slots__ = ("raw", "_lower", "_folded", "_mapped", "_window_fold", "_memo")
+
+    def __init__(self, text: str):
+        self.raw = str(text or "")
+        self._lower: Optional[str] = None
+        self._folded: Optional[str] = None
+        self._mapped: Optional[tuple[str, list[int]]] = None
+        self._window_fold: Optional[tuple[str, list[int]]] = None
+        self._memo: dict[Any, Any] = {}
+
+    @classmethod
+    def of(cls, text: "str | ScanText") -> "ScanText":
+        return text if isinstance(text, ScanText) else cls(text)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.raw.lower()
+        return self._lower
+
+    @property
+    def folded(self) -> str:
+        """Lowercase, accent-free, whitespace-collapsed (see `fold_text`)."""
+        if self._folded is None:
+            self._folded = fold_text(self.raw)
+        return self._folded
+
+    @property
+    def folded_with_mapping(self) -> tuple[str, list[int]]:
+        """`fold_text_with_mapping` view used for span detection."""
+        if self._mapped is None:
+            self._mapped = fold_text_with_mapping(self.raw)
+        return self._mapped
+
+    @property
+    def folded_chars(self) -> tuple[str, list[int]]:
+        """Char-by-char fold without placeholders, mapped to raw offsets."""
+        if self._window_fold is None:
+            self._window_fold = fold_text_with_mapping(
+                self.raw, keep_placeholders=False
+            )
+        return self._window_fold
+
+    def folded_window(self, start: int, end: int) -> str:
+        """
+        Folded form of `raw[start:end]`, sliced from a single fold of the whole
+        text instead of re-folding the slice. Whitespace is not collapsed.
+        """
+        folded, mapping = self.folded_chars
+        lo = bisect_left(mapping, max(0, int(start)))
+        hi = bisect_left(mapping, int(end))
+        return folded[lo:hi]
+
+    def memo(self, key: Any, build: Callable[[], Any]) -> Any:
+        """Per-scan cache for indexes derived from this text by detectors."""
+        if key not in self._memo:
+            self._memo[key] = build()
+        return self._memo[key]
@@ -9,10 +9,16 @@ from typing import Any
 
 import httpx
 
+from app.common.http_clients import (
+    GEMINI,
+    GROQ,
+    OLLAMA,
+    get_async_client,
+    get_sync_client,
+)
 from app.core.config import get_settings
 
 
-GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
 logger = logging.getLogger(__name__)
 
 
@@ -180,21 +186,19 @@ def _call_ollama_sync(
         final_prompt += (system_prompt or "").strip() + "\n\n"
     final_prompt += prompt.strip()
 
-    with httpx.Client(
-        base_url=settings.ollama_base_url.rstrip("/"),
+    client = get_sync_client(OLLAMA)
+    r = client.post(
+        "/api/generate",
         timeout=timeout_s,
-    ) as client:
-        r = client.post(
-            "/api/generate",
-            json={
-                "model": model,
-                "prompt": final_prompt,
-                "stream": False,
-                "options": {"temperature": 0},
-            },
-        )
-        r.raise_for_status()
-        data: dict[str, Any] = r.json()
+        json={
+            "model": model,
+            "prompt": final_prompt,
+            "stream": False,
+            "options": {"temperature": 0},
+        },
+    )
+    r.raise_for_status()
+    data: dict[str, Any] = r.json()
     text = str(data.get("response") or "").strip()
     if not text:
         raise RuntimeError("Ollama empty response")
@@ -221,51 +225,52 @@ def _call_groq_sync(
     messages.append({"role": "user", "content": prompt.strip()})
 
     max_attempts = 1 if fast_fallback else 2
-    with httpx.Client(base_url=settings.groq_base_url.rstrip("/"), timeout=timeout_s) as client:
-        for attempt in range(1, max_attempts + 1):
-            try:
-                r = client.post(
-                    "/chat/completions",
-                    headers={"Authorization": f"Bearer {key}"},
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "temperature": 0,
-                        "stream": False,
-                    },
+    client = get_sync_client(GROQ)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            r = client.post(
+                "/chat/completions",
+                timeout=timeout_s,
+                headers={"Authorization": f"Bearer {key}"},
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": 0,
+                    "stream": False,
+                },
+            )
+            if r.status_code in {429, 503} and attempt < max_attempts:
+                retry_hint = _parse_retry_after_header(r.headers.get("retry-after"))
+                if retry_hint is None:
+                    try:
+                        retry_hint = _extract_retry_delay_seconds(r.json())
+                    except Exception:
+                        retry_hint = None
+                delay_s = _bounded_retry_delay_s(retry_hint, default_s=2.0)
+                logger.warning(
+                    "llm.groq.sync.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
+                    model,
+                    r.status_code,
+                    attempt,
+                    delay_s,
+                )
+                time.sleep(delay_s)
+                continue
+            r.raise_for_status()
+            data: dict[str, Any] = r.json()
+            break
+        except httpx.ReadTimeout:
+            if attempt < max_attempts:
+                logger.warning(
+                    "llm.groq.sync.read_timeout model=%s attempt=%s retry_after_s=1.00",
+                    model,
+                    attempt,
                 )
-                if r.status_code in {429, 503} and attempt < max_attempts:
-                    retry_hint = _parse_retry_after_header(r.headers.get("retry-after"))
-                    if retry_hint is None:
-                        try:
-                            retry_hint = _extract_retry_delay_seconds(r.json())
-                        except Exception:
-                            retry_hint = None
-                    delay_s = _bounded_retry_delay_s(retry_hint, default_s=2.0)
-                    logger.warning(
-                        "llm.groq.sync.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
-                        model,
-                        r.status_code,
-                        attempt,
-                        delay_s,
-                    )
-                    time.sleep(delay_s)
-                    continue
-                r.raise_for_status()
-                data: dict[str, Any] = r.json()
-                break
-            except httpx.ReadTimeout:
-                if attempt < max_attempts:
-                    logger.warning(
-                        "llm.groq.sync.read_timeout model=%s attempt=%s retry_after_s=1.00",
-                        model,
-                        attempt,
-                    )
-                    time.sleep(1.0)
-                    continue
-                raise
-        else:
-            raise RuntimeError("Groq request failed after retries")
+                time.sleep(1.0)
+                continue
+            raise
+    else:
+        raise RuntimeError("Groq request failed after retries")
 
     return _extract_groq_text(data), model
 
@@ -290,48 +295,49 @@ def _call_gemini_sync(
     contents.append({"role": "user", "parts": [{"text": prompt.strip()}]})
 
     max_attempts = 1 if fast_fallback else 2
-    with httpx.Client(timeout=timeout_s) as client:
-        for attempt in range(1, max_attempts + 1):
-            try:
-                r = client.post(
-                    f"{GEMINI_BASE_URL}/models/{model}:generateContent",
-                    params={"key": key},
-                    json={
-                        "contents": contents,
-                        "generationConfig": {"temperature": 0},
-                    },
-                )
-                if r.status_code in {429, 503} and attempt < max_attempts:
+    client = get_sync_client(GEMINI)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            r = client.post(
+                f"/models/{model}:generateContent",
+                timeout=timeout_s,
+                params={"key": key},
+                json={
+                    "contents": contents,
+                    "generationConfig": {"temperature": 0},
+                },
+            )
+            if r.status_code in {429, 503} and attempt < max_attempts:
+                retry_hint = None
+                try:
+                    retry_hint = _extract_retry_delay_seconds(r.json())
+                except Exception:
                     retry_hint = None
-                    try:
-                        retry_hint = _extract_retry_delay_seconds(r.json())
-                    except Exception:
-                        retry_hint = None
-                    delay_s = _bounded_retry_delay_s(retry_hint, default_s=3.0)
-                    logger.warning(
-                        "llm.gemini.sync.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
-                        model,
-                        r.status_code,
-                        attempt,
-                        delay_s,
-                    )
-                    time.sleep(delay_s)
-                    continue
-                r.raise_for_status()
-                data: dict[str, Any] = r.json()
-                break
-            except httpx.ReadTimeout:
-                if attempt < max_attempts:
-                    logger.warning(
-                        "llm.gemini.sync.read_timeout model=%s attempt=%s retry_after_s=1.00",
-                        model,
-                        attempt,
-                    )
-                    time.sleep(1.0)
-                    continue
-                raise
-        else:
-            raise RuntimeError("Gemini request failed after retries")
+                delay_s = _bounded_retry_delay_s(retry_hint, default_s=3.0)
+                logger.warning(
+                    "llm.gemini.sync.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
+                    model,
+                    r.status_code,
+                    attempt,
+                    delay_s,
+                )
+                time.sleep(delay_s)
+                continue
+            r.raise_for_status()
+            data: dict[str, Any] = r.json()
+            break
+        except httpx.ReadTimeout:
+            if attempt < max_attempts:
+                logger.warning(
+                    "llm.gemini.sync.read_timeout model=%s attempt=%s retry_after_s=1.00",
+                    model,
+                    attempt,
+                )
+                time.sleep(1.0)
+                continue
+            raise
+    else:
+        raise RuntimeError("Gemini request failed after retries")
     return _extract_gemini_text(data), model
 
 
@@ -349,21 +355,19 @@ async def _call_ollama_async(
         final_prompt += (system_prompt or "").strip() + "\n\n"
     final_prompt += prompt.strip()
 
-    async with httpx.AsyncClient(
-        base_url=settings.ollama_base_url.rstrip("/"),
+    client = get_async_client(OLLAMA)
+    r = await client.post(
+        "/api/generate",
         timeout=timeout_s,
-    ) as client:
-        r = await client.post(
-            "/api/generate",
-            json={
-                "model": model,
-                "prompt": final_prompt,
-                "stream": False,
-                "options": {"temperature": 0},
-            },
-        )
-        r.raise_for_status()
-        data: dict[str, Any] = r.json()
+        json={
+            "model": model,
+            "prompt": final_prompt,
+            "stream": False,
+            "options": {"temperature": 0},
+        },
+    )
+    r.raise_for_status()
+    data: dict[str, Any] = r.json()
     text = str(data.get("response") or "").strip()
     if not text:
         raise RuntimeError("Ollama empty response")
@@ -390,54 +394,52 @@ async def _call_groq_async(
     messages.append({"role": "user", "content": prompt.strip()})
 
     max_attempts = 1 if fast_fallback else 2
-    async with httpx.AsyncClient(
-        base_url=settings.groq_base_url.rstrip("/"),
-        timeout=timeout_s,
-    ) as client:
-        for attempt in range(1, max_attempts + 1):
-            try:
-                r = await client.post(
-                    "/chat/completions",
-                    headers={"Authorization": f"Bearer {key}"},
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "temperature": 0,
-                        "stream": False,
-                    },
+    client = get_async_client(GROQ)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            r = await client.post(
+                "/chat/completions",
+                timeout=timeout_s,
+                headers={"Authorization": f"Bearer {key}"},
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": 0,
+                    "stream": False,
+                },
+            )
+            if r.status_code in {429, 503} and attempt < max_attempts:
+                retry_hint = _parse_retry_after_header(r.headers.get("retry-after"))
+                if retry_hint is None:
+                    try:
+                        retry_hint = _extract_retry_delay_seconds(r.json())
+                    except Exception:
+                        retry_hint = None
+                delay_s = _bounded_retry_delay_s(retry_hint, default_s=2.0)
+                logger.warning(
+                    "llm.groq.async.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
+                    model,
+                    r.status_code,
+                    attempt,
+                    delay_s,
+                )
+                await asyncio.sleep(delay_s)
+                continue
+            r.raise_for_status()
+            data: dict[str, Any] = r.json()
+            break
+        except httpx.ReadTimeout:
+            if attempt < max_attempts:
+                logger.warning(
+                    "llm.groq.async.read_timeout model=%s attempt=%s retry_after_s=1.00",
+                    model,
+                    attempt,
                 )
-                if r.status_code in {429, 503} and attempt < max_attempts:
-                    retry_hint = _parse_retry_after_header(r.headers.get("retry-after"))
-                    if retry_hint is None:
-                        try:
-                            retry_hint = _extract_retry_delay_seconds(r.json())
-                        except Exception:
-                            retry_hint = None
-                    delay_s = _bounded_retry_delay_s(retry_hint, default_s=2.0)
-                    logger.warning(
-                        "llm.groq.async.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
-                        model,
-                        r.status_code,
-                        attempt,
-                        delay_s,
-                    )
-                    await asyncio.sleep(delay_s)
-                    continue
-                r.raise_for_status()
-                data: dict[str, Any] = r.json()
-                break
-            except httpx.ReadTimeout:
-                if attempt < max_attempts:
-                    logger.warning(
-                        "llm.groq.async.read_timeout model=%s attempt=%s retry_after_s=1.00",
-                        model,
-                        attempt,
-                    )
-                    await asyncio.sleep(1.0)
-                    continue
-                raise
-        else:
-            raise RuntimeError("Groq async request failed after retries")
+                await asyncio.sleep(1.0)
+                continue
+            raise
+    else:
+        raise RuntimeError("Groq async request failed after retries")
 
     return _extract_groq_text(data), model
 
@@ -462,48 +464,49 @@ async def _call_gemini_async(
     contents.append({"role": "user", "parts": [{"text": prompt.strip()}]})
 
     max_attempts = 1 if fast_fallback else 2
-    async with httpx.AsyncClient(timeout=timeout_s) as client:
-        for attempt in range(1, max_attempts + 1):
-            try:
-                r = await client.post(
-                    f"{GEMINI_BASE_URL}/models/{model}:generateContent",
-                    params={"key": key},
-                    json={
-                        "contents": contents,
-                        "generationConfig": {"temperature": 0},
-                    },
-                )
-                if r.status_code in {429, 503} and attempt < max_attempts:
+    client = get_async_client(GEMINI)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            r = await client.post(
+                f"/models/{model}:generateContent",
+                timeout=timeout_s,
+                params={"key": key},
+                json={
+                    "contents": contents,
+                    "generationConfig": {"temperature": 0},
+                },
+            )
+            if r.status_code in {429, 503} and attempt < max_attempts:
+                retry_hint = None
+                try:
+                    retry_hint = _extract_retry_delay_seconds(r.json())
+                except Exception:
                     retry_hint = None
-                    try:
-                        retry_hint = _extract_retry_delay_seconds(r.json())
-                    except Exception:
-                        retry_hint = None
-                    delay_s = _bounded_retry_delay_s(retry_hint, default_s=3.0)
-                    logger.warning(
-                        "llm.gemini.async.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
-                        model,
-                        r.status_code,
-                        attempt,
-                        delay_s,
-                    )
-                    await asyncio.sleep(delay_s)
-                    continue
-                r.raise_for_status()
-                data: dict[str, Any] = r.json()
-                break
-            except httpx.ReadTimeout:
-                if attempt < max_attempts:
-                    logger.warning(
-                        "llm.gemini.async.read_timeout model=%s attempt=%s retry_after_s=1.00",
-                        model,
-                        attempt,
-                    )
-                    await asyncio.sleep(1.0)
-                    continue
-                raise
-        else:
-            raise RuntimeError("Gemini async request failed after retries")
+                delay_s = _bounded_retry_delay_s(retry_hint, default_s=3.0)
+                logger.warning(
+                    "llm.gemini.async.retryable_status model=%s status=%s attempt=%s retry_after_s=%.2f",
+                    model,
+                    r.status_code,
+                    attempt,
+                    delay_s,
+                )
+                await asyncio.sleep(delay_s)
+                continue
+            r.raise_for_status()
+            data: dict[str, Any] = r.json()
+            break
+        except httpx.ReadTimeout:
+            if attempt < max_attempts:
+                logger.warning(
+                    "llm.gemini.async.read_timeout model=%s attempt=%s retry_after_s=1.00",
+                    model,
+                    attempt,
+                )
+                await asyncio.sleep(1.0)
+                continue
+            raise
+    else:
+        raise RuntimeError("Gemini async request failed after retries")
     return _extract_gemini_text(data), model
 
 
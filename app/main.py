@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,12 +9,16 @@ from app.api.auth import router as auth_router
 from app.api.admin_monitoring import router as admin_monitoring_router
 from app.api.conversation import router as conversation_router
 from app.api.debug import router as debug_router
+from app.api.message_rescan import router as message_rescan_router
 from app.api.personal_rules import router as personal_rules_router
 from app.api.policy_admin import router as policy_admin_router
 from app.api.rule_settings import router as rule_settings_router
 from app.api.rule_suggestions import router as rule_suggestions_router
 from app.api.rule_sets import router as rule_sets_router
+from app.common.cache_bus import start_invalidation_listener, stop_invalidation_listener
 from app.common.errors import AppError
+from app.common.http_clients import close_http_clients, start_http_clients
+from app.common.log_writer import shutdown_log_writer
 from app.common.handlers import (
     app_error_handler,
     http_exception_handler,
@@ -21,6 +27,11 @@ from app.common.handlers import (
 )
 from app.common.request_id import RequestIdMiddleware
 from app.core.config import get_settings
+from app.decision.detectors.presidio_pool import (
+    shutdown_presidio_pool,
+    start_presidio_pool,
+)
+from app.decision.scan_executor import shutdown_scan_executor
 
 
 def _parse_csv_list(raw: str | None) -> list[str]:
@@ -38,8 +49,23 @@ def _parse_wildcard_or_list(raw: str | None) -> list[str]:
     return values
 
 
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    start_invalidation_listener()
+    start_presidio_pool()
+    start_http_clients()
+    try:
+        yield
+    finally:
+        await close_http_clients()
+        stop_invalidation_listener()
+        shutdown_scan_executor()
+        shutdown_log_writer()
+        shutdown_presidio_pool()
+
+
 settings = get_settings()
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = _parse_wildcard_or_list(settings.cors_allowed_origins)
 allow_methods = _parse_wildcard_or_list(settings.cors_allow_methods)
@@ -70,6 +96,7 @@ app.include_router(rule_settings_router)
 app.include_router(conversation_router)
 app.include_router(debug_router)
 app.include_router(policy_admin_router)
+app.include_router(message_rescan_router)
 app.include_router(rule_suggestions_router)
 
 
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 import re
 
 from app.decision.entity_priority import entity_type_priority, source_priority
@@ -17,6 +18,7 @@ MASKABLE_TYPES = {
 }
 _CODE_LIKE_TERM_RE = re.compile(r"[A-Za-z0-9]{2,}(?:[-_][A-Za-z0-9]{1,}){1,}")
 _MASK_PLACEHOLDER_RE = re.compile(r"\[[A-Z0-9_]+\]")
+_TERM_LABEL = "[INTERNAL_CODE]"
 
 
 @dataclass(slots=True)
@@ -28,55 +30,75 @@ class Span:
     source: str
 
 
+def _ordered_terms(terms: list[str]) -> tuple[str, ...]:
+    """Distinct non-empty terms, longest first (ties broken for a stable key)."""
+    return tuple(
+        sorted(
+            {str(term or "").strip() for term in terms if str(term or "").strip()},
+            key=lambda term: (-len(term), term),
+        )
+    )
+
+
+@lru_cache(maxsize=256)
+def _term_pattern(ordered_terms: tuple[str, ...]) -> re.Pattern[str] | None:
+    """
+    One alternation for a whole term set. Group 1 matches an existing
+    placeholder, which is kept; any other match is a term. Longest-first order
+    makes the leftmost match prefer the longest term, like the old per-term
+    passes did.
+    """
+    if not ordered_terms:
+        return None
+    alternation = "|".join(re.escape(term) for term in ordered_terms)
+    return re.compile(f"({_MASK_PLACEHOLDER_RE.pattern})|(?i:{alternation})")
+
+
 class MaskService:
-    def _replace_exact_terms_in_plain_segment(
+    def _emit_plain(
         self,
-        *,
+        parts: list[str],
         text: str,
-        ordered_terms: list[str],
-    ) -> str:
-        out = text
-        for term in ordered_terms:
-            pattern = re.compile(re.escape(term), flags=re.IGNORECASE)
-            out = pattern.sub("[INTERNAL_CODE]", out)
-        return out
-
-    def _mask_exact_terms(self, text: str, exact_terms: list[str]) -> str:
-        ordered = sorted(
-            {
-                str(term or "").strip()
-                for term in exact_terms
-                if str(term or "").strip()
-            },
-            key=len,
-            reverse=True,
-        )
-        if not ordered:
-            return text
+        start: int,
+        end: int,
+        pattern: re.Pattern[str] | None,
+    ) -> None:
+        if pattern is None:
+            parts.append(text[start:end])
+            return
+        cursor = start
+        for match in pattern.finditer(text, start, end):
+            parts.append(text[cursor : match.start()])
+            parts.append(match.group(1) or _TERM_LABEL)
+            cursor = match.end()
+        parts.append(text[cursor:end])
 
-        parts: list[str] = []
-        cursor = 0
-        for match in _MASK_PLACEHOLDER_RE.finditer(text):
-            start, end = match.span()
-            if start > cursor:
-                parts.append(
-                    self._replace_exact_terms_in_plain_segment(
-                        text=text[cursor:start],
-                        ordered_terms=ordered,
-                    )
-                )
-            parts.append(match.group(0))
-            cursor = end
-
-        if cursor < len(text):
-            parts.append(
-                self._replace_exact_terms_in_plain_segment(
-                    text=text[cursor:],
-                    ordered_terms=ordered,
-                )
-            )
+    def _effective_terms(
+        self,
+        *,
+        extra_terms: list[str] | None,
+        force_terms: list[str] | None,
+    ) -> tuple[list[str], list[str]]:
+        raw_force_terms = [
+            str(term or "").strip()
+            for term in list(force_terms or [])
+            if str(term or "").strip()
+        ]
+        code_like_terms = [
+            term
+            for term in list(extra_terms or [])
+            if _CODE_LIKE_TERM_RE.search(str(term or "").strip()) is not None
+        ]
+        return code_like_terms, raw_force_terms
 
-        return "".join(parts)
+    def stream(
+        self,
+        *,
+        extra_terms: list[str] | None = None,
+        force_terms: list[str] | None = None,
+    ) -> "MaskStream":
+        """Chunked `mask` with the same term lists for the whole stream."""
+        return MaskStream(self, extra_terms=extra_terms, force_terms=force_terms)
 
     def mask(
         self,
@@ -86,20 +108,19 @@ class MaskService:
         extra_terms: list[str] | None = None,
         force_terms: list[str] | None = None,
     ) -> str:
+        """
+        Replace maskable entity spans with `[TYPE]` and exact/forced terms with
+        `[INTERNAL_CODE]` in a single left-to-right sweep. Terms are only
+        matched in the plain text between spans, never inside a placeholder.
+        """
         if not text:
             return text
 
-        raw_extra_terms = list(extra_terms or [])
-        raw_force_terms = [
-            str(term or "").strip()
-            for term in list(force_terms or [])
-            if str(term or "").strip()
-        ]
-        code_like_terms = [
-            term
-            for term in raw_extra_terms
-            if _CODE_LIKE_TERM_RE.search(str(term or "").strip()) is not None
-        ]
+        code_like_terms, raw_force_terms = self._effective_terms(
+            extra_terms=extra_terms,
+            force_terms=force_terms,
+        )
+        pattern = _term_pattern(_ordered_terms(code_like_terms + raw_force_terms))
 
         spans: list[Span] = []
         n = len(text)
@@ -126,15 +147,8 @@ class MaskService:
                 )
             )
 
-        if not spans:
-            if not code_like_terms and not raw_force_terms:
-                return text
-            out = text
-            if code_like_terms:
-                out = self._mask_exact_terms(out, code_like_terms)
-            if raw_force_terms:
-                out = self._mask_exact_terms(out, raw_force_terms)
-            return out
+        if not spans and pattern is None:
+            return text
 
         spans.sort(key=lambda span: (span.start, -(span.end - span.start), -span.score))
 
@@ -152,16 +166,14 @@ class MaskService:
             if self._span_precedence_key(span) > self._span_precedence_key(last):
                 chosen[-1] = span
 
-        out = text
-        for span in sorted(chosen, key=lambda item: item.start, reverse=True):
-            label = f"[{span.type}]"
-            out = out[: span.start] + label + out[span.end :]
-
-        if code_like_terms:
-            out = self._mask_exact_terms(out, code_like_terms)
-        if raw_force_terms:
-            out = self._mask_exact_terms(out, raw_force_terms)
-        return out
+        parts: list[str] = []
+        cursor = 0
+        for span in chosen:
+            self._emit_plain(parts, text, cursor, span.start, pattern)
+            parts.append(f"[{span.type}]")
+            cursor = span.end
+        self._emit_plain(parts, text, cursor, n, pattern)
+        return "".join(parts)
 
     def _span_precedence_key(self, span: Span) -> tuple[int, int, float, int]:
         return (
@@ -170,3 +182,120 @@ class MaskService:
             float(span.score),
             source_priority(span.source),
         )
+
+
+class MaskStream:
+    """
+    Incremental `MaskService.mask`.
+
+    `feed(chunk, entities=..., final_upto=...)` takes the next text chunk plus
+    the entities finalized so far (absolute offsets, e.g. from
+    `StreamingDetector`) and the offset up to which detection is final. It
+    returns the masked text that can be released: it stops before `final_upto`,
+    before any entity or exact term still crossing that point, and keeps the
+    last `len(longest term) - 1` chars so a term split across chunks is still
+    masked. `close(entities=...)` masks and returns the rest.
+
+    Only unreleased text and pending entities are kept in memory.
+    """
+
+    def __init__(
+        self,
+        service: MaskService,
+        *,
+        extra_terms: list[str] | None = None,
+        force_terms: list[str] | None = None,
+    ):
+        self._service = service
+        self._extra_terms = list(extra_terms or [])
+        self._force_terms = list(force_terms or [])
+        code_like_terms, raw_force_terms = service._effective_terms(
+            extra_terms=extra_terms,
+            force_terms=force_terms,
+        )
+        terms = _ordered_terms(code_like_terms + raw_force_terms)
+        self._term_holdback = max(0, len(terms[0]) - 1) if terms else 0
+        self._term_re = _term_pattern(terms)
+        self._buffer = ""
+        self._offset = 0
+        self._entities: list = []
+
+    @property
+    def released(self) -> int:
+        """Absolute offset of the first char not yet released."""
+        return self._offset
+
+    def feed(
+        self,
+        chunk: str,
+        *,
+        entities: list | None = None,
+        final_upto: int | None = None,
+    ) -> str:
+        self._buffer += chunk or ""
+        self._entities.extend(entities or [])
+        end = self._offset + len(self._buffer)
+        upto = end if final_upto is None else min(int(final_upto), end)
+        return self._release(upto - self._term_holdback)
+
+    def close(self, *, entities: list | None = None) -> str:
+        self._entities.extend(entities or [])
+        return self._release(self._offset + len(self._buffer))
+
+    def _safe_point(self, point: int) -> int:
+        base = self._offset
+        moved = True
+        while moved and point > base:
+            moved = False
+            for entity in self._entities:
+                start = int(getattr(entity, "start", 0))
+                if start < point < int(getattr(entity, "end", 0)):
+                    point = start
+                    moved = True
+            if self._term_re is None:
+                continue
+            lo = max(0, point - base - self._term_holdback)
+            hi = point - base + self._term_holdback
+            for match in self._term_re.finditer(self._buffer, lo, hi):
+                if match.start() + base < point < match.end() + base:
+                    point = match.start() + base
+                    moved = True
+                    break
+        return point
+
+    def _release(self, point: int) -> str:
+        base = self._offset
+        point = self._safe_point(point)
+        if point <= base:
+            return ""
+
+        segment = self._buffer[: point - base]
+        in_segment = []
+        pending = []
+        for entity in self._entities:
+            start = int(getattr(entity, "start", 0))
+            end = int(getattr(entity, "end", 0))
+            if end <= base:
+                continue
+            if start < point:
+                in_segment.append(
+                    Span(
+                        start=max(start, base) - base,
+                        end=min(end, point) - base,
+                        type=str(getattr(entity, "type", "")),
+                        score=float(getattr(entity, "score", 0.0) or 0.0),
+                        source=str(getattr(entity, "source", "")),
+                    )
+                )
+            else:
+                pending.append(entity)
+
+        self._buffer = self._buffer[point - base :]
+        self._offset = point
+        self._entities = pending
+        return self._service.mask(
+            segment,
+            in_segment,
+            extra_terms=self._extra_terms,
+            force_terms=self._force_terms,
+        )
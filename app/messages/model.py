@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Optional
 from uuid import UUID, uuid4
 
@@ -26,6 +26,10 @@ class Message(SQLModel, table=True):
         Index("ix_messages_content_hash", "content_hash"),
         Index("ix_messages_final_action", "final_action"),
         Index("ix_messages_scan_status", "scan_status"),
+        Index("ix_messages_created_id", "created_at", "id"),
+        Index(
+            "ix_messages_final_action_created_id", "final_action", "created_at", "id"
+        ),
     )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -126,3 +130,43 @@ class Message(SQLModel, table=True):
     # relationships
     conversation: "Conversation" = Relationship(back_populates="messages")
     prompt_entities: list["PromptEntity"] = Relationship(back_populates="message")
+
+
+class MessageScanDiagnostics(SQLModel, table=True):
+    """
+    Cold scan diagnostics (signals, per-stage timing) kept out of `messages`.
+
+    Append-only and range-partitioned by month on created_at (see
+    app.retention); only the message detail view reads it. A re-scan appends
+    a new row, the latest one wins.
+    """
+
+    __tablename__ = "message_scan_diagnostics"
+    __table_args__ = (
+        Index(
+            "ix_message_scan_diagnostics_message_created", "message_id", "created_at"
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    message_id: UUID = Field(
+        sa_column=sa.Column(
+            sa.Uuid,
+            sa.ForeignKey("messages.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+
+    # Partition key, so part of the primary key.
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=sa.Column(
+            sa.DateTime(timezone=True),
+            primary_key=True,
+            server_default=sa.func.now(),
+        ),
+    )
+
+    diagnostics_json: dict[str, Any] = Field(
+        sa_column=sa.Column(JSONB, nullable=False)
+    )
@@ -6,16 +6,17 @@ from datetime import datetime, timezone
 from typing import Any
 from uuid import UUID
 
-import httpx
 from sqlmodel import Session, delete, select
 
 from app.auth import service as auth_service
 from app.common.enums import MemberRole, SystemRole
+from app.common.http_clients import OLLAMA, get_sync_client
 from app.common.error_codes import ErrorCode
 from app.common.errors import AppError
 from app.company.model import Company
 from app.permissions.core import forbid, not_found
 from app.permissions.loaders.conversation import load_company_member_active_or_403
+from app.rag.decision_cache import invalidate_policy_version
 from app.rag.models.policy_chunk import PolicyChunk
 from app.rag.models.policy_chunk_embedding import PolicyChunkEmbedding
 from app.rag.models.policy_document import PolicyDocument
@@ -30,7 +31,6 @@ from app.policy.schemas import (
     PolicyIngestJobOut,
     PolicyIngestStatus,
 )
-from app.core.config import get_settings
 
 
 EMBED_MODEL = "mxbai-embed-large"
@@ -288,6 +288,7 @@ def toggle_company_policy_document_enabled(
     row.enabled = bool(enabled)
     session.add(row)
     session.commit()
+    invalidate_policy_version(company_id)
     session.refresh(row)
     return _to_policy_doc_out(row=row)
 
@@ -310,6 +311,7 @@ def soft_delete_company_policy_document(
     row.deleted_at = _utcnow()
     session.add(row)
     session.commit()
+    invalidate_policy_version(company_id)
     session.refresh(row)
     return _to_policy_doc_out(row=row)
 
@@ -495,25 +497,24 @@ def _embed_texts(*, texts: list[str]) -> list[list[float]]:
     if not texts:
         return []
 
-    settings = get_settings()
-    base_url = settings.ollama_base_url.rstrip("/")
     out: list[list[float]] = []
-    with httpx.Client(base_url=base_url, timeout=30) as client:
-        for text in texts:
-            r = client.post(
-                "/api/embeddings",
-                json={"model": EMBED_MODEL, "prompt": text},
+    client = get_sync_client(OLLAMA)
+    for text in texts:
+        r = client.post(
+            "/api/embeddings",
+            timeout=30,
+            json={"model": EMBED_MODEL, "prompt": text},
+        )
+        r.raise_for_status()
+        data: dict[str, Any] = r.json()
+        emb = data.get("embedding")
+        if not emb:
+            raise RuntimeError(f"Empty embedding response: {data}")
+        if len(emb) != EMBED_DIM:
+            raise RuntimeError(
+                f"Embedding dim mismatch: got={len(emb)} expected={EMBED_DIM}"
             )
-            r.raise_for_status()
-            data: dict[str, Any] = r.json()
-            emb = data.get("embedding")
-            if not emb:
-                raise RuntimeError(f"Empty embedding response: {data}")
-            if len(emb) != EMBED_DIM:
-                raise RuntimeError(
-                    f"Embedding dim mismatch: got={len(emb)} expected={EMBED_DIM}"
-                )
-            out.append(emb)
+        out.append(emb)
     return out
 
 
@@ -672,6 +673,7 @@ def process_policy_ingest_job(*, session: Session, job_id: UUID) -> None:
         .order_by(PolicyIngestJobItem.created_at.asc())
     ).all()
     cfg = ChunkConfig()
+    changed = False
 
     for item_id in item_ids:
         item = session.get(PolicyIngestJobItem, item_id)
@@ -691,6 +693,7 @@ def process_policy_ingest_job(*, session: Session, job_id: UUID) -> None:
                 item=item,
                 cfg=cfg,
             )
+            changed = changed or outcome != "skipped"
             item = session.get(PolicyIngestJobItem, item_id)
             if not item:
                 continue
@@ -717,4 +720,7 @@ def process_policy_ingest_job(*, session: Session, job_id: UUID) -> None:
     if not job:
         return
     _finalize_job(session=session, job=job)
+    if changed:
+        # Cached RAG verdicts were grounded on the previous policy chunks.
+        invalidate_policy_version(job.company_id)
 
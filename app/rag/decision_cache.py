@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import logging
+import math
+from threading import Lock
+import time
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+import redis.asyncio as redis
+
+from app.common.cache_bus import (
+    POLICIES_KIND,
+    CacheInvalidation,
+    fetch_shared_version,
+    listener_active,
+    publish_invalidation,
+    register_invalidation_handler,
+)
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_VERSION = 2
+
+_redis: Optional[redis.Redis] = None
+
+
+def _get_redis() -> Optional[redis.Redis]:
+    global _redis
+
+    redis_url = (get_settings().redis_url or "").strip()
+    if not redis_url:
+        return None
+
+    if _redis is None:
+        _redis = redis.from_url(
+            redis_url,
+            decode_responses=True,
+            socket_timeout=1.0,
+            socket_connect_timeout=1.0,
+        )
+    return _redis
+
+
+def normalize_prompt(text: str) -> str:
+    return " ".join(str(text or "").casefold().split())
+
+
+def _unit(vector: Sequence[float]) -> Optional[tuple[float, ...]]:
+    values = tuple(float(x) for x in vector)
+    norm = math.sqrt(math.sumprod(values, values)) if values else 0.0
+    if norm <= 0.0:
+        return None
+    return tuple(x / norm for x in values)
+
+
+@dataclass(slots=True, frozen=True)
+class RagCacheScope:
+    """
+    Everything a RAG verdict depends on besides the prompt itself.
+
+    `rules_version` is the RuleSetSnapshot version of the tenant and
+    `policy_version` its policy-document version (see `policy_version`): any
+    rule edit or policy re-ingest moves one of them, so verdicts grounded on
+    the old rules or policy chunks are never reused.
+    """
+
+    company_id: Optional[UUID]
+    user_id: Optional[UUID]
+    runtime_scope: str
+    rules_version: int
+    policy_version: int = 0
+
+    @classmethod
+    def of(
+        cls,
+        *,
+        company_id: Optional[UUID],
+        user_id: Optional[UUID],
+        runtime_scope: Any,
+        rules_version: int,
+        policy_version: int = 0,
+    ) -> "RagCacheScope":
+        return cls(
+            company_id=company_id,
+            # Same scoping as RuleEngine: the user only matters for personal scans.
+            user_id=user_id if company_id is None else None,
+            runtime_scope=str(getattr(runtime_scope, "value", runtime_scope) or ""),
+            rules_version=int(rules_version),
+            policy_version=int(policy_version),
+        )
+
+    def token(self) -> str:
+        return (
+            f"{self.runtime_scope}:{self.company_id or '-'}:"
+            f"{self.user_id or '-'}:r{self.rules_version}:p{self.policy_version}"
+        )
+
+
+@dataclass(slots=True)
+class RagCacheStats:
+    exact_hits: int = 0
+    near_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+@dataclass(slots=True)
+class _Entry:
+    expires_at: float
+    scope_token: str
+    verdict: dict[str, Any]
+    embedding: Optional[tuple[float, ...]]
+
+
+class RagDecisionCache:
+    """
+    Process-wide cache of LLM-backed RAG verdicts.
+
+    Exact hits are keyed by the normalized prompt within a `RagCacheScope` and
+    are also shared through Redis while this worker follows the shared rule
+    versions. Near-duplicate hits compare unit query embeddings of the same
+    scope and reuse the closest verdict at or above `similarity_threshold`;
+    they are process-local only.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        max_entries: int,
+        ttl_seconds: float,
+        near_duplicate_enabled: bool,
+        similarity_threshold: float,
+    ):
+        self.enabled = bool(enabled) and int(max_entries) > 0
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.near_duplicate_enabled = bool(near_duplicate_enabled)
+        self.similarity_threshold = float(similarity_threshold)
+        self.stats = RagCacheStats()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = Lock()
+
+    def _key(self, scope: RagCacheScope, text: str) -> str:
+        digest = hashlib.sha256(normalize_prompt(text).encode("utf-8")).hexdigest()
+        return f"rag:decision:v{_FORMAT_VERSION}:{scope.token()}:{digest}"
+
+    def _store_local(
+        self,
+        key: str,
+        *,
+        scope: RagCacheScope,
+        verdict: dict[str, Any],
+        embedding: Optional[tuple[float, ...]],
+    ) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(
+                expires_at=time.monotonic() + self.ttl_seconds,
+                scope_token=scope.token(),
+                verdict=verdict,
+                embedding=embedding,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _get_local(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._entries.pop(key, None)
+                self.stats.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry.verdict)
+
+    def _get_nearest(
+        self, scope: RagCacheScope, embedding: tuple[float, ...]
+    ) -> Optional[dict[str, Any]]:
+        scope_token = scope.token()
+        now = time.monotonic()
+        best_key: Optional[str] = None
+        best_sim = self.similarity_threshold
+        with self._lock:
+            expired: list[str] = []
+            for key, entry in self._entries.items():
+                if entry.expires_at <= now:
+                    expired.append(key)
+                    continue
+                if entry.scope_token != scope_token or entry.embedding is None:
+                    continue
+                if len(entry.embedding) != len(embedding):
+                    continue
+                sim = math.sumprod(entry.embedding, embedding)
+                if sim >= best_sim:
+                    best_key, best_sim = key, sim
+            for key in expired:
+                self._entries.pop(key, None)
+            self.stats.expirations += len(expired)
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            return dict(self._entries[best_key].verdict)
+
+    async def get(
+        self,
+        *,
+        scope: RagCacheScope,
+        text: str,
+        embedding: Optional[Sequence[float]] = None,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Exact lookup first, then (with `embedding`) the nearest cached prompt
+        of the same scope. Returns the stored verdict fields or None.
+        """
+        if not self.enabled:
+            return None
+
+        key = self._key(scope, text)
+        verdict = self._get_local(key)
+        if verdict is not None:
+            self.stats.exact_hits += 1
+            return verdict
+
+        if listener_active():
+            r = _get_redis()
+            if r is not None:
+                try:
+                    payload = await r.get(key)
+                except Exception as exc:
+                    logger.warning("rag cache redis get failed: %s", exc)
+                    payload = None
+                if payload:
+                    try:
+                        verdict = dict(json.loads(payload))
+                    except Exception:
+                        verdict = None
+                if verdict is not None:
+                    unit = _unit(embedding) if embedding else None
+                    self._store_local(key, scope=scope, verdict=verdict, embedding=unit)
+                    self.stats.redis_hits += 1
+                    return dict(verdict)
+
+        if self.near_duplicate_enabled and embedding:
+            unit = _unit(embedding)
+            if unit is not None:
+                verdict = self._get_nearest(scope, unit)
+                if verdict is not None:
+                    self.stats.near_hits += 1
+                    return verdict
+
+        self.stats.misses += 1
+        return None
+
+    async def set(
+        self,
+        *,
+        scope: RagCacheScope,
+        text: str,
+        verdict: dict[str, Any],
+        embedding: Optional[Sequence[float]] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+
+        key = self._key(scope, text)
+        unit = _unit(embedding) if embedding else None
+        self._store_local(key, scope=scope, verdict=dict(verdict), embedding=unit)
+        self.stats.stores += 1
+
+        if not listener_active():
+            return
+        r = _get_redis()
+        if r is None:
+            return
+        try:
+            await r.set(
+                key,
+                json.dumps(verdict, ensure_ascii=False),
+                ex=max(1, int(self.ttl_seconds)),
+            )
+        except Exception as exc:
+            logger.warning("rag cache redis set failed: %s", exc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot_stats(self) -> dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        out: dict[str, Any] = asdict(self.stats)
+        lookups = out["exact_hits"] + out["near_hits"] + out["redis_hits"] + out["misses"]
+        hits = lookups - out["misses"]
+        out.update(
+            {
+                "size": size,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "near_duplicate_enabled": self.near_duplicate_enabled,
+                "similarity_threshold": self.similarity_threshold,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
+        )
+        return out
+
+
+_cache: Optional[RagDecisionCache] = None
+_cache_lock = Lock()
+
+
+def get_rag_decision_cache() -> RagDecisionCache:
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = RagDecisionCache(
+                enabled=settings.rag_cache_enabled,
+                max_entries=settings.rag_cache_max_entries,
+                ttl_seconds=settings.rag_cache_ttl_seconds,
+                near_duplicate_enabled=settings.rag_cache_near_duplicate_enabled,
+                similarity_threshold=settings.rag_cache_similarity_threshold,
+            )
+        return _cache
+
+
+# Policy-document versions, per tenant plus one for global policies. Values
+# come from the cache_bus counter and are stored as received; a tenant is
+# read from Redis once, then again only after the listener reconnects.
+_policy_lock = Lock()
+_policy_global_version = 0
+_policy_versions: dict[Optional[UUID], int] = {}
+_policy_synced: set[Optional[UUID]] = set()
+
+
+def policy_version(company_id: Optional[UUID]) -> int:
+    """
+    Current policy version of a tenant. May read Redis once per tenant, so
+    async callers should run it off the event loop.
+    """
+    with _policy_lock:
+        synced = company_id in _policy_synced
+
+    if not synced:
+        shared = fetch_shared_version(kind=POLICIES_KIND, company_id=company_id)
+        if shared is not None:
+            with _policy_lock:
+                current = _policy_versions.get(company_id, 0)
+                _policy_versions[company_id] = max(current, shared)
+                _policy_synced.add(company_id)
+
+    with _policy_lock:
+        return max(_policy_global_version, _policy_versions.get(company_id, 0))
+
+
+def _apply_policy_invalidation(
+    company_id: Optional[UUID], *, all_scopes: bool, shared_version: Optional[int]
+) -> None:
+    global _policy_global_version
+
+    if shared_version is None:
+        # Redis unreachable: no version to move, drop this worker's verdicts.
+        get_rag_decision_cache().clear()
+        return
+    with _policy_lock:
+        if all_scopes:
+            _policy_global_version = max(_policy_global_version, shared_version)
+        else:
+            current = _policy_versions.get(company_id, 0)
+            _policy_versions[company_id] = max(current, shared_version)
+
+
+def invalidate_policy_version(company_id: Optional[UUID]) -> None:
+    """
+    Call after a tenant's policy documents changed (ingest, toggle, delete);
+    None means global policies, which every tenant reads.
+    """
+    all_scopes = company_id is None
+    shared_version = publish_invalidation(
+        kind=POLICIES_KIND, company_id=company_id, all_scopes=all_scopes
+    )
+    _apply_policy_invalidation(
+        company_id, all_scopes=all_scopes, shared_version=shared_version
+    )
+
+
+def _on_policy_invalidation(event: CacheInvalidation) -> None:
+    if event.version is None:
+        # Listener (re)connected: bumps may have been missed, re-read Redis.
+        with _policy_lock:
+            _policy_synced.clear()
+        return
+    _apply_policy_invalidation(
+        event.company_id, all_scopes=event.all_scopes, shared_version=event.version
+    )
+
+
+register_invalidation_handler(POLICIES_KIND, _on_policy_invalidation)
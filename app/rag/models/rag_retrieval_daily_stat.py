@@ -0,0 +1,27 @@
+# app/rag/models/rag_retrieval_daily_stat.py
+
+from datetime import date
+
+import sqlalchemy as sa
+from sqlmodel import SQLModel, Field
+
+
+class RagRetrievalDailyStat(SQLModel, table=True):
+    """Daily rollup of rag_retrieval_logs, kept after raw partitions are dropped."""
+
+    __tablename__ = "rag_retrieval_daily_stats"
+
+    day: date = Field(sa_column=sa.Column(sa.Date, primary_key=True))
+
+    # retrieve | decide | semantic_verify
+    kind: str = Field(sa_column=sa.Column(sa.String(32), primary_key=True))
+
+    log_count: int = Field(
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0")
+    )
+    total_latency_ms: int = Field(
+        sa_column=sa.Column(sa.BigInteger, nullable=False, server_default="0")
+    )
+    max_latency_ms: int = Field(
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0")
+    )
@@ -1,6 +1,6 @@
 # app/rag/models/rag_retrieval_log.py
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 from uuid import UUID, uuid4
 
@@ -10,7 +10,16 @@ from sqlmodel import SQLModel, Field
 
 
 class RagRetrievalLog(SQLModel, table=True):
+    """
+    Range-partitioned by month on created_at; old partitions are rolled up
+    into rag_retrieval_daily_stats and dropped by app.retention.
+    """
+
     __tablename__ = "rag_retrieval_logs"
+    __table_args__ = (
+        sa.Index("ix_rag_retrieval_logs_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
 
@@ -27,10 +36,12 @@ class RagRetrievalLog(SQLModel, table=True):
 
     latency_ms: int
 
+    # Partition key, so part of the primary key.
     created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
         sa_column=sa.Column(
             sa.DateTime(timezone=True),
-            nullable=False,
+            primary_key=True,
             server_default=sa.func.now(),
-        )
+        ),
     )
\ No newline at end of file
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import time
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 from uuid import UUID
 
-import httpx
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.common.http_clients import OLLAMA, get_async_client
+from app.common.log_writer import defer_log_row
 from app.core.config import get_settings
+from app.db.async_bridge import run_db
 from app.rag.embedding_cache import (
     get_embedding_from_cache,
     make_key,
@@ -19,6 +22,15 @@ from app.rag.models.policy_document import PolicyDocument
 from app.rag.models.rag_retrieval_log import RagRetrievalLog
 
 
+def _fetch_rows(*, session: Session, stmt: Any) -> list[Any]:
+    return list(session.exec(stmt).all())
+
+
+def _save_log(*, session: Session, row: RagRetrievalLog) -> None:
+    session.add(row)
+    session.commit()
+
+
 class RetrievedChunk:
     def __init__(self, *, chunk_id: UUID, content: str, dist: float, sim: float):
         self.chunk_id = chunk_id
@@ -41,20 +53,21 @@ class PolicyRetriever:
         self.embedding_dim = int(embedding_dim)
         self.top_k = int(top_k)
 
-    async def _embed(self, text: str) -> list[float]:
+    async def embed(self, text: str) -> list[float]:
         key = make_key(model=self.embed_model, text=text)
 
         cached = await get_embedding_from_cache(key)
         if cached is not None:
             return cached
 
-        async with httpx.AsyncClient(base_url=self.base_url, timeout=10) as client:
-            r = await client.post(
-                "/api/embeddings",
-                json={"model": self.embed_model, "prompt": text},
-            )
-            r.raise_for_status()
-            data: dict[str, Any] = r.json()
+        client = get_async_client(OLLAMA)
+        r = await client.post(
+            "/api/embeddings",
+            timeout=10,
+            json={"model": self.embed_model, "prompt": text},
+        )
+        r.raise_for_status()
+        data: dict[str, Any] = r.json()
 
         emb = data.get("embedding")
         if not emb:
@@ -66,20 +79,59 @@ class PolicyRetriever:
         await set_embedding_cache(key, emb)
         return emb
 
+    async def embed_many(self, texts: Sequence[str]) -> dict[str, list[float]]:
+        """
+        Embeddings for many queries keyed by text: cached ones first, all the
+        others in a single Ollama /api/embed request.
+        """
+        out: dict[str, list[float]] = {}
+        missing: list[str] = []
+        for text in dict.fromkeys(texts):
+            cached = await get_embedding_from_cache(
+                make_key(model=self.embed_model, text=text)
+            )
+            if cached is not None:
+                out[text] = cached
+            else:
+                missing.append(text)
+        if not missing:
+            return out
+
+        client = get_async_client(OLLAMA)
+        r = await client.post(
+            "/api/embed",
+            timeout=30,
+            json={"model": self.embed_model, "input": missing},
+        )
+        r.raise_for_status()
+        embeddings = r.json().get("embeddings") or []
+        if len(embeddings) != len(missing):
+            raise RuntimeError(
+                f"Embedding count mismatch {len(embeddings)} vs {len(missing)}"
+            )
+
+        for text, emb in zip(missing, embeddings):
+            if len(emb) != self.embedding_dim:
+                raise RuntimeError(f"dim mismatch {len(emb)} vs {self.embedding_dim}")
+            await set_embedding_cache(make_key(model=self.embed_model, text=text), emb)
+            out[text] = emb
+        return out
+
     async def retrieve(
         self,
         *,
-        session: Session,
+        session: Session | AsyncSession,
         query: str,
         company_id: Optional[UUID],
         message_id: Optional[UUID],
         top_k: Optional[int] = None,
         log: bool = True,
+        query_embedding: Optional[list[float]] = None,
     ) -> list[RetrievedChunk]:
         k = int(top_k or self.top_k)
         t0 = time.perf_counter()
 
-        q_emb = await self._embed(query)
+        q_emb = query_embedding or await self.embed(query)
         dist_expr = PolicyChunkEmbedding.embedding.cosine_distance(q_emb)  # type: ignore
 
         stmt = (
@@ -109,7 +161,8 @@ class PolicyRetriever:
                 | (PolicyDocument.company_id == scope_id)
             )
 
-        rows = session.exec(stmt).all()
+        # `session` may be an AsyncSession (chat path): see run_db.
+        rows = await run_db(session, _fetch_rows, stmt=stmt)
 
         out: list[RetrievedChunk] = []
         results_json: list[dict[str, Any]] = []
@@ -137,15 +190,14 @@ class PolicyRetriever:
         latency_ms = int((time.perf_counter() - t0) * 1000)
 
         if log:
-            session.add(
-                RagRetrievalLog(
-                    message_id=message_id,
-                    query=query,
-                    top_k=k,
-                    results_json={"results": results_json},
-                    latency_ms=latency_ms,
-                )
+            row = RagRetrievalLog(
+                message_id=message_id,
+                query=query,
+                top_k=k,
+                results_json={"results": results_json},
+                latency_ms=latency_ms,
             )
-            session.commit()
+            if not defer_log_row(row):
+                await run_db(session, _save_log, row=row)
 
         return out
@@ -1,17 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import time
 from dataclasses import dataclass
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Sequence
 from typing import Any, Literal, Optional
 from uuid import UUID
 
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.common.enums import RuleScope
+from app.common.log_writer import defer_log_row
 from app.core.config import get_settings
+from app.db.async_bridge import run_db
+from app.decision.scan_executor import get_scan_executor
 from app.llm import LlmTextResult, generate_text_async
+from app.rag.decision_cache import (
+    RagCacheScope,
+    get_rag_decision_cache,
+    policy_version,
+)
 from app.rag.models.rag_retrieval_log import RagRetrievalLog
 from app.rag.policy_retriever import PolicyRetriever
 from app.rule_embedding.service import (
@@ -20,6 +30,29 @@ from app.rule_embedding.service import (
 )
 
 
+def _save_retrieval_log(
+    *, session: Session, row: RagRetrievalLog, commit: bool
+) -> None:
+    # Logging is best effort and must never fail the decision.
+    try:
+        session.add(row)
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+    except Exception:
+        session.rollback()
+
+
+async def _log_retrieval(
+    session: Session | AsyncSession, row: RagRetrievalLog, *, commit: bool
+) -> None:
+    # Queued for a batched background insert; inline only when disabled.
+    if defer_log_row(row):
+        return
+    await run_db(session, _save_retrieval_log, row=row, commit=commit)
+
+
 DecisionType = Literal["ALLOW", "MASK", "BLOCK"]
 SemanticVerifyDecisionType = Literal["PASS", "FAIL", "UNSURE"]
 
@@ -69,47 +102,106 @@ class RagVerifier:
             embedding_dim=embedding_dim,
             top_k=top_k,
         )
+        self.cache = get_rag_decision_cache()
+        self.executor = get_scan_executor()
 
     async def decide(
         self,
         *,
-        session: Session,
+        session: Session | AsyncSession,
         user_text: str,
         company_id: Optional[UUID],
         user_id: Optional[UUID],
         message_id: Optional[UUID],
         runtime_scope: RuleScope = RuleScope.prompt,
+        rules_version: Optional[int] = None,
+        rule_query_embedding: Optional[list[float]] = None,
+        policy_query_embedding: Optional[list[float]] = None,
+        release_session: Optional[Callable[[], Awaitable[None]]] = None,
     ) -> RagDecision:
+        """
+        `rules_version` is the caller's RuleSetSnapshot version; when given,
+        verdicts are cached per (normalized prompt, tenant, rule-set version,
+        policy version).
+        `rule_query_embedding` / `policy_query_embedding` are the query's rule
+        and policy embedding vectors when the caller already computed them
+        (see ScanEngineLocal.scan / scan_many).
+        `release_session` is awaited once retrieval is done and before the LLM
+        call, so a caller can hand its pooled connection back for the round-trip.
+        """
         t0 = time.perf_counter()
         chunks = []
         policy_error = None
         rule_error = None
 
-        try:
-            chunks = await self.retriever.retrieve(
-                session=session,
-                query=user_text,
+        cache_scope: Optional[RagCacheScope] = None
+        query_embedding: Optional[list[float]] = policy_query_embedding
+        if rules_version is not None and self.cache.enabled:
+            cache_scope = RagCacheScope.of(
                 company_id=company_id,
-                message_id=message_id,
-                top_k=self.retriever.top_k,
-                log=False,
+                user_id=user_id,
+                runtime_scope=runtime_scope,
+                rules_version=rules_version,
+                policy_version=await asyncio.to_thread(policy_version, company_id),
             )
-        except Exception as exc:
-            policy_error = repr(exc)
-
-        contexts = [str(c.content or "").strip() for c in chunks if str(c.content or "").strip()]
-        try:
-            related_rules = retrieve_related_rules_for_runtime(
+            if self.cache.near_duplicate_enabled and query_embedding is None:
+                try:
+                    query_embedding = await self.retriever.embed(user_text)
+                except Exception as exc:
+                    policy_error = repr(exc)
+            cached = await self.cache.get(
+                scope=cache_scope,
+                text=user_text,
+                embedding=query_embedding,
+            )
+            if cached is not None:
+                return RagDecision(**cached)
+
+        # Policy embedding (network) and rule retrieval (DB + Python scoring,
+        # off the event loop) are independent; only the pgvector query needs
+        # both the embedding and the session, so it runs once both are done.
+        embedding_step = (
+            self._given(query_embedding)
+            if query_embedding is not None or policy_error is not None
+            else self.retriever.embed(user_text)
+        )
+        embedding_out, rules_out = await asyncio.gather(
+            embedding_step,
+            self.executor.run_db(
+                retrieve_related_rules_for_runtime,
                 session=session,
                 query=user_text,
                 company_id=company_id,
                 user_id=user_id,
                 runtime_scope=runtime_scope,
                 limit=max(3, int(self.settings.rule_duplicate_top_k)),
-            )
-        except Exception as exc:
-            rule_error = repr(exc)
+                query_embedding=rule_query_embedding,
+            ),
+            return_exceptions=True,
+        )
+
+        if isinstance(embedding_out, BaseException):
+            policy_error = repr(embedding_out)
+        elif embedding_out is not None:
+            try:
+                chunks = await self.retriever.retrieve(
+                    session=session,
+                    query=user_text,
+                    company_id=company_id,
+                    message_id=message_id,
+                    top_k=self.retriever.top_k,
+                    log=False,
+                    query_embedding=embedding_out,
+                )
+            except Exception as exc:
+                policy_error = repr(exc)
+
+        contexts = [str(c.content or "").strip() for c in chunks if str(c.content or "").strip()]
+        if isinstance(rules_out, BaseException):
+            rule_error = repr(rules_out)
             related_rules = []
+        else:
+            related_rules = rules_out
         candidate_rule_keys = [str(item.get("stable_key") or "") for item in related_rules]
 
         if not contexts and not related_rules:
@@ -126,6 +218,9 @@ class RagVerifier:
             related_rules=related_rules,
         )
 
+        if release_session is not None:
+            await release_session()
+
         llm_out: LlmTextResult
         raw = ""
         try:
@@ -180,63 +275,77 @@ class RagVerifier:
                 candidate_rule_keys=candidate_rule_keys,
             )
 
+        if parsed_ok and cache_scope is not None:
+            await self.cache.set(
+                scope=cache_scope,
+                text=user_text,
+                verdict={
+                    "decision": out.decision,
+                    "confidence": out.confidence,
+                    "rule_keys": list(out.rule_keys),
+                    "rationale": out.rationale,
+                    "candidate_rule_keys": list(out.candidate_rule_keys),
+                },
+                embedding=query_embedding,
+            )
+
         latency_ms = int((time.perf_counter() - t0) * 1000)
 
-        try:
-            session.add(
-                RagRetrievalLog(
-                    message_id=message_id,
-                    query=user_text[:2000],
-                    top_k=self.retriever.top_k,
-                    latency_ms=latency_ms,
-                    results_json={
-                        "meta": {
-                            "llm_model": llm_out.model,
-                            "llm_provider": llm_out.provider,
-                            "llm_fallback_used": llm_out.fallback_used,
-                            "embed_model": getattr(self.retriever, "embed_model", None),
-                            "parsed_ok": parsed_ok,
-                            "parse_error": parse_error,
-                            "policy_error": policy_error,
-                            "rule_error": rule_error,
-                            "runtime_scope": runtime_scope.value,
-                        },
-                        "policy_chunks": [
-                            {"chunk_id": str(c.chunk_id), "sim": float(c.sim)}
-                            for c in chunks
-                        ],
-                        "related_rules": related_rules,
-                        "decision": {
-                            "decision": out.decision,
-                            "confidence": out.confidence,
-                            "rule_keys": out.rule_keys,
-                            "candidate_rule_keys": out.candidate_rule_keys,
-                            "rationale": out.rationale,
-                        },
-                        "prompt": prompt[:6000],
-                        "raw": raw[:6000],
+        await _log_retrieval(
+            session,
+            RagRetrievalLog(
+                message_id=message_id,
+                query=user_text[:2000],
+                top_k=self.retriever.top_k,
+                latency_ms=latency_ms,
+                results_json={
+                    "meta": {
+                        "llm_model": llm_out.model,
+                        "llm_provider": llm_out.provider,
+                        "llm_fallback_used": llm_out.fallback_used,
+                        "embed_model": getattr(self.retriever, "embed_model", None),
+                        "parsed_ok": parsed_ok,
+                        "parse_error": parse_error,
+                        "policy_error": policy_error,
+                        "rule_error": rule_error,
+                        "runtime_scope": runtime_scope.value,
                     },
-                )
-            )
-            session.commit()
-        except Exception:
-            session.rollback()
+                    "policy_chunks": [
+                        {"chunk_id": str(c.chunk_id), "sim": float(c.sim)}
+                        for c in chunks
+                    ],
+                    "related_rules": related_rules,
+                    "decision": {
+                        "decision": out.decision,
+                        "confidence": out.confidence,
+                        "rule_keys": out.rule_keys,
+                        "candidate_rule_keys": out.candidate_rule_keys,
+                        "rationale": out.rationale,
+                    },
+                    "prompt": prompt[:6000],
+                    "raw": raw[:6000],
+                },
+            ),
+            commit=True,
+        )
 
         return out
 
     async def verify_semantic_support(
         self,
         *,
-        session: Session,
+        session: Session | AsyncSession,
         user_text: str,
         runtime_rule_ids: Sequence[UUID],
         supported_rule_key: str,
         matched_context_keywords: Sequence[str] | None,
         semantic_confidence: float,
         message_id: Optional[UUID] = None,
+        release_session: Optional[Callable[[], Awaitable[None]]] = None,
     ) -> SemanticVerifyDecision:
         t0 = time.perf_counter()
-        material = build_semantic_verify_material(
+        material = await self.executor.run_db(
+            build_semantic_verify_material,
             session=session,
             query=user_text,
             runtime_rule_ids=runtime_rule_ids,
@@ -258,6 +367,8 @@ class RagVerifier:
             semantic_confidence=float(semantic_confidence or 0.0),
             material=material,
         )
+        if release_session is not None:
+            await release_session()
 
         raw = ""
         llm_out: LlmTextResult | None = None
@@ -303,48 +414,50 @@ class RagVerifier:
                 semantic_confidence=float(semantic_confidence or 0.0),
             )
 
-        try:
-            session.add(
-                RagRetrievalLog(
-                    message_id=message_id,
-                    query=user_text[:2000],
-                    top_k=0,
-                    latency_ms=int((time.perf_counter() - t0) * 1000),
-                    results_json={
-                        "meta": {
-                            "kind": "semantic_verify",
-                            "llm_model": getattr(llm_out, "model", None),
-                            "llm_provider": getattr(llm_out, "provider", None),
-                            "llm_fallback_used": getattr(llm_out, "fallback_used", None),
-                            "parse_error": parse_error,
-                        },
-                        "semantic_verify_input": {
-                            "rule_key": material.stable_key,
-                            "semantic_confidence": float(semantic_confidence or 0.0),
-                            "target_evidence": list(material.target_evidence),
-                            "topic_evidence": list(material.topic_evidence),
-                            "linked_context_terms": list(material.linked_context_terms),
-                            "conditions_summary": material.conditions_summary,
-                        },
-                        "decision": {
-                            "called": out.called,
-                            "rule_key": out.rule_key,
-                            "decision": out.decision,
-                            "confidence": out.confidence,
-                            "reason": out.reason,
-                            "semantic_confidence": out.semantic_confidence,
-                        },
-                        "prompt": prompt[:6000],
-                        "raw": raw[:6000],
+        await _log_retrieval(
+            session,
+            RagRetrievalLog(
+                message_id=message_id,
+                query=user_text[:2000],
+                top_k=0,
+                latency_ms=int((time.perf_counter() - t0) * 1000),
+                results_json={
+                    "meta": {
+                        "kind": "semantic_verify",
+                        "llm_model": getattr(llm_out, "model", None),
+                        "llm_provider": getattr(llm_out, "provider", None),
+                        "llm_fallback_used": getattr(llm_out, "fallback_used", None),
+                        "parse_error": parse_error,
                     },
-                )
-            )
-            session.flush()
-        except Exception:
-            session.rollback()
+                    "semantic_verify_input": {
+                        "rule_key": material.stable_key,
+                        "semantic_confidence": float(semantic_confidence or 0.0),
+                        "target_evidence": list(material.target_evidence),
+                        "topic_evidence": list(material.topic_evidence),
+                        "linked_context_terms": list(material.linked_context_terms),
+                        "conditions_summary": material.conditions_summary,
+                    },
+                    "decision": {
+                        "called": out.called,
+                        "rule_key": out.rule_key,
+                        "decision": out.decision,
+                        "confidence": out.confidence,
+                        "reason": out.reason,
+                        "semantic_confidence": out.semantic_confidence,
+                    },
+                    "prompt": prompt[:6000],
+                    "raw": raw[:6000],
+                },
+            ),
+            commit=False,
+        )
 
         return out
 
+    @staticmethod
+    async def _given(value: Optional[list[float]]) -> Optional[list[float]]:
+        return value
+
     async def _call_llm(self, prompt: str) -> LlmTextResult:
         timeout_s = min(6.0, float(self.settings.non_embedding_llm_timeout_seconds))
         return await generate_text_async(
@@ -0,0 +1 @@
+# Background re-scan of stored messages after rule changes.
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class MessageRescanJob(SQLModel, table=True):
+    __tablename__ = "message_rescan_jobs"
+
+    __table_args__ = (
+        sa.Index("ix_message_rescan_jobs_company_created", "company_id", "created_at"),
+        sa.Index("ix_message_rescan_jobs_company_status", "company_id", "status"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+
+    company_id: UUID = Field(foreign_key="companies.id", nullable=False, index=True)
+    requested_by: Optional[UUID] = Field(default=None, foreign_key="users.id")
+    reason: Optional[str] = Field(default=None, max_length=64)
+
+    status: str = Field(default="pending", index=True)  # pending|running|success|failed
+
+    total_messages: int = Field(default=0)
+    scanned_messages: int = Field(default=0)
+    changed_messages: int = Field(default=0)
+    failed_messages: int = Field(default=0)
+
+    # Keyset cursor over messages (created_at, id); last row already handled.
+    cursor_created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=sa.Column(sa.DateTime, nullable=True),
+    )
+    cursor_message_id: Optional[UUID] = Field(default=None)
+
+    error_json: Optional[dict[str, Any]] = Field(
+        default=None,
+        sa_column=sa.Column(JSONB, nullable=True),
+    )
+
+    started_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=sa.Column(sa.DateTime(timezone=True), nullable=True),
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=sa.Column(sa.DateTime(timezone=True), nullable=True),
+    )
+    created_at: datetime = Field(
+        sa_column=sa.Column(
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        )
+    )
+    updated_at: datetime = Field(
+        sa_column=sa.Column(
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+            onupdate=sa.func.now(),
+        )
+    )
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import redis
+
+from app.common.error_codes import ErrorCode
+from app.common.errors import AppError
+from app.core.config import get_settings
+
+
+def get_message_rescan_queue_name() -> str:
+    settings = get_settings()
+    name = (settings.message_rescan_queue_name or "").strip()
+    return name or "message_rescan_jobs"
+
+
+def enqueue_message_rescan_job(*, job_id: UUID) -> None:
+    settings = get_settings()
+    redis_url = (settings.redis_url or "").strip()
+    if not redis_url:
+        raise AppError(
+            500,
+            ErrorCode.INTERNAL_ERROR,
+            "REDIS_URL is required for background message re-scan",
+            details=[{"field": "redis_url", "reason": "missing"}],
+        )
+
+    client = redis.Redis.from_url(redis_url, decode_responses=True)
+    try:
+        client.lpush(get_message_rescan_queue_name(), str(job_id))
+    finally:
+        client.close()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class MessageRescanStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    success = "success"
+    failed = "failed"
+
+
+class MessageRescanJobOut(BaseModel):
+    id: UUID
+    rule_set_id: UUID
+    requested_by: Optional[UUID]
+    reason: Optional[str]
+    status: MessageRescanStatus
+    total_messages: int
+    scanned_messages: int
+    changed_messages: int
+    failed_messages: int
+    progress: float
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+
+
+class MessageRescanJobDetailOut(MessageRescanJobOut):
+    error_json: Optional[dict]
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlmodel import Session, select
+
+from app.common.enums import RuleScope
+from app.company.model import Company
+from app.conversation.model import Conversation
+from app.conversation.service import (
+    build_message_scan_fields,
+    record_message_scan_diagnostics,
+)
+from app.core.config import get_settings
+from app.decision.scan_engine_local import ScanEngineLocal
+from app.messages.model import Message
+from app.permissions.core import not_found
+from app.rescan.model import MessageRescanJob
+from app.rescan.queue import enqueue_message_rescan_job
+from app.rescan.schemas import (
+    MessageRescanJobDetailOut,
+    MessageRescanJobOut,
+    MessageRescanStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+_scan_engine = ScanEngineLocal(context_yaml_path="app/config/context_base.yaml")
+
+# Message columns whose drift means the stored scan no longer matches policy.
+# Timing and signals are left out: they differ on every run.
+_COMPARED_FIELDS = (
+    "scan_status",
+    "final_action",
+    "risk_score",
+    "ambiguous",
+    "matched_rule_ids",
+    "content_masked",
+)
+_MAX_REPORTED_ERRORS = 20
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _load_company_or_404(*, session: Session, company_id: UUID) -> Company:
+    company = session.get(Company, company_id)
+    if not company:
+        raise not_found("Company not found", field="company_id")
+    return company
+
+
+def _progress(row: MessageRescanJob) -> float:
+    if row.status == MessageRescanStatus.success.value:
+        return 1.0
+    total = int(row.total_messages or 0)
+    if total <= 0:
+        return 0.0
+    done = int(row.scanned_messages or 0) + int(row.failed_messages or 0)
+    return round(min(1.0, done / total), 4)
+
+
+def _to_job_out(*, row: MessageRescanJob) -> MessageRescanJobOut:
+    return MessageRescanJobOut(
+        id=row.id,
+        rule_set_id=row.company_id,
+        requested_by=row.requested_by,
+        reason=row.reason,
+        status=MessageRescanStatus(row.status),
+        total_messages=row.total_messages,
+        scanned_messages=row.scanned_messages,
+        changed_messages=row.changed_messages,
+        failed_messages=row.failed_messages,
+        progress=_progress(row),
+        started_at=row.started_at,
+        finished_at=row.finished_at,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+def request_message_rescan(
+    *,
+    session: Session,
+    company_id: UUID,
+    requested_by: Optional[UUID],
+    reason: Optional[str] = None,
+) -> MessageRescanJobOut:
+    """
+    Queue a re-scan of every stored message of a rule set.
+
+    A job that is still pending is reused: it has not read any rules yet, so
+    it will already see the change that triggered this request.
+    """
+    _load_company_or_404(session=session, company_id=company_id)
+
+    pending = session.exec(
+        select(MessageRescanJob)
+        .where(MessageRescanJob.company_id == company_id)
+        .where(MessageRescanJob.status == MessageRescanStatus.pending.value)
+        .order_by(MessageRescanJob.created_at.desc())
+        .limit(1)
+    ).first()
+    if pending:
+        return _to_job_out(row=pending)
+
+    job = MessageRescanJob(
+        company_id=company_id,
+        requested_by=requested_by,
+        reason=reason,
+        status=MessageRescanStatus.pending.value,
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+
+    try:
+        enqueue_message_rescan_job(job_id=job.id)
+    except Exception as e:
+        job = session.get(MessageRescanJob, job.id)
+        if job:
+            job.status = MessageRescanStatus.failed.value
+            job.error_json = {"message": f"enqueue_failed: {e}"}
+            job.finished_at = _utcnow()
+            session.add(job)
+            session.commit()
+        raise
+
+    return _to_job_out(row=job)
+
+
+def schedule_message_rescan(
+    *,
+    session: Session,
+    company_id: UUID,
+    requested_by: Optional[UUID],
+    reason: str,
+) -> None:
+    """Rule-change hook: best effort, never fails the already committed edit."""
+    if not get_settings().message_rescan_on_rule_change:
+        return
+    try:
+        request_message_rescan(
+            session=session,
+            company_id=company_id,
+            requested_by=requested_by,
+            reason=reason,
+        )
+    except Exception as e:
+        session.rollback()
+        logger.warning(
+            "message re-scan not scheduled for company=%s (%s): %s",
+            company_id,
+            reason,
+            e,
+        )
+
+
+def list_message_rescan_jobs(
+    *,
+    session: Session,
+    company_id: UUID,
+    limit: int = 50,
+) -> list[MessageRescanJobOut]:
+    _load_company_or_404(session=session, company_id=company_id)
+
+    safe_limit = max(1, min(int(limit), 200))
+    rows = list(
+        session.exec(
+            select(MessageRescanJob)
+            .where(MessageRescanJob.company_id == company_id)
+            .order_by(MessageRescanJob.created_at.desc())
+            .limit(safe_limit)
+        ).all()
+    )
+    return [_to_job_out(row=r) for r in rows]
+
+
+def get_message_rescan_job_detail(
+    *,
+    session: Session,
+    company_id: UUID,
+    job_id: UUID,
+) -> MessageRescanJobDetailOut:
+    _load_company_or_404(session=session, company_id=company_id)
+
+    job = session.get(MessageRescanJob, job_id)
+    if not job or job.company_id != company_id:
+        raise not_found("Message re-scan job not found", field="job_id")
+
+    base = _to_job_out(row=job)
+    return MessageRescanJobDetailOut(**base.model_dump(), error_json=job.error_json)
+
+
+def _company_messages_stmt(*, columns: list[Any], company_id: UUID):
+    # Privacy-mode messages (content=None) cannot be re-scanned.
+    return (
+        sa.select(*columns)
+        .select_from(Message)
+        .join(Conversation, Conversation.id == Message.conversation_id)
+        .where(Conversation.company_id == company_id)
+        .where(Message.content.is_not(None))
+    )
+
+
+def _count_messages(*, session: Session, company_id: UUID) -> int:
+    stmt = _company_messages_stmt(
+        columns=[sa.func.count(Message.id)], company_id=company_id
+    )
+    return int(session.execute(stmt).scalar_one() or 0)
+
+
+def _load_message_batch(
+    *,
+    session: Session,
+    company_id: UUID,
+    after: Optional[tuple[datetime, UUID]],
+    limit: int,
+) -> list[Any]:
+    stmt = _company_messages_stmt(
+        columns=[
+            Message.id,
+            Message.created_at,
+            Message.content,
+            Message.scan_version,
+            Message.entities_json,
+            *(getattr(Message, name) for name in _COMPARED_FIELDS),
+        ],
+        company_id=company_id,
+    )
+    if after is not None:
+        stmt = stmt.where(
+            sa.tuple_(Message.created_at, Message.id) > sa.tuple_(*after)
+        )
+    stmt = stmt.order_by(Message.created_at.asc(), Message.id.asc()).limit(limit)
+    return list(session.execute(stmt).all())
+
+
+def _scan_fields_changed(row: Any, fields: dict[str, Any]) -> bool:
+    for name in _COMPARED_FIELDS:
+        if getattr(row, name) != fields[name]:
+            return True
+    old_entities = (row.entities_json or {}).get("entities")
+    return old_entities != fields["entities_json"]["entities"]
+
+
+async def _rescan_batch(
+    *,
+    session: Session,
+    company_id: UUID,
+    rows: list[Any],
+) -> list[dict[str, Any]]:
+    """Scan one batch and return bulk-UPDATE parameter sets for changed rows."""
+    # Rule-set scope resolves the same rules for every member, so the whole
+    # batch goes through one scan_many call.
+    scans = await _scan_engine.scan_many(
+        session=session,
+        texts=[row.content for row in rows],
+        company_id=company_id,
+        scope=RuleScope.chat,
+    )
+
+    updates: list[dict[str, Any]] = []
+    for row, scan in zip(rows, scans):
+        fields = build_message_scan_fields(
+            session=session, content=row.content, scan=scan
+        )
+        if not _scan_fields_changed(row, fields):
+            continue
+        # Appended, not updated: detail views read the newest diagnostics row.
+        record_message_scan_diagnostics(session=session, message_id=row.id, scan=scan)
+        updates.append(
+            {
+                "id": row.id,
+                "scan_version": int(row.scan_version or 1) + 1,
+                **fields,
+            }
+        )
+    return updates
+
+
+async def run_message_rescan_job(*, session: Session, job_id: UUID) -> None:
+    job = session.get(MessageRescanJob, job_id)
+    if not job:
+        return
+
+    if job.status != MessageRescanStatus.pending.value:
+        return
+
+    company_id = job.company_id
+    job.status = MessageRescanStatus.running.value
+    job.started_at = _utcnow()
+    job.finished_at = None
+    job.error_json = None
+    job.total_messages = _count_messages(session=session, company_id=company_id)
+    session.add(job)
+    session.commit()
+
+    batch_size = max(1, int(get_settings().message_rescan_batch_size))
+    errors: list[dict[str, Any]] = []
+    cursor: Optional[tuple[datetime, UUID]] = None
+    if job.cursor_created_at is not None and job.cursor_message_id is not None:
+        cursor = (job.cursor_created_at, job.cursor_message_id)
+
+    while True:
+        rows = _load_message_batch(
+            session=session,
+            company_id=company_id,
+            after=cursor,
+            limit=batch_size,
+        )
+        if not rows:
+            break
+
+        updates: list[dict[str, Any]] = []
+        failed = 0
+        try:
+            updates = await _rescan_batch(
+                session=session, company_id=company_id, rows=rows
+            )
+        except Exception as e:
+            session.rollback()
+            failed = len(rows)
+            logger.warning(
+                "message re-scan job=%s batch after %s failed: %s", job_id, cursor, e
+            )
+            if len(errors) < _MAX_REPORTED_ERRORS:
+                errors.append(
+                    {"first_message_id": str(rows[0].id), "error": str(e)[:1000]}
+                )
+
+        if updates:
+            session.execute(sa.update(Message), updates)
+
+        cursor = (rows[-1].created_at, rows[-1].id)
+        job = session.get(MessageRescanJob, job_id)
+        if not job:
+            session.rollback()
+            return
+        job.scanned_messages = int(job.scanned_messages or 0) + len(rows) - failed
+        job.changed_messages = int(job.changed_messages or 0) + len(updates)
+        job.failed_messages = int(job.failed_messages or 0) + failed
+        job.cursor_created_at, job.cursor_message_id = cursor
+        session.add(job)
+        # Row updates and progress land in the same transaction, so the
+        # cursor never points past unwritten results.
+        session.commit()
+
+    job = session.get(MessageRescanJob, job_id)
+    if not job:
+        return
+    job.finished_at = _utcnow()
+    if job.failed_messages > 0:
+        job.status = MessageRescanStatus.failed.value
+        job.error_json = {"failed_batches": errors}
+    else:
+        job.status = MessageRescanStatus.success.value
+        job.error_json = None
+    session.add(job)
+    session.commit()
+
+
+def process_message_rescan_job(*, session: Session, job_id: UUID) -> None:
+    asyncio.run(run_message_rescan_job(session=session, job_id=job_id))
@@ -0,0 +1 @@
+# Partition upkeep and retention for log/diagnostics tables.
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+import logging
+import re
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlmodel import Session
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+RAG_RETRIEVAL_LOGS = "rag_retrieval_logs"
+MESSAGE_SCAN_DIAGNOSTICS = "message_scan_diagnostics"
+
+
+@dataclass(frozen=True, slots=True)
+class PartitionedTable:
+    name: str
+    # Fat JSONB column stored with lz4 TOAST compression where available.
+    compressed_column: str
+
+
+PARTITIONED_TABLES = (
+    PartitionedTable(name=RAG_RETRIEVAL_LOGS, compressed_column="results_json"),
+    PartitionedTable(
+        name=MESSAGE_SCAN_DIAGNOSTICS, compressed_column="diagnostics_json"
+    ),
+)
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+# Retriever logs have no meta; decide logs have meta without a kind.
+_RAG_LOG_KIND_SQL = (
+    "COALESCE(results_json->'meta'->>'kind', "
+    "CASE WHEN results_json ? 'meta' THEN 'decide' ELSE 'retrieve' END)"
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def parse_partition_month(table: str, name: str) -> Optional[date]:
+    if not name.startswith(f"{table}_p"):
+        return None
+    m = _PARTITION_SUFFIX.search(name)
+    if not m:
+        return None
+    year, month = int(m.group(1)), int(m.group(2))
+    if not 1 <= month <= 12:
+        return None
+    return date(year, month, 1)
+
+
+def expired_partitions(
+    table: str, names: list[str], *, cutoff: datetime
+) -> list[str]:
+    """Monthly partitions whose whole range is older than `cutoff`."""
+    cutoff_day = cutoff.astimezone(timezone.utc).date()
+    out: list[str] = []
+    for name in names:
+        month = parse_partition_month(table, name)
+        if month is not None and add_months(month, 1) <= cutoff_day:
+            out.append(name)
+    return sorted(out)
+
+
+def _set_compression(session: Session, *, table: str, column: str) -> None:
+    # lz4 needs a server built with it; pglz (the default) otherwise.
+    try:
+        with session.begin_nested():
+            session.execute(
+                sa.text(
+                    f'ALTER TABLE "{table}" ALTER COLUMN "{column}" '
+                    "SET COMPRESSION lz4"
+                )
+            )
+    except sa.exc.DBAPIError as e:
+        logger.info("lz4 compression not set on %s.%s: %s", table, column, e)
+
+
+def ensure_partitions(
+    *, session: Session, spec: PartitionedTable, months_ahead: int
+) -> list[str]:
+    """Create the monthly partitions from this month to `months_ahead` ahead."""
+    created: list[str] = []
+    first = month_start(_utcnow().date())
+    for i in range(max(0, int(months_ahead)) + 1):
+        month = add_months(first, i)
+        name = partition_name(spec.name, month)
+        exists = session.execute(
+            sa.text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}
+        ).scalar_one()
+        if exists:
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(
+                    sa.text(
+                        f'CREATE TABLE "{name}" PARTITION OF "{spec.name}" '
+                        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+                        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+                    )
+                )
+        except sa.exc.DBAPIError as e:
+            # Usually rows of that month already sit in the default partition.
+            logger.warning("partition %s not created: %s", name, e)
+            continue
+        _set_compression(session, table=name, column=spec.compressed_column)
+        created.append(name)
+    session.commit()
+    return created
+
+
+def list_partitions(*, session: Session, table: str) -> list[str]:
+    rows = session.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ),
+        {"table": table},
+    ).scalars()
+    return list(rows)
+
+
+def rollup_rag_retrieval_logs(
+    *, session: Session, source: str, before: Optional[datetime] = None
+) -> None:
+    """Add the daily counts/latency of `source` rows into the rollup table."""
+    where = "WHERE created_at < :before" if before is not None else ""
+    session.execute(
+        sa.text(
+            "INSERT INTO rag_retrieval_daily_stats "
+            "(day, kind, log_count, total_latency_ms, max_latency_ms) "
+            f"SELECT (created_at AT TIME ZONE 'UTC')::date, {_RAG_LOG_KIND_SQL}, "
+            "count(*), COALESCE(sum(latency_ms), 0), COALESCE(max(latency_ms), 0) "
+            f'FROM "{source}" {where} GROUP BY 1, 2 '
+            "ON CONFLICT (day, kind) DO UPDATE SET "
+            "log_count = rag_retrieval_daily_stats.log_count + EXCLUDED.log_count, "
+            "total_latency_ms = rag_retrieval_daily_stats.total_latency_ms "
+            "+ EXCLUDED.total_latency_ms, "
+            "max_latency_ms = GREATEST(rag_retrieval_daily_stats.max_latency_ms, "
+            "EXCLUDED.max_latency_ms)"
+        ),
+        {"before": before} if before is not None else {},
+    )
+
+
+def purge_expired(
+    *, session: Session, spec: PartitionedTable, cutoff: datetime
+) -> dict[str, Any]:
+    """
+    Drop monthly partitions older than `cutoff` and delete expired rows that
+    landed in the default partition. Retrieval logs are rolled up first; each
+    partition goes in its own transaction.
+    """
+    dropped: list[str] = []
+    names = list_partitions(session=session, table=spec.name)
+    for name in expired_partitions(spec.name, names, cutoff=cutoff):
+        if spec.name == RAG_RETRIEVAL_LOGS:
+            rollup_rag_retrieval_logs(session=session, source=name)
+        session.execute(sa.text(f'DROP TABLE "{name}"'))
+        session.commit()
+        dropped.append(name)
+
+    default_rows = 0
+    default_name = default_partition_name(spec.name)
+    if default_name in names:
+        if spec.name == RAG_RETRIEVAL_LOGS:
+            rollup_rag_retrieval_logs(
+                session=session, source=default_name, before=cutoff
+            )
+        result = session.execute(
+            sa.text(f'DELETE FROM "{default_name}" WHERE created_at < :cutoff'),
+            {"cutoff": cutoff},
+        )
+        default_rows = int(result.rowcount or 0)
+        session.commit()
+
+    return {"dropped_partitions": dropped, "deleted_default_rows": default_rows}
+
+
+def _retention_days(table: str) -> int:
+    settings = get_settings()
+    if table == RAG_RETRIEVAL_LOGS:
+        return int(settings.rag_log_retention_days)
+    return int(settings.message_diagnostics_retention_days)
+
+
+def run_storage_maintenance(*, session: Session) -> dict[str, Any]:
+    """Create upcoming partitions and apply retention to every partitioned table."""
+    settings = get_settings()
+    now = _utcnow()
+    summary: dict[str, Any] = {}
+    for spec in PARTITIONED_TABLES:
+        created = ensure_partitions(
+            session=session,
+            spec=spec,
+            months_ahead=settings.storage_partition_months_ahead,
+        )
+        days = _retention_days(spec.name)
+        purged: dict[str, Any] = {}
+        # 0 keeps everything.
+        if days > 0:
+            purged = purge_expired(
+                session=session, spec=spec, cutoff=now - timedelta(days=days)
+            )
+        summary[spec.name] = {"created_partitions": created, **purged}
+    return summary
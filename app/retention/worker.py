@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import time
+
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.db.engine import engine
+from app.retention.service import run_storage_maintenance
+
+
+def run_worker_loop() -> None:
+    interval = max(60.0, float(get_settings().storage_maintenance_interval_seconds))
+    print(f"[storage-retention-worker] started, interval={interval:.0f}s")
+    while True:
+        try:
+            with Session(engine) as session:
+                summary = run_storage_maintenance(session=session)
+            print(f"[storage-retention-worker] done: {summary}")
+        except Exception as e:
+            print(f"[storage-retention-worker] run failed: {e}")
+        time.sleep(interval)
+
+
+def main() -> None:
+    run_worker_loop()
+
+
+if __name__ == "__main__":
+    main()
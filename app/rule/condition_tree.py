@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+from typing import Any, Optional, Union
+import unicodedata
+
+# Signal operators in the order RuleEngine has always resolved them when a leaf
+# carries more than one operator key.
+SIGNAL_OPERATORS: tuple[str, ...] = (
+    "exists",
+    "equals",
+    "in",
+    "contains",
+    "any_of",
+    "gte",
+    "lte",
+    "gt",
+    "lt",
+    "startswith",
+    "regex",
+)
+
+
+SignalPredicate = Callable[[Any], bool]
+
+_WS_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fold_signal_text(value: str) -> str:
+    raw = str(value or "").lower().replace("\u0111", "d")
+    normalized = unicodedata.normalize("NFKD", raw)
+    no_marks = "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    return _WS_RE.sub(" ", no_marks).strip()
+
+
+@dataclass(slots=True, frozen=True)
+class AnyNode:
+    children: tuple["ConditionNode", ...]
+
+    def matches(self, entities: list[Any], signals: dict[str, Any]) -> bool:
+        for child in self.children:
+            if child.matches(entities, signals):
+                return True
+        return False
+
+
+@dataclass(slots=True, frozen=True)
+class AllNode:
+    children: tuple["ConditionNode", ...]
+
+    def matches(self, entities: list[Any], signals: dict[str, Any]) -> bool:
+        for child in self.children:
+            if not child.matches(entities, signals):
+                return False
+        return True
+
+
+@dataclass(slots=True, frozen=True)
+class NotNode:
+    child: "ConditionNode"
+
+    def matches(self, entities: list[Any], signals: dict[str, Any]) -> bool:
+        return not self.child.matches(entities, signals)
+
+
+@dataclass(slots=True, frozen=True)
+class EntityLeaf:
+    entity_type: str
+    min_score: float
+    max_score: Optional[float]
+    sources: Optional[frozenset[str]]
+
+    def matches(self, entities: list[Any], signals: dict[str, Any]) -> bool:
+        for e in entities:
+            if getattr(e, "type", None) != self.entity_type:
+                continue
+
+            score = float(getattr(e, "score", 0.0))
+            if score < self.min_score:
+                continue
+            if self.max_score is not None and score > self.max_score:
+                continue
+
+            if self.sources is not None:
+                if str(getattr(e, "source", "")) not in self.sources:
+                    continue
+
+            return True
+
+        return False
+
+
+@dataclass(slots=True, frozen=True)
+class SignalLeaf:
+    """
+    `operand` keeps the parsed DSL value; `predicate` is built once at compile
+    time with string operands already folded and regexes already compiled.
+    """
+
+    field_path: tuple[str, ...]
+    op: str
+    operand: Any
+    predicate: SignalPredicate
+
+    def matches(self, entities: list[Any], signals: dict[str, Any]) -> bool:
+        cur: Any = signals
+        for part in self.field_path:
+            if not isinstance(cur, dict):
+                cur = None
+                break
+            cur = cur.get(part)
+        return self.predicate(cur)
+
+
+@dataclass(slots=True, frozen=True)
+class InvalidNode:
+    """
+    Placeholder for a malformed subtree.
+
+    Parsing never fails eagerly: the error is raised when the node is evaluated,
+    so `any` branches that short-circuit before reaching it keep matching exactly
+    as they did with the dict interpreter.
+    """
+
+    error: str
+
+    def matches(self, entities: list[Any], signals: dict[str, Any]) -> bool:
+        raise ValueError(self.error)
+
+
+ConditionNode = Union[AnyNode, AllNode, NotNode, EntityLeaf, SignalLeaf, InvalidNode]
+
+
+def parse_conditions(node: Any) -> ConditionNode:
+    try:
+        return _parse_node(node)
+    except Exception as exc:
+        return InvalidNode(error=str(exc))
+
+
+def _parse_node(node: Any) -> ConditionNode:
+    if not isinstance(node, dict):
+        return InvalidNode(error=f"Condition node must be dict, got: {type(node)}")
+
+    if "any" in node:
+        return AnyNode(
+            children=tuple(parse_conditions(n) for n in (node.get("any") or []))
+        )
+
+    if "all" in node:
+        return AllNode(
+            children=tuple(parse_conditions(n) for n in (node.get("all") or []))
+        )
+
+    if "not" in node:
+        return NotNode(child=parse_conditions(node["not"]))
+
+    if "entity_type" in node:
+        return _parse_entity_leaf(node)
+
+    if "signal" in node:
+        return _parse_signal_leaf(node["signal"])
+
+    return InvalidNode(error=f"Unsupported condition node: {node}")
+
+
+def _parse_entity_leaf(node: dict[str, Any]) -> ConditionNode:
+    max_score = node.get("max_score")
+    source = node.get("source")
+    sources: Optional[frozenset[str]] = None
+    if isinstance(source, str):
+        sources = frozenset({source})
+    elif isinstance(source, list):
+        sources = frozenset(str(x) for x in source)
+
+    return EntityLeaf(
+        entity_type=str(node["entity_type"]),
+        min_score=float(node.get("min_score", 0.0)),
+        max_score=float(max_score) if max_score is not None else None,
+        sources=sources,
+    )
+
+
+def _parse_signal_leaf(signal: Any) -> ConditionNode:
+    if not isinstance(signal, dict):
+        return InvalidNode(error=f"signal leaf must be dict, got {type(signal)}")
+
+    field_path = tuple(str(signal.get("field", "")).split("."))
+    for op in SIGNAL_OPERATORS:
+        if op not in signal:
+            continue
+        operand = signal[op]
+        if op == "exists":
+            operand = bool(operand)
+        elif op in ("in", "any_of"):
+            operand = tuple(operand or [])
+        elif op in ("gte", "lte", "gt", "lt"):
+            operand = float(operand)
+        return SignalLeaf(
+            field_path=field_path,
+            op=op,
+            operand=operand,
+            predicate=_build_signal_predicate(op, operand),
+        )
+
+    return InvalidNode(error=f"Unsupported signal operator: {signal}")
+
+
+def _to_float(v: Any) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+
+def _equals_predicate(operand: Any) -> SignalPredicate:
+    if isinstance(operand, str):
+        folded = fold_signal_text(operand)
+
+        def _equals_text(value: Any) -> bool:
+            if isinstance(value, str):
+                return fold_signal_text(value) == folded
+            return value == operand
+
+        return _equals_text
+
+    return lambda value: value == operand
+
+
+def _build_signal_predicate(op: str, operand: Any) -> SignalPredicate:
+    if op == "exists":
+        if operand:
+            return lambda value: value is not None
+        return lambda value: value is None
+
+    if op == "equals":
+        return _equals_predicate(operand)
+
+    if op == "in":
+        candidates = tuple(_equals_predicate(c) for c in operand)
+        return lambda value: any(eq(value) for eq in candidates)
+
+    if op == "contains":
+        item_equals = _equals_predicate(operand)
+        needle = fold_signal_text(str(operand))
+
+        def _contains(value: Any) -> bool:
+            if isinstance(value, list):
+                return any(item_equals(item) for item in value)
+            if isinstance(value, str):
+                return needle in fold_signal_text(value)
+            return False
+
+        return _contains
+
+    if op == "any_of":
+        item_equals = tuple(_equals_predicate(n) for n in operand)
+        needles = tuple(fold_signal_text(str(n)) for n in operand)
+
+        def _any_of(value: Any) -> bool:
+            if isinstance(value, list):
+                return any(eq(item) for item in value for eq in item_equals)
+            if isinstance(value, str):
+                folded = fold_signal_text(value)
+                return any(n in folded for n in needles)
+            return False
+
+        return _any_of
+
+    if op == "gte":
+        return lambda value: _to_float(value) >= operand
+    if op == "lte":
+        return lambda value: _to_float(value) <= operand
+    if op == "gt":
+        return lambda value: _to_float(value) > operand
+    if op == "lt":
+        return lambda value: _to_float(value) < operand
+
+    if op == "startswith":
+        prefix = fold_signal_text(str(operand))
+        return lambda value: isinstance(value, str) and fold_signal_text(
+            value
+        ).startswith(prefix)
+
+    if op == "regex":
+        try:
+            pattern = re.compile(str(operand))
+        except re.error as exc:
+            error = str(exc)
+
+            # Bad patterns only ever failed once a string value reached them.
+            def _invalid_regex(value: Any) -> bool:
+                if not isinstance(value, str):
+                    return False
+                raise ValueError(f"Invalid signal regex: {error}")
+
+            return _invalid_regex
+
+        return lambda value: isinstance(value, str) and pattern.search(value) is not None
+
+    raise ValueError(f"Unsupported signal operator: {op}")
+
+
+IndexKey = tuple[str, Any]
+
+# Operators that can only match when the signal value is present (not None).
+_VALUE_REQUIRED_OPS = frozenset({"contains", "any_of", "startswith", "regex"})
+
+
+def entity_index_key(entity_type: Any) -> IndexKey:
+    return ("entity", entity_type)
+
+
+def signal_index_key(field_path: tuple[str, ...]) -> IndexKey:
+    return ("signal", field_path)
+
+
+def required_keys(node: ConditionNode) -> Optional[frozenset[IndexKey]]:
+    """
+    Necessary condition for `node` to match, as index keys.
+
+    Returns a set of keys of which at least one must be present in the message
+    (emitted entity types / non-None signal fields), or None when the node can
+    match without any of them (e.g. `not`, numeric comparisons on missing
+    signals) and therefore always has to be evaluated.
+    """
+    if isinstance(node, EntityLeaf):
+        return frozenset({entity_index_key(node.entity_type)})
+
+    if isinstance(node, SignalLeaf):
+        if _signal_requires_value(node.op, node.operand):
+            return frozenset({signal_index_key(node.field_path)})
+        return None
+
+    if isinstance(node, AnyNode):
+        keys: set[IndexKey] = set()
+        for child in node.children:
+            child_keys = required_keys(child)
+            if child_keys is None:
+                return None
+            keys.update(child_keys)
+        return frozenset(keys)
+
+    if isinstance(node, AllNode):
+        best: Optional[frozenset[IndexKey]] = None
+        for child in node.children:
+            child_keys = required_keys(child)
+            if child_keys is None:
+                continue
+            if best is None or len(child_keys) < len(best):
+                best = child_keys
+        return best
+
+    return None
+
+
+def _signal_requires_value(op: str, operand: Any) -> bool:
+    if op == "exists":
+        return bool(operand)
+    if op == "equals":
+        return operand is not None
+    if op == "in":
+        return None not in operand
+    return op in _VALUE_REQUIRED_OPS
+
+
+def referenced_signal_fields(node: ConditionNode) -> frozenset[tuple[str, ...]]:
+    """All signal field paths a condition tree reads, whatever the branch."""
+    if isinstance(node, SignalLeaf):
+        return frozenset({node.field_path})
+    if isinstance(node, (AnyNode, AllNode)):
+        out: set[tuple[str, ...]] = set()
+        for child in node.children:
+            out.update(referenced_signal_fields(child))
+        return frozenset(out)
+    if isinstance(node, NotNode):
+        return referenced_signal_fields(node.child)
+    return frozenset()
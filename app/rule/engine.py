@@ -1,18 +1,35 @@
 from __future__ import annotations
 
 from copy import deepcopy
+from collections.abc import Iterable
 from dataclasses import dataclass
-import re
 import time
 from threading import RLock
 from typing import Any, Optional
-import unicodedata
 from uuid import UUID
 
 from sqlmodel import Session, select
 
+from app.common.cache_bus import (
+    RULES_KIND,
+    CacheInvalidation,
+    fetch_shared_version,
+    local_cache_ttl_seconds,
+    publish_invalidation,
+    register_invalidation_handler,
+)
 from app.common.enums import RuleAction
 from app.rule.company_rule_override import CompanyRuleOverride
+from app.rule.condition_tree import (
+    ConditionNode,
+    IndexKey,
+    entity_index_key,
+    fold_signal_text,
+    parse_conditions,
+    referenced_signal_fields,
+    required_keys,
+    signal_index_key,
+)
 from app.rule.model import Rule
 from app.rule.user_rule_override import UserRuleOverride
 
@@ -38,6 +55,63 @@ class RuleRuntime:
     conditions: dict[str, Any]
 
 
+@dataclass(slots=True, frozen=True)
+class CompiledRule:
+    runtime: RuleRuntime
+    condition: ConditionNode
+    is_personal: bool
+
+
+@dataclass(slots=True, frozen=True)
+class RuleSetSnapshot:
+    """
+    Immutable, pre-compiled runtime rules for one (company_id, user_id) scope.
+
+    `version` is the invalidation counter value of the latest invalidation of
+    the scope or of all scopes (see app.common.cache_bus), so two snapshots
+    with the same version hold the same rules, on any worker.
+
+    `rule_index` maps an entity type / signal field to the positions of the
+    compiled rules that need it; rules in `unindexed` are always evaluated.
+    `rag_dependent_positions` are the rules reading `rag.*` / `semantic_*`
+    signals, the only ones whose outcome can change once RAG has run.
+    """
+
+    version: int
+    rules: tuple[RuleRuntime, ...]
+    compiled: tuple[CompiledRule, ...]
+    personal_rule_ids: frozenset[UUID]
+    rule_index: dict[IndexKey, tuple[int, ...]]
+    unindexed: tuple[int, ...]
+    signal_fields: tuple[tuple[str, ...], ...]
+    rag_dependent_positions: frozenset[int]
+
+    def candidate_positions(
+        self, *, entities: list[Any], signals: dict[str, Any]
+    ) -> list[int]:
+        """Positions of the rules that can possibly match, in priority order."""
+        if not self.rule_index:
+            return list(self.unindexed)
+
+        active: list[IndexKey] = [
+            entity_index_key(getattr(e, "type", None)) for e in entities
+        ]
+        for field_path in self.signal_fields:
+            cur: Any = signals
+            for part in field_path:
+                if not isinstance(cur, dict):
+                    cur = None
+                    break
+                cur = cur.get(part)
+            if cur is not None:
+                active.append(signal_index_key(field_path))
+
+        positions = set(self.unindexed)
+        for key in active:
+            positions.update(self.rule_index.get(key, ()))
+        return sorted(positions)
+
+
 class RuleEngine:
     """
     Match rules from Rule.conditions (JSONB DSL).
@@ -50,11 +124,15 @@ class RuleEngine:
       3) legacy company rule-row overrides are respected as fallback
     """
 
+    # Fallback TTL when this worker is not subscribed to cross-worker
+    # invalidations (see app.common.cache_bus).
     _CACHE_TTL_SECONDS = 5.0
     _cache_lock = RLock()
-    _rules_cache: dict[
-        tuple[Optional[UUID], Optional[UUID]], tuple[float, list[RuleRuntime]]
+    _snapshot_cache: dict[
+        tuple[Optional[UUID], Optional[UUID]], tuple[float, RuleSetSnapshot]
     ] = {}
+    _global_version = 0
+    _scope_versions: dict[tuple[Optional[UUID], Optional[UUID]], int] = {}
 
     @classmethod
     def _cache_key(
@@ -63,64 +141,211 @@ class RuleEngine:
         # User-level key is only relevant for personal scope.
         return (company_id, user_id if company_id is None else None)
 
+    @classmethod
+    def _current_version(cls, cache_key: tuple[Optional[UUID], Optional[UUID]]) -> int:
+        with cls._cache_lock:
+            return max(
+                RuleEngine._global_version,
+                RuleEngine._scope_versions.get(cache_key, 0),
+            )
+
     @classmethod
     def invalidate_cache(
         cls, company_id: Optional[UUID] = None, user_id: Optional[UUID] = None
+    ) -> None:
+        all_scopes = company_id is None and user_id is None
+        cache_key = cls._cache_key(company_id=company_id, user_id=user_id)
+        shared_version = publish_invalidation(
+            kind=RULES_KIND,
+            company_id=cache_key[0],
+            user_id=cache_key[1],
+            all_scopes=all_scopes,
+        )
+        cls._apply_invalidation(
+            cache_key=None if all_scopes else cache_key,
+            shared_version=shared_version,
+        )
+
+    @classmethod
+    def _apply_invalidation(
+        cls,
+        *,
+        cache_key: tuple[Optional[UUID], Optional[UUID]] | None,
+        shared_version: Optional[int],
     ) -> None:
         with cls._cache_lock:
-            if company_id is None and user_id is None:
-                cls._rules_cache.clear()
+            if shared_version is None:
+                # Redis unreachable: no version to agree on with the other
+                # workers, so only drop what this worker holds.
+                if cache_key is None:
+                    cls._snapshot_cache.clear()
+                else:
+                    cls._snapshot_cache.pop(cache_key, None)
                 return
-            cls._rules_cache.pop(
-                cls._cache_key(company_id=company_id, user_id=user_id), None
-            )
 
-    def _get_cached_rules(
-        self, *, company_id: Optional[UUID], user_id: Optional[UUID]
-    ) -> list[RuleRuntime] | None:
-        cache_key = self._cache_key(company_id=company_id, user_id=user_id)
+            # Scope and all-scopes versions come from the same counter (see
+            # publish_invalidation), so they are stored as received.
+            if cache_key is None:
+                if shared_version <= RuleEngine._global_version:
+                    return
+                RuleEngine._global_version = shared_version
+                cls._snapshot_cache.clear()
+                return
+
+            if shared_version <= cls._current_version(cache_key):
+                # Already applied (our own broadcast echoing back), or older
+                # than an all-scopes invalidation that already dropped it.
+                return
+            RuleEngine._scope_versions[cache_key] = shared_version
+            cls._snapshot_cache.pop(cache_key, None)
+
+    @classmethod
+    def _on_invalidation(cls, event: CacheInvalidation) -> None:
+        if event.version is None:
+            # Listener (re)connected: bumps may have been missed, start cold.
+            with cls._cache_lock:
+                cls._snapshot_cache.clear()
+            return
+        cache_key = cls._cache_key(company_id=event.company_id, user_id=event.user_id)
+        cls._apply_invalidation(
+            cache_key=None if event.all_scopes else cache_key,
+            shared_version=event.version,
+        )
+
+    @classmethod
+    def _sync_shared_version(
+        cls, cache_key: tuple[Optional[UUID], Optional[UUID]]
+    ) -> None:
+        shared_version = fetch_shared_version(
+            kind=RULES_KIND,
+            company_id=cache_key[0],
+            user_id=cache_key[1],
+        )
+        if shared_version is None:
+            return
+        with cls._cache_lock:
+            if shared_version > cls._current_version(cache_key):
+                RuleEngine._scope_versions[cache_key] = shared_version
+
+    def _get_cached_snapshot(
+        self, cache_key: tuple[Optional[UUID], Optional[UUID]]
+    ) -> RuleSetSnapshot | None:
         with self._cache_lock:
-            entry = self._rules_cache.get(cache_key)
+            entry = self._snapshot_cache.get(cache_key)
             if not entry:
                 return None
-            expires_at, rules = entry
+            expires_at, snapshot = entry
             if expires_at <= time.monotonic():
-                self._rules_cache.pop(cache_key, None)
+                self._snapshot_cache.pop(cache_key, None)
                 return None
-            return list(rules)
+            return snapshot
 
-    def _set_cached_rules(
+    def _set_cached_snapshot(
         self,
-        *,
-        company_id: Optional[UUID],
-        user_id: Optional[UUID],
-        rules: list[RuleRuntime],
+        cache_key: tuple[Optional[UUID], Optional[UUID]],
+        snapshot: RuleSetSnapshot,
     ) -> None:
-        cache_key = self._cache_key(company_id=company_id, user_id=user_id)
         with self._cache_lock:
-            self._rules_cache[cache_key] = (
-                time.monotonic() + self._CACHE_TTL_SECONDS,
-                list(rules),
+            # A write that invalidated the scope while we were loading wins.
+            if snapshot.version != self._current_version(cache_key):
+                return
+            ttl_seconds = local_cache_ttl_seconds(
+                fallback_seconds=self._CACHE_TTL_SECONDS
+            )
+            self._snapshot_cache[cache_key] = (
+                time.monotonic() + ttl_seconds,
+                snapshot,
             )
 
-    def load_rules(
+    def load_snapshot(
         self,
         *,
         session: Session,
         company_id: Optional[UUID],
         user_id: Optional[UUID] = None,
-    ) -> list[RuleRuntime]:
-        cached = self._get_cached_rules(company_id=company_id, user_id=user_id)
+    ) -> RuleSetSnapshot:
+        cache_key = self._cache_key(company_id=company_id, user_id=user_id)
+        cached = self._get_cached_snapshot(cache_key)
         if cached is not None:
             return cached
 
-        rules = self._load_rules_uncached(
+        self._sync_shared_version(cache_key)
+        version = self._current_version(cache_key)
+        rules, personal_rule_ids = self._load_rules_uncached(
+            session=session,
+            company_id=company_id,
+            user_id=user_id,
+        )
+        snapshot = self._build_snapshot(
+            version=version,
+            rules=rules,
+            personal_rule_ids=personal_rule_ids,
+        )
+        self._set_cached_snapshot(cache_key, snapshot)
+        return snapshot
+
+    def load_rules(
+        self,
+        *,
+        session: Session,
+        company_id: Optional[UUID],
+        user_id: Optional[UUID] = None,
+    ) -> list[RuleRuntime]:
+        snapshot = self.load_snapshot(
             session=session,
             company_id=company_id,
             user_id=user_id,
         )
-        self._set_cached_rules(company_id=company_id, user_id=user_id, rules=rules)
-        return list(rules)
+        return list(snapshot.rules)
+
+    def _build_snapshot(
+        self,
+        *,
+        version: int,
+        rules: list[RuleRuntime],
+        personal_rule_ids: set[UUID],
+    ) -> RuleSetSnapshot:
+        compiled = tuple(
+            CompiledRule(
+                runtime=r,
+                condition=parse_conditions(r.conditions or {}),
+                is_personal=r.rule_id in personal_rule_ids,
+            )
+            for r in rules
+        )
+
+        rule_index: dict[IndexKey, list[int]] = {}
+        unindexed: list[int] = []
+        rag_dependent: set[int] = set()
+        for pos, c in enumerate(compiled):
+            if any(
+                self._is_rag_dependent_field(path)
+                for path in referenced_signal_fields(c.condition)
+            ):
+                rag_dependent.add(pos)
+            keys = required_keys(c.condition)
+            if keys is None:
+                unindexed.append(pos)
+                continue
+            for key in keys:
+                rule_index.setdefault(key, []).append(pos)
+
+        return RuleSetSnapshot(
+            version=version,
+            rules=tuple(rules),
+            compiled=compiled,
+            personal_rule_ids=frozenset(personal_rule_ids),
+            rule_index={k: tuple(v) for k, v in rule_index.items()},
+            unindexed=tuple(unindexed),
+            signal_fields=tuple(
+                key[1] for key in rule_index if key[0] == "signal"
+            ),
+            rag_dependent_positions=frozenset(rag_dependent),
+        )
+
+    def _is_rag_dependent_field(self, field_path: tuple[str, ...]) -> bool:
+        root = field_path[0] if field_path else ""
+        return root == "rag" or root.startswith("semantic_")
 
     def _load_rules_uncached(
         self,
@@ -128,7 +353,12 @@ class RuleEngine:
         session: Session,
         company_id: Optional[UUID],
         user_id: Optional[UUID],
-    ) -> list[RuleRuntime]:
+    ) -> tuple[list[RuleRuntime], set[UUID]]:
+        """
+        Return (runtime rules, ids of company custom rules among them).
+
+        Personal scope has no company custom rules, so the id set is empty there.
+        """
         if company_id is None:
             stmt = (
                 select(Rule)
@@ -160,7 +390,7 @@ class RuleEngine:
                 )
                 if effective_enabled:
                     out.append(self._to_runtime(r))
-            return out
+            return out, set()
 
         global_rows = list(
             session.exec(
@@ -217,7 +447,7 @@ class RuleEngine:
 
         resolved.extend(custom_enabled)
         resolved.sort(key=lambda r: int(r.priority), reverse=True)
-        return [self._to_runtime(r) for r in resolved]
+        return [self._to_runtime(r) for r in resolved], {c.id for c in custom_enabled}
 
     def evaluate(
         self,
@@ -227,40 +457,80 @@ class RuleEngine:
         user_id: Optional[UUID] = None,
         entities: list[Any],
         signals: dict[str, Any],
+        snapshot: RuleSetSnapshot | None = None,
     ) -> list[RuleMatch]:
-        signals = self._normalize_signals(signals)
-
-        rules = self.load_rules(session=session, company_id=company_id, user_id=user_id)
-        personal_rule_ids: set[UUID] = set()
-        if company_id is not None and rules:
-            rows = list(
-                session.exec(
-                    select(Rule).where(Rule.id.in_([r.rule_id for r in rules]))
-                ).all()
+        if snapshot is None:
+            snapshot = self.load_snapshot(
+                session=session,
+                company_id=company_id,
+                user_id=user_id,
             )
-            personal_rule_ids = {r.id for r in rows if r.company_id == company_id}
 
-        personal_matches: list[RuleMatch] = []
-        global_matches: list[RuleMatch] = []
+        positions = self.match_positions(
+            snapshot=snapshot,
+            entities=entities,
+            signals=signals,
+        )
+        return self.build_matches(
+            snapshot=snapshot,
+            positions=positions,
+            company_id=company_id,
+        )
 
-        for r in rules:
+    def match_positions(
+        self,
+        *,
+        snapshot: RuleSetSnapshot,
+        entities: list[Any],
+        signals: dict[str, Any],
+        only: Optional[Iterable[int]] = None,
+    ) -> list[int]:
+        """
+        Positions (in `snapshot.compiled`) of the rules whose conditions match.
+
+        `only` restricts evaluation to a subset, e.g. re-checking the
+        rag-dependent rules after RAG signals have been filled in.
+        """
+        signals = self._normalize_signals(signals)
+        candidates = snapshot.candidate_positions(entities=entities, signals=signals)
+        if only is not None:
+            allowed = set(only)
+            candidates = [pos for pos in candidates if pos in allowed]
+
+        compiled_rules = snapshot.compiled
+        matched: list[int] = []
+        for pos in candidates:
             try:
-                if self._match_conditions(
-                    r.conditions or {}, entities=entities, signals=signals
-                ):
-                    out = RuleMatch(
-                        rule_id=r.rule_id,
-                        stable_key=r.stable_key,
-                        name=r.name,
-                        action=r.action,
-                        priority=r.priority,
-                    )
-                    if company_id is not None and r.rule_id in personal_rule_ids:
-                        personal_matches.append(out)
-                    else:
-                        global_matches.append(out)
+                if compiled_rules[pos].condition.matches(entities, signals):
+                    matched.append(pos)
             except Exception:
                 continue
+        return matched
+
+    def build_matches(
+        self,
+        *,
+        snapshot: RuleSetSnapshot,
+        positions: Iterable[int],
+        company_id: Optional[UUID],
+    ) -> list[RuleMatch]:
+        personal_matches: list[RuleMatch] = []
+        global_matches: list[RuleMatch] = []
+
+        for pos in sorted(set(positions)):
+            compiled = snapshot.compiled[pos]
+            r = compiled.runtime
+            out = RuleMatch(
+                rule_id=r.rule_id,
+                stable_key=r.stable_key,
+                name=r.name,
+                action=r.action,
+                priority=r.priority,
+            )
+            if company_id is not None and compiled.is_personal:
+                personal_matches.append(out)
+            else:
+                global_matches.append(out)
 
         if company_id is not None and personal_matches:
             return personal_matches
@@ -273,164 +543,21 @@ class RuleEngine:
         entities: list[Any],
         signals: dict[str, Any],
     ) -> bool:
-        if not isinstance(node, dict):
-            raise ValueError(f"Condition node must be dict, got: {type(node)}")
-
-        if "any" in node:
-            children = node.get("any") or []
-            return any(
-                self._match_conditions(n, entities=entities, signals=signals)
-                for n in children
-            )
-
-        if "all" in node:
-            children = node.get("all") or []
-            return all(
-                self._match_conditions(n, entities=entities, signals=signals)
-                for n in children
-            )
-
-        if "not" in node:
-            return not self._match_conditions(
-                node["not"], entities=entities, signals=signals
-            )
-
-        if "entity_type" in node:
-            et = str(node["entity_type"])
-            min_score = float(node.get("min_score", 0.0))
-            max_score = node.get("max_score")
-            max_score_f = float(max_score) if max_score is not None else None
-            source = node.get("source")
-            return self._has_entity(
-                entities,
-                et,
-                min_score=min_score,
-                max_score=max_score_f,
-                source=source,
-            )
-
-        if "signal" in node:
-            s = node["signal"]
-            if not isinstance(s, dict):
-                raise ValueError(f"signal leaf must be dict, got {type(s)}")
-
-            field = str(s.get("field", ""))
-            value = self._get_signal(signals, field)
-
-            if "exists" in s:
-                want = bool(s["exists"])
-                return (value is not None) if want else (value is None)
-
-            if "equals" in s:
-                return self._signal_equals(value, s["equals"])
-            if "in" in s:
-                return any(
-                    self._signal_equals(value, candidate)
-                    for candidate in (s["in"] or [])
-                )
-
-            if "contains" in s:
-                needle = s["contains"]
-                if isinstance(value, list):
-                    return any(self._signal_equals(item, needle) for item in value)
-                if isinstance(value, str):
-                    return self._contains_text(value, str(needle))
-                return False
-
-            if "any_of" in s:
-                needles = s.get("any_of") or []
-                if isinstance(value, list):
-                    return any(
-                        self._signal_equals(item, needle)
-                        for item in value
-                        for needle in needles
-                    )
-                if isinstance(value, str):
-                    return any(
-                        self._contains_text(value, str(needle)) for needle in needles
-                    )
-                return False
-
-            if "gte" in s:
-                return self._to_float(value) >= float(s["gte"])
-            if "lte" in s:
-                return self._to_float(value) <= float(s["lte"])
-            if "gt" in s:
-                return self._to_float(value) > float(s["gt"])
-            if "lt" in s:
-                return self._to_float(value) < float(s["lt"])
-
-            if "startswith" in s:
-                return isinstance(value, str) and self._starts_with_text(
-                    value, str(s["startswith"])
-                )
-
-            if "regex" in s:
-                if not isinstance(value, str):
-                    return False
-                return re.search(str(s["regex"]), value) is not None
-
-            raise ValueError(f"Unsupported signal operator: {s}")
-
-        raise ValueError(f"Unsupported condition node: {node}")
-
-    def _fold_text(self, value: str) -> str:
-        raw = str(value or "").lower().replace("\u0111", "d")
-        normalized = unicodedata.normalize("NFKD", raw)
-        no_marks = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-        return re.sub(r"\s+", " ", no_marks).strip()
-
-    def _signal_equals(self, left: Any, right: Any) -> bool:
-        if isinstance(left, str) and isinstance(right, str):
-            return self._fold_text(left) == self._fold_text(right)
-        return left == right
-
-    def _contains_text(self, haystack: str, needle: str) -> bool:
-        return self._fold_text(needle) in self._fold_text(haystack)
-
-    def _starts_with_text(self, value: str, prefix: str) -> bool:
-        return self._fold_text(value).startswith(self._fold_text(prefix))
+        return self._eval_node(
+            parse_conditions(node), entities=entities, signals=signals
+        )
 
-    def _has_entity(
+    def _eval_node(
         self,
-        entities: list[Any],
-        entity_type: str,
+        node: ConditionNode,
         *,
-        min_score: float,
-        max_score: Optional[float],
-        source: Any,
+        entities: list[Any],
+        signals: dict[str, Any],
     ) -> bool:
-        allowed_sources: Optional[set[str]] = None
-        if isinstance(source, str):
-            allowed_sources = {source}
-        elif isinstance(source, list):
-            allowed_sources = {str(x) for x in source}
-
-        for e in entities:
-            if getattr(e, "type", None) != entity_type:
-                continue
-
-            score = float(getattr(e, "score", 0.0))
-            if score < min_score:
-                continue
-            if max_score is not None and score > max_score:
-                continue
+        return node.matches(entities, signals)
 
-            if allowed_sources is not None:
-                if str(getattr(e, "source", "")) not in allowed_sources:
-                    continue
-
-            return True
-
-        return False
-
-    def _get_signal(self, signals: dict[str, Any], field: str) -> Any:
-        cur: Any = signals
-        for part in field.split("."):
-            if not isinstance(cur, dict):
-                return None
-            cur = cur.get(part)
-        return cur
+    def _fold_text(self, value: str) -> str:
+        return fold_signal_text(value)
 
     def _normalize_signals(self, signals: dict[str, Any]) -> dict[str, Any]:
         rag = signals.get("rag")
@@ -442,12 +569,6 @@ class RuleEngine:
             rag.setdefault("rule_keys", [])
         return signals
 
-    def _to_float(self, v: Any) -> float:
-        try:
-            return float(v)
-        except Exception:
-            return 0.0
-
     def _to_runtime(self, rule: Rule) -> RuleRuntime:
         return RuleRuntime(
             rule_id=rule.id,
@@ -457,3 +578,6 @@ class RuleEngine:
             priority=int(rule.priority),
             conditions=deepcopy(rule.conditions or {}),
         )
+
+
+register_invalidation_handler(RULES_KIND, RuleEngine._on_invalidation)
@@ -18,6 +18,7 @@ from app.decision.context_term_runtime import invalidate_context_runtime_cache
 from app.permissions.core import forbid, not_found
 from app.permissions.loaders.conversation import load_company_member_active_or_403
 from app.rag.models.context_term import ContextTerm
+from app.rescan.service import schedule_message_rescan
 from app.rule.company_rule_override import CompanyRuleOverride
 from app.rule.engine import RuleEngine
 from app.rule.model import Rule
@@ -65,6 +66,17 @@ _EMBEDDING_RELEVANT_RULE_FIELDS = {
     "match_mode",
     "rag_mode",
 }
+# Fields that change how stored messages would be scanned today.
+_RESCAN_RELEVANT_RULE_FIELDS = {
+    "scope",
+    "conditions",
+    "action",
+    "priority",
+    "match_mode",
+    "rag_mode",
+    "enabled",
+    "context_terms",
+}
 
 _PAGINATION_MAX_LIMIT = 200
 _PAGINATION_DEFAULT_LIMIT = 20
@@ -1710,6 +1722,13 @@ def update_company_rule(
     RuleEngine.invalidate_cache(company_id)
     if conditions_mutated:
         invalidate_context_runtime_cache(company_id)
+    if changed_fields & _RESCAN_RELEVANT_RULE_FIELDS:
+        schedule_message_rescan(
+            session=session,
+            company_id=company_id,
+            requested_by=actor_user_id,
+            reason="rule.update",
+        )
     return _to_rule_out(rule=row, origin=origin)
 
 
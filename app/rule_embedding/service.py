@@ -127,6 +127,11 @@ def hash_rule_embedding_content(text: str) -> list[float]:
     return [x / norm for x in vec]
 
 
+def embed_rule_query(query: str) -> list[float]:
+    """Query-side vector used by runtime rule retrieval and semantic assist."""
+    return hash_rule_embedding_content(str(query or "").strip())
+
+
 def upsert_rule_embedding(
     *,
     session: Session,
@@ -229,6 +234,7 @@ def retrieve_related_rules_for_runtime(
     runtime_scope: RuleScope = RuleScope.prompt,
     limit: int = 5,
     model_name: str | None = None,
+    query_embedding: list[float] | None = None,
 ) -> list[dict[str, Any]]:
     safe_limit = max(1, min(int(limit), 20))
     query_text = str(query or "").strip()
@@ -252,7 +258,8 @@ def retrieve_related_rules_for_runtime(
     if not rows:
         return []
 
-    query_embedding = hash_rule_embedding_content(query_text)
+    if query_embedding is None:
+        query_embedding = hash_rule_embedding_content(query_text)
     scored: list[tuple[float, int, int, float, float, Rule]] = []
 
     for row in rows:
@@ -350,6 +357,7 @@ def evaluate_semantic_assist_candidates(
     query: str,
     runtime_rule_ids: Sequence[UUID],
     matched_context_keywords: Sequence[str] | None = None,
+    query_embedding: list[float] | None = None,
 ) -> dict[str, Any]:
     candidate_rule_ids = [UUID(str(x)) for x in list(runtime_rule_ids or []) if str(x)]
     if not candidate_rule_ids:
@@ -384,7 +392,8 @@ def evaluate_semantic_assist_candidates(
         rule_ids=[row.id for row in rows],
     )
     query_text = str(query or "").strip()
-    query_embedding = hash_rule_embedding_content(query_text)
+    if query_embedding is None:
+        query_embedding = hash_rule_embedding_content(query_text)
     matched_keyword_set = {
         _normalize_phrase_identity(value)
         for value in list(matched_context_keywords or [])
@@ -508,12 +508,11 @@ def _resolve_rule_set_id(session: Session, raw_rule_set_id: str | None) -> UUID:
     )
 
 
-async def _run_case(
+def _evaluate_case(
     *,
     session: Session,
     case: dict[str, Any],
-    rule_set_id: UUID,
-    scan_engine: ScanEngineLocal,
+    scan_out: dict[str, Any],
 ) -> dict[str, Any]:
     case_id = str(case.get("id") or "").strip()
     group = str(case.get("group") or "").strip()
@@ -522,13 +521,6 @@ async def _run_case(
     expected_action = _normalize_action(case.get("expected_action"))
     expected_mask = case.get("expected_mask")
 
-    scan_out = await scan_engine.scan(
-        session=session,
-        text=text,
-        company_id=rule_set_id,
-        user_id=None,
-        scope=RuleScope.prompt,
-    )
     actual_action = _normalize_action(getattr(scan_out.get("final_action"), "value", scan_out.get("final_action")))
     actual_masked_text = _mask_text_for_scan(
         session=session,
@@ -576,18 +568,18 @@ async def _evaluate_cases(
     rule_set_id: UUID,
     scan_engine: ScanEngineLocal,
 ) -> list[dict[str, Any]]:
-    results: list[dict[str, Any]] = []
     with Session(engine) as session:
-        for case in cases:
-            results.append(
-                await _run_case(
-                    session=session,
-                    case=case,
-                    rule_set_id=rule_set_id,
-                    scan_engine=scan_engine,
-                )
-            )
-    return results
+        scan_outs = await scan_engine.scan_many(
+            session=session,
+            texts=[str(case.get("input") or "") for case in cases],
+            company_id=rule_set_id,
+            user_id=None,
+            scope=RuleScope.prompt,
+        )
+        return [
+            _evaluate_case(session=session, case=case, scan_out=scan_out)
+            for case, scan_out in zip(cases, scan_outs)
+        ]
 
 
 def _build_summary(
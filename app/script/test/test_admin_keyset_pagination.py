@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+import app.admin_monitoring.service as admin_service
+import app.db.all_models  # noqa: F401  (configure mappers)
+from app.common.enums import ConversationStatus, RuleAction
+
+
+class _FakeSession:
+    def __init__(self, counters: tuple[int, int], results=()) -> None:
+        self.counters = counters
+        self.results = list(results)
+        self.sql: list[str] = []
+
+    def exec(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(
+            all=lambda: self.results.pop(0) if self.results else [],
+            one=lambda: self.counters,
+        )
+
+
+def test_keyset_cursor_round_trip_and_stale_cursor_restarts() -> None:
+    updated_at = datetime(2026, 10, 17, 8, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid4()
+
+    cursor = admin_service._encode_keyset_cursor(sort_value=updated_at, row_id=row_id)
+
+    assert admin_service._decode_keyset_cursor(cursor=cursor) == (updated_at, row_id)
+    assert admin_service._decode_keyset_cursor(cursor="40") is None
+    assert admin_service._decode_keyset_cursor(cursor=None) is None
+
+
+def test_block_mask_page_uses_keyset_and_cached_counter_total(monkeypatch) -> None:
+    monkeypatch.setattr(admin_service, "_count_cache", {})
+    cursor = admin_service._encode_keyset_cursor(
+        sort_value=datetime(2026, 10, 17, 8, 0), row_id=uuid4()
+    )
+    session = _FakeSession(counters=(3, 4))
+
+    _, next_cursor, has_more, total = (
+        admin_service.list_admin_block_mask_logs_paginated(
+            session=session, limit=20, cursor=cursor, action="block"
+        )
+    )
+    session.counters = (99, 99)
+    _, _, _, cached_total = admin_service.list_admin_block_mask_logs_paginated(
+        session=session, limit=20, cursor=None, action="block"
+    )
+
+    page_sql, count_sql = session.sql[0], session.sql[1]
+    assert "OFFSET" not in page_sql
+    assert "(messages.created_at, messages.id) <" in page_sql
+    assert "conversation_stats" in count_sql and "count(" not in count_sql
+    assert (next_cursor, has_more, total) == (None, False, 3)
+    assert cached_total == 3
+    assert len(session.sql) == 3
+
+
+def test_searched_totals_are_not_cached_and_expired_counts_are_swept(
+    monkeypatch,
+) -> None:
+    cache: dict = {}
+    monkeypatch.setattr(admin_service, "_count_cache", cache)
+    session = _FakeSession(counters=7)
+
+    for q in ("alice", "bob", None):
+        _, _, _, total = admin_service.list_admin_conversations_paginated(
+            session=session, limit=20, q=q
+        )
+        assert total == 7
+
+    assert list(cache) == [("conversations", None)]
+
+    cache[("stale",)] = (-1e9, 1)
+    admin_service._cached_count(("block_mask", ("block",)), lambda: 2)
+    assert ("stale",) not in cache
+
+
+def test_conversation_page_batches_last_message_previews(monkeypatch) -> None:
+    monkeypatch.setattr(admin_service, "_count_cache", {})
+    now = datetime(2026, 10, 17, 9, 0)
+    owner = SimpleNamespace(id=uuid4(), email="a@example.com", name="A")
+
+    def _convo():
+        return SimpleNamespace(
+            id=uuid4(),
+            company_id=None,
+            title=None,
+            status=ConversationStatus.active,
+            model_name=None,
+            temperature=None,
+            last_sequence_number=2,
+            created_at=now,
+            updated_at=now,
+        )
+
+    busy, empty = _convo(), _convo()
+    last = SimpleNamespace(
+        conversation_id=busy.id, final_action=RuleAction.block, content="hello"
+    )
+    session = _FakeSession(
+        counters=2,
+        results=[
+            [(busy, owner, 2, 1, 0, now), (empty, owner, 0, 0, 0, None)],
+            [last],
+        ],
+    )
+
+    items, _, _, _ = admin_service.list_admin_conversations_paginated(
+        session=session, limit=20
+    )
+
+    page_sql, _, preview_sql = session.sql
+    assert "conversation_stats.last_message_at" in page_sql
+    assert "DISTINCT ON (messages.conversation_id)" in preview_sql
+    assert len(session.sql) == 3
+    assert [(i.last_message_at, i.last_message_preview) for i in items] == [
+        (now, "hello"),
+        (None, None),
+    ]
+    assert items[0].has_sensitive_action and not items[1].has_sensitive_action
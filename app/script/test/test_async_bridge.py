@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.async_bridge import run_db
+
+
+def _describe(*, session, label: str) -> tuple[str, object]:
+    return label, session
+
+
+def test_run_db_calls_sync_session_inline() -> None:
+    session = SimpleNamespace()
+
+    label, got = asyncio.run(run_db(session, _describe, label="sync"))
+
+    assert label == "sync"
+    assert got is session
+
+
+def test_run_db_hands_async_session_sync_facade_to_helper() -> None:
+    async def _main():
+        async with AsyncSession() as session:
+            label, got = await run_db(session, _describe, label="async")
+            return session, label, got
+
+    session, label, got = asyncio.run(_main())
+
+    assert label == "async"
+    assert isinstance(got, Session)
+    assert got is session.sync_session
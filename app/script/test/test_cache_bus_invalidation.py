@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from uuid import uuid4
+
+from app.common import cache_bus
+from app.common.cache_bus import CONTEXT_TERMS_KIND, RULES_KIND, CacheInvalidation
+from app.decision import context_term_runtime
+from app.rule.engine import RuleEngine
+
+
+class _EmptyRuleEngine(RuleEngine):
+    def _load_rules_uncached(self, *, session, company_id, user_id):
+        return [], set()
+
+
+def test_remote_invalidation_drops_snapshot_and_adopts_shared_version() -> None:
+    company_id = uuid4()
+    engine = _EmptyRuleEngine()
+    before = engine.load_snapshot(session=None, company_id=company_id)
+    shared_version = before.version + 10
+
+    cache_bus._dispatch(
+        CacheInvalidation(
+            kind=RULES_KIND,
+            company_id=company_id,
+            user_id=None,
+            all_scopes=False,
+            version=shared_version,
+        )
+    )
+    after = engine.load_snapshot(session=None, company_id=company_id)
+
+    assert after is not before
+    assert after.version == shared_version
+
+
+def test_echoed_invalidation_is_ignored() -> None:
+    company_id = uuid4()
+    engine = _EmptyRuleEngine()
+    RuleEngine.invalidate_cache(company_id)
+    snapshot = engine.load_snapshot(session=None, company_id=company_id)
+
+    cache_bus._dispatch(
+        CacheInvalidation(
+            kind=RULES_KIND,
+            company_id=company_id,
+            user_id=None,
+            all_scopes=False,
+            version=snapshot.version,
+        )
+    )
+
+    assert engine.load_snapshot(session=None, company_id=company_id) is snapshot
+
+
+def _event(kind, *, company_id, version, all_scopes=False) -> CacheInvalidation:
+    return CacheInvalidation(
+        kind=kind,
+        company_id=company_id,
+        user_id=None,
+        all_scopes=all_scopes,
+        version=version,
+    )
+
+
+def _isolate_rule_versions(monkeypatch) -> None:
+    # All-scopes events would otherwise leak into the other tests' versions.
+    monkeypatch.setattr(RuleEngine, "_global_version", 0)
+    monkeypatch.setattr(RuleEngine, "_scope_versions", {})
+    monkeypatch.setattr(RuleEngine, "_snapshot_cache", {})
+
+
+def test_scope_invalidation_after_all_scopes_invalidation_is_applied(
+    monkeypatch,
+) -> None:
+    _isolate_rule_versions(monkeypatch)
+    company_id = uuid4()
+    engine = _EmptyRuleEngine()
+    base = engine.load_snapshot(session=None, company_id=company_id).version + 100
+
+    cache_bus._dispatch(_event(RULES_KIND, company_id=company_id, version=base))
+    cache_bus._dispatch(
+        _event(RULES_KIND, company_id=None, version=base + 1, all_scopes=True)
+    )
+    after_all = engine.load_snapshot(session=None, company_id=company_id)
+    assert after_all.version == base + 1
+
+    # The scope's next edit comes from the same counter, so it is newer.
+    cache_bus._dispatch(_event(RULES_KIND, company_id=company_id, version=base + 2))
+    after_scope = engine.load_snapshot(session=None, company_id=company_id)
+
+    assert after_scope is not after_all
+    assert after_scope.version == base + 2
+
+
+def test_versions_are_stored_as_received(monkeypatch) -> None:
+    _isolate_rule_versions(monkeypatch)
+    company_id = uuid4()
+    engine = _EmptyRuleEngine()
+    base = engine.load_snapshot(session=None, company_id=company_id).version + 100
+
+    cache_bus._dispatch(
+        _event(RULES_KIND, company_id=None, version=base, all_scopes=True)
+    )
+    cache_bus._dispatch(_event(RULES_KIND, company_id=company_id, version=base - 1))
+
+    # An edit older than the all-scopes bust is already covered by it.
+    assert engine.load_snapshot(session=None, company_id=company_id).version == base
+
+
+def test_context_term_invalidation_adopts_shared_version(monkeypatch) -> None:
+    company_id = uuid4()
+    monkeypatch.setattr(
+        context_term_runtime, "fetch_shared_version", lambda **kwargs: None
+    )
+    monkeypatch.setattr(context_term_runtime, "_cache", {})
+    context_term_runtime._apply_invalidation(company_id, 7)
+    context_term_runtime._cache[company_id] = (float("inf"), object())
+
+    cache_bus._dispatch(_event(CONTEXT_TERMS_KIND, company_id=company_id, version=7))
+    assert company_id in context_term_runtime._cache
+
+    cache_bus._dispatch(_event(CONTEXT_TERMS_KIND, company_id=company_id, version=9))
+    assert company_id not in context_term_runtime._cache
+    assert context_term_runtime._current_version(company_id) == 9
+
+
+def test_unreachable_redis_only_drops_local_snapshot() -> None:
+    company_id = uuid4()
+    engine = _EmptyRuleEngine()
+    before = engine.load_snapshot(session=None, company_id=company_id)
+
+    RuleEngine._apply_invalidation(
+        cache_key=RuleEngine._cache_key(company_id=company_id, user_id=None),
+        shared_version=None,
+    )
+    after = engine.load_snapshot(session=None, company_id=company_id)
+
+    assert after is not before
+    assert after.version == before.version
+
+
+def test_parse_message_rejects_malformed_payload() -> None:
+    assert cache_bus._parse_message("not-json") is None
+    event = cache_bus._parse_message(
+        '{"kind": "rules", "company_id": null, "user_id": null, "all": true, "version": 3}'
+    )
+    assert event == CacheInvalidation(
+        kind="rules", company_id=None, user_id=None, all_scopes=True, version=3
+    )
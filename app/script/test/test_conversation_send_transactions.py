@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import app.db.all_models  # noqa: F401  (configure mappers)
+from app.common.enums import ConversationStatus, MessageRole, RuleAction
+from app.conversation import service as conversation_service
+
+
+class _FakeSession:
+    """Tracks whether a transaction (and so a pooled connection) is held."""
+
+    def __init__(self, conversation) -> None:
+        self.conversation = conversation
+        self.in_tx = False
+        self.saved = []
+
+    def get(self, model, key):
+        self.in_tx = True
+        return self.conversation if key == self.conversation.id else None
+
+    def execute(self, stmt):
+        self.in_tx = True
+        count = next(
+            v for v in stmt.compile().params.values() if isinstance(v, int)
+        )
+        self.conversation.last_sequence_number += count
+        last = self.conversation.last_sequence_number
+        return SimpleNamespace(scalar_one=lambda: last)
+
+    def add(self, row) -> None:
+        self.in_tx = True
+        self.saved.append(row)
+
+    def flush(self) -> None:
+        pass
+
+    def expunge(self, row) -> None:
+        pass
+
+    def commit(self) -> None:
+        self.in_tx = False
+
+
+def _allow_scan() -> dict:
+    return {
+        "final_action": RuleAction.allow,
+        "entities": [],
+        "matches": [],
+        "signals": {},
+        "risk_score": 0.0,
+        "ambiguous": False,
+        "latency_ms": 1,
+    }
+
+
+def test_llm_call_runs_without_open_transaction(monkeypatch) -> None:
+    user_id = uuid4()
+    conversation = SimpleNamespace(
+        id=uuid4(),
+        user_id=user_id,
+        company_id=None,
+        status=ConversationStatus.active,
+        temperature=None,
+        model_name=None,
+        last_sequence_number=4,
+    )
+    session = _FakeSession(conversation)
+    held_during_llm = []
+    held_during_rag = []
+
+    async def _scan(*, session, release_session, **kwargs) -> dict:
+        held_during_rag.append(session.in_tx)
+        session.in_tx = True  # rule loading reads the DB
+        await release_session()  # as the RAG stage does before its LLM call
+        held_during_rag.append(session.in_tx)
+        return _allow_scan()
+
+    async def _generate_reply(**kwargs) -> str:
+        held_during_llm.append(session.in_tx)
+        return "xin chao"
+
+    monkeypatch.setattr(conversation_service, "_scan", SimpleNamespace(scan=_scan))
+    monkeypatch.setattr(
+        conversation_service,
+        "_chat",
+        SimpleNamespace(generate_reply=_generate_reply),
+    )
+
+    user_msg, assistant_id = asyncio.run(
+        conversation_service.append_user_message_async(
+            session=session,
+            conversation_id=conversation.id,
+            user_id=user_id,
+            content="chao ban",
+        )
+    )
+
+    assert held_during_llm == [False]
+    # Entering each scan (user + assistant) and at its RAG stage.
+    assert held_during_rag == [False, False, False, False]
+    assert session.in_tx is False
+    user_row, assistant_row = session.saved
+    assert user_row is user_msg and user_row.role == MessageRole.user
+    assert assistant_row.id == assistant_id
+    assert (user_row.sequence_number, assistant_row.sequence_number) == (5, 6)
+    assert conversation.last_sequence_number == 6
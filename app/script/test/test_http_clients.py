@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+
+import app.common.http_clients as http_clients
+from app.common.http_clients import (
+    GROQ,
+    OLLAMA,
+    close_http_clients,
+    get_async_client,
+    get_sync_client,
+)
+
+
+async def _new_loop_client():
+    client = get_async_client(GROQ)
+    await close_http_clients()
+    return client
+
+
+def test_async_client_is_shared_per_loop_and_closed_on_shutdown() -> None:
+    async def _main():
+        first = get_async_client(GROQ)
+        second = get_async_client(GROQ)
+        other = get_async_client(OLLAMA)
+        await close_http_clients()
+        return first, second, other
+
+    first, second, other = asyncio.run(_main())
+    next_loop_client = asyncio.run(_new_loop_client())
+
+    assert first is second
+    assert first is not other
+    assert first.is_closed and other.is_closed
+    assert next_loop_client is not first
+
+
+def test_sync_client_is_process_wide_with_provider_base_url() -> None:
+    client = get_sync_client(OLLAMA)
+    try:
+        assert get_sync_client(OLLAMA) is client
+        assert str(client.base_url).startswith(
+            http_clients.get_settings().ollama_base_url.rstrip("/")
+        )
+    finally:
+        asyncio.run(close_http_clients())
+
+    assert client.is_closed
+    assert get_sync_client(OLLAMA) is not client
+    asyncio.run(close_http_clients())
+
+
+def test_http2_requires_optional_h2_package(monkeypatch) -> None:
+    monkeypatch.setattr(http_clients, "_http2_available", lambda: False)
+    assert http_clients._profile(GROQ).http2 is False
+
+    monkeypatch.setattr(http_clients, "_http2_available", lambda: True)
+    assert http_clients._profile(GROQ).http2 is True
+    assert http_clients._profile(OLLAMA).http2 is False
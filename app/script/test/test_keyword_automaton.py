@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from app.decision.context_scorer import ContextScorer
+from app.decision.keyword_automaton import AutomatonCache, KeywordAutomaton
+
+
+def test_automaton_reports_overlapping_and_prefix_terms() -> None:
+    automaton = KeywordAutomaton(["so", "so dien thoai", "dien", "thoai", "a.b"])
+
+    hits = sorted(automaton.finditer("goi so dien thoai a.b"))
+
+    assert hits == [
+        (4, 6, "so"),
+        (4, 17, "so dien thoai"),
+        (7, 11, "dien"),
+        (12, 17, "thoai"),
+        (18, 21, "a.b"),
+    ]
+    assert automaton.matched_terms("sodienthoai") == {"so", "dien", "thoai"}
+    assert KeywordAutomaton([]).matched_terms("anything") == set()
+
+
+def test_automaton_matches_substring_semantics() -> None:
+    terms = ["ab", "abc", "bc", "c", "abcd", "x+y", "(z)"]
+    automaton = KeywordAutomaton(terms)
+
+    for text in ("abcd", "zzabcz", "x+y (z)", "", "bcbcab"):
+        assert automaton.matched_terms(text) == {t for t in terms if t in text}
+
+
+def test_scorer_reuses_cached_automaton_for_overrides() -> None:
+    scorer = ContextScorer("app/config/context_base.yaml")
+    automata = AutomatonCache()
+    overrides = {"dev": ["Mã nội bộ", "token"]}
+
+    first = scorer.score(
+        "gui ma noi bo kem token",
+        persona_keywords_override=overrides,
+        automata=automata,
+    )
+    cached = automata.get_or_build(
+        ("context_scorer.persona", str(scorer.yaml_path)),
+        lambda: None,
+    )
+    second = scorer.score(
+        "khong co gi",
+        persona_keywords_override=overrides,
+        automata=automata,
+    )
+
+    assert cached is not None
+    assert first.persona == "dev"
+    assert "mã nội bộ" in first.keyword_hits and "token" in first.keyword_hits
+    assert second.keyword_hits == []
+
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import time
+from uuid import uuid4
+
+from app.common.log_writer import (
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+    LogWriteBuffer,
+    _row_values,
+)
+from app.rag.models.rag_retrieval_log import RagRetrievalLog
+
+
+class _Sink:
+    def __init__(self) -> None:
+        self.batches: list[tuple[str, list[dict]]] = []
+
+    def __call__(self, table, rows) -> None:
+        self.batches.append((table.name, list(rows)))
+
+
+def _row(query: str) -> RagRetrievalLog:
+    return RagRetrievalLog(
+        query=query, top_k=3, results_json={"results": []}, latency_ms=1
+    )
+
+
+def test_flush_writes_multi_row_batches() -> None:
+    sink = _Sink()
+    buffer = LogWriteBuffer(
+        batch_size=3, flush_interval_seconds=60, max_pending=100, sink=sink
+    )
+    message_id = uuid4()
+    for i in range(4):
+        row = _row(f"q{i}")
+        row.message_id = message_id
+        buffer.submit(row)
+
+    assert sink.batches == []
+    assert buffer.flush() == 4
+
+    assert [len(rows) for _, rows in sink.batches] == [3, 1]
+    first = sink.batches[0][1][0]
+    assert sink.batches[0][0] == "rag_retrieval_logs"
+    assert first["query"] == "q0"
+    assert first["message_id"] == message_id
+    # Event time is captured on submit, not at the delayed insert.
+    assert first["created_at"] is not None
+    assert buffer.pending == 0
+
+
+def test_unset_server_default_columns_are_left_to_the_db() -> None:
+    row = _row("q")
+    row.created_at = None
+
+    values = _row_values(row)
+
+    assert "created_at" not in values
+    assert values["query"] == "q"
+
+
+def test_background_thread_flushes_on_size_and_interval() -> None:
+    sink = _Sink()
+    buffer = LogWriteBuffer(
+        batch_size=2, flush_interval_seconds=0.05, max_pending=100, sink=sink
+    )
+    buffer.start()
+    try:
+        buffer.submit(_row("a"))
+        buffer.submit(_row("b"))
+        buffer.submit(_row("c"))
+        deadline = time.monotonic() + 2.0
+        while buffer.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        buffer.stop()
+
+    written = [r["query"] for _, rows in sink.batches for r in rows]
+    assert written == ["a", "b", "c"]
+
+
+def test_overflow_policies_bound_pending_rows() -> None:
+    oldest = LogWriteBuffer(
+        batch_size=2,
+        flush_interval_seconds=60,
+        max_pending=2,
+        overflow=OVERFLOW_DROP_OLDEST,
+        sink=_Sink(),
+    )
+    newest = LogWriteBuffer(
+        batch_size=2,
+        flush_interval_seconds=60,
+        max_pending=2,
+        overflow=OVERFLOW_DROP_NEWEST,
+        sink=_Sink(),
+    )
+    for q in ("a", "b", "c"):
+        oldest.submit(_row(q))
+    accepted = [newest.submit(_row(q)) for q in ("a", "b", "c")]
+
+    oldest.flush()
+    newest.flush()
+
+    assert [r["query"] for r in oldest._sink.batches[0][1]] == ["b", "c"]
+    assert [r["query"] for r in newest._sink.batches[0][1]] == ["a", "b"]
+    assert accepted == [True, True, False]
+    assert oldest.dropped == 1 and newest.dropped == 1
+
+
+def test_failed_batch_is_dropped_and_counted() -> None:
+    def _broken(table, rows) -> None:
+        raise RuntimeError("db down")
+
+    buffer = LogWriteBuffer(
+        batch_size=10, flush_interval_seconds=60, max_pending=100, sink=_broken
+    )
+    buffer.submit(_row("a"))
+
+    assert buffer.flush() == 0
+    assert buffer.dropped == 1
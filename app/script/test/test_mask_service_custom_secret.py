@@ -156,3 +156,23 @@ def test_mask_service_keeps_token_label_sentence_unchanged() -> None:
 
     assert not any(getattr(entity, "type", "") == "API_SECRET" for entity in entities)
     assert masked == text
+
+
+def test_mask_service_single_pass_masks_spans_and_terms_longest_first() -> None:
+    service = MaskService()
+    text = "Goi 0912345678 ve PRJ-ALPHA-2 va prj-alpha [PHONE] prj-alpha-2"
+    start = text.index("0912345678")
+    entity = SimpleNamespace(
+        type="PHONE", start=start, end=start + 10, score=0.9, source="local_regex"
+    )
+
+    masked = service.mask(
+        text,
+        entities=[entity],
+        extra_terms=["prj-alpha"],
+        force_terms=["PRJ-ALPHA-2", "phone"],
+    )
+
+    assert masked == (
+        "Goi [PHONE] ve [INTERNAL_CODE] va [INTERNAL_CODE] [PHONE] [INTERNAL_CODE]"
+    )
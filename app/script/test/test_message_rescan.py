@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import app.rescan.service as rescan_service
+from app.common.enums import RuleAction, RuleScope, ScanStatus
+
+
+def _scan(action: RuleAction) -> dict:
+    return {
+        "final_action": action,
+        "entities": [],
+        "matches": [],
+        "signals": {},
+        "risk_score": 0.0,
+        "ambiguous": False,
+        "latency_ms": 3,
+        "timing_ms_by_stage": {"total": 3},
+    }
+
+
+class _FakeScanEngine:
+    def __init__(self, scans: list[dict]) -> None:
+        self.scans = scans
+        self.calls: list[dict] = []
+
+    async def scan_many(self, **kwargs) -> list[dict]:
+        self.calls.append(kwargs)
+        return self.scans[: len(kwargs["texts"])]
+
+
+def _row(*, content: str, action: RuleAction, scan_version: int = 1):
+    return SimpleNamespace(
+        id=uuid4(),
+        content=content,
+        scan_version=scan_version,
+        scan_status=ScanStatus.done,
+        final_action=action,
+        risk_score=0.0,
+        ambiguous=False,
+        matched_rule_ids=[],
+        content_masked=None,
+        entities_json={"entities": [], "timing_ms_by_stage": {"total": 99}},
+    )
+
+
+def test_rescan_batch_updates_only_rows_whose_decision_changed(monkeypatch) -> None:
+    fresh = _row(content="xin chao", action=RuleAction.allow)
+    stale = _row(content="bao cao noi bo", action=RuleAction.block, scan_version=2)
+    engine = _FakeScanEngine([_scan(RuleAction.allow), _scan(RuleAction.allow)])
+    monkeypatch.setattr(rescan_service, "_scan_engine", engine)
+    company_id = uuid4()
+
+    updates = asyncio.run(
+        rescan_service._rescan_batch(
+            session=object(), company_id=company_id, rows=[fresh, stale]
+        )
+    )
+
+    assert len(engine.calls) == 1
+    assert engine.calls[0]["texts"] == ["xin chao", "bao cao noi bo"]
+    assert engine.calls[0]["company_id"] == company_id
+    assert engine.calls[0]["scope"] == RuleScope.chat
+    assert [u["id"] for u in updates] == [stale.id]
+    assert updates[0]["final_action"] == RuleAction.allow
+    assert updates[0]["scan_version"] == 3
+    assert "latency_ms" not in updates[0]
+
+
+def test_progress_counts_failed_messages_as_done() -> None:
+    job = SimpleNamespace(
+        status="running", total_messages=8, scanned_messages=3, failed_messages=1
+    )
+
+    assert rescan_service._progress(job) == 0.5
+    assert rescan_service._progress(SimpleNamespace(status="success")) == 1.0
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import threading
+
+import pytest
+
+from app.decision.detectors import presidio_detector
+from app.decision.detectors.presidio_detector import PresidioDetector
+from app.decision.detectors.presidio_pool import PresidioPool
+
+
+class _FakeProcessPool:
+    def __init__(self, *, broken: bool = False) -> None:
+        self.batches: list[list[str]] = []
+        self.broken = broken
+        self.shut_down = False
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        self.shut_down = True
+
+    def submit(self, fn, texts):
+        self.batches.append(list(texts))
+        done: Future = Future()
+        if self.broken:
+            done.set_exception(BrokenProcessPool("worker died"))
+            return done
+        done.set_result(
+            [[("EMAIL_ADDRESS", 0, len(t), 0.9), ("PERSON", 0, 1, 0.99)] for t in texts]
+        )
+        return done
+
+
+def _start_with_fake_pool(pool: PresidioPool) -> _FakeProcessPool:
+    fake = _FakeProcessPool()
+    pool._executor = fake  # type: ignore[assignment]
+    pool._batcher = threading.Thread(target=pool._run, daemon=True)
+    pool._batcher.start()
+    return fake
+
+
+def test_pool_groups_queued_texts_into_one_batch() -> None:
+    pool = PresidioPool(
+        model_name="en_core_web_sm", workers=1, max_batch_size=8, linger_ms=200
+    )
+    futures = [pool.submit(f"user{i}@example.com") for i in range(3)]
+    fake = _start_with_fake_pool(pool)
+
+    results = [f.result(timeout=2) for f in futures]
+    pool._queue.put(None)
+
+    assert fake.batches == [[f"user{i}@example.com" for i in range(3)]]
+    assert results[1][0] == ("EMAIL_ADDRESS", 0, len("user1@example.com"), 0.9)
+
+
+def test_detector_routes_through_pool_and_filters_results(monkeypatch) -> None:
+    pool = PresidioPool(
+        model_name="en_core_web_sm", workers=1, max_batch_size=4, linger_ms=0
+    )
+    _start_with_fake_pool(pool)
+    monkeypatch.setattr(presidio_detector, "get_presidio_pool", lambda: pool)
+
+    detector = PresidioDetector()
+    entities = detector.scan("ops@example.com")
+    pool._queue.put(None)
+
+    assert detector.pooled is True
+    assert [(e.type, e.text) for e in entities] == [("EMAIL_ADDRESS", "ops@example.com")]
+
+
+def test_broken_pool_fails_its_batch_and_restarts_workers(monkeypatch) -> None:
+    pool = PresidioPool(
+        model_name="en_core_web_sm", workers=1, max_batch_size=1, linger_ms=0
+    )
+    replacement = _FakeProcessPool()
+    monkeypatch.setattr(pool, "_new_executor", lambda: replacement)
+    broken = _FakeProcessPool(broken=True)
+    pool._executor = broken  # type: ignore[assignment]
+    pool._batcher = threading.Thread(target=pool._run, daemon=True)
+    pool._batcher.start()
+
+    with pytest.raises(BrokenProcessPool):
+        pool.submit("a@example.com").result(timeout=2)
+    result = pool.submit("b@example.com").result(timeout=2)
+    pool.shutdown()
+
+    assert pool.restarts == 1
+    assert broken.shut_down is True
+    assert replacement.batches == [["b@example.com"]]
+    assert result[0][0] == "EMAIL_ADDRESS"
+
+
+def test_shutdown_fails_queued_and_later_submissions() -> None:
+    pool = PresidioPool(
+        model_name="en_core_web_sm", workers=1, max_batch_size=8, linger_ms=0
+    )
+    # No batcher: everything stays queued until shutdown.
+    queued = [pool.submit(f"user{i}@example.com") for i in range(2)]
+    pool.shutdown()
+    late = pool.submit("late@example.com")
+
+    for future in [*queued, late]:
+        with pytest.raises(RuntimeError, match="shut down"):
+            future.result(timeout=1)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import uuid4
+
+from app.common.enums import RuleScope
+from app.rag import decision_cache
+from app.rag.decision_cache import RagCacheScope, RagDecisionCache
+
+_VERDICT = {
+    "decision": "BLOCK",
+    "confidence": 0.9,
+    "rule_keys": ["global.security.rag.block"],
+    "rationale": "internal roadmap",
+    "candidate_rule_keys": ["global.security.rag.block"],
+}
+
+
+def _cache(*, max_entries: int = 8, near: bool = False) -> RagDecisionCache:
+    return RagDecisionCache(
+        enabled=True,
+        max_entries=max_entries,
+        ttl_seconds=60.0,
+        near_duplicate_enabled=near,
+        similarity_threshold=0.95,
+    )
+
+
+def _scope(
+    company_id, *, rules_version: int = 1, policy_version: int = 0
+) -> RagCacheScope:
+    return RagCacheScope.of(
+        company_id=company_id,
+        user_id=uuid4(),
+        runtime_scope=RuleScope.chat,
+        rules_version=rules_version,
+        policy_version=policy_version,
+    )
+
+
+def test_exact_hit_uses_normalized_prompt_and_rule_version() -> None:
+    cache = _cache()
+    company_id = uuid4()
+
+    async def _main() -> list:
+        await cache.set(
+            scope=_scope(company_id), text="Gui roadmap  noi bo", verdict=_VERDICT
+        )
+        return [
+            await cache.get(scope=_scope(company_id), text="  gui ROADMAP noi bo "),
+            await cache.get(scope=_scope(company_id, rules_version=2), text="gui roadmap noi bo"),
+            await cache.get(scope=_scope(uuid4()), text="gui roadmap noi bo"),
+        ]
+
+    hit, other_version, other_company = asyncio.run(_main())
+
+    assert hit == _VERDICT
+    assert other_version is None
+    assert other_company is None
+    assert cache.stats.exact_hits == 1
+    assert cache.stats.misses == 2
+
+
+def test_near_duplicate_reuses_closest_verdict_above_threshold() -> None:
+    cache = _cache(near=True)
+    company_id = uuid4()
+    allow = {**_VERDICT, "decision": "ALLOW", "rule_keys": []}
+
+    async def _main() -> list:
+        await cache.set(
+            scope=_scope(company_id), text="a", verdict=_VERDICT, embedding=[1.0, 0.0, 0.0]
+        )
+        await cache.set(
+            scope=_scope(company_id), text="b", verdict=allow, embedding=[0.0, 1.0, 0.0]
+        )
+        return [
+            await cache.get(scope=_scope(company_id), text="c", embedding=[0.99, 0.05, 0.0]),
+            await cache.get(scope=_scope(company_id), text="d", embedding=[0.7, 0.7, 0.0]),
+        ]
+
+    near, far = asyncio.run(_main())
+
+    assert near["decision"] == "BLOCK"
+    assert far is None
+    assert cache.stats.near_hits == 1
+
+
+def test_stats_track_evictions_and_hit_ratio() -> None:
+    cache = _cache(max_entries=1)
+    scope = _scope(None)
+
+    async def _main() -> None:
+        await cache.set(scope=scope, text="first", verdict=_VERDICT)
+        await cache.set(scope=scope, text="second", verdict=_VERDICT)
+        await cache.get(scope=scope, text="first")
+        await cache.get(scope=scope, text="second")
+
+    asyncio.run(_main())
+    stats = cache.snapshot_stats()
+
+    assert stats["evictions"] == 1
+    assert stats["size"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_policy_reingest_moves_the_cache_scope(monkeypatch) -> None:
+    monkeypatch.setattr(decision_cache, "_policy_global_version", 0)
+    monkeypatch.setattr(decision_cache, "_policy_versions", {})
+    monkeypatch.setattr(decision_cache, "_policy_synced", set())
+    cache = _cache()
+    company_id = uuid4()
+    other_company = uuid4()
+
+    before = decision_cache.policy_version(company_id)
+    decision_cache.invalidate_policy_version(company_id)
+    after = decision_cache.policy_version(company_id)
+
+    async def _main() -> dict | None:
+        await cache.set(
+            scope=_scope(company_id, policy_version=before),
+            text="gui roadmap noi bo",
+            verdict=_VERDICT,
+        )
+        return await cache.get(
+            scope=_scope(company_id, policy_version=after), text="gui roadmap noi bo"
+        )
+
+    assert after > before
+    assert asyncio.run(_main()) is None
+    assert decision_cache.policy_version(other_company) == before
+
+    # Global policies are read by every tenant.
+    decision_cache.invalidate_policy_version(None)
+    assert decision_cache.policy_version(other_company) > after
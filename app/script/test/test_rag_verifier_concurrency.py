@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import app.rag.rag_verifier as rag_verifier_module
+from app.common.enums import RuleScope
+from app.rag.rag_verifier import RagVerifier
+
+
+class _FakeSession:
+    def add(self, row) -> None:
+        self.row = row
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+class _FakeRetriever:
+    top_k = 3
+    embed_model = "fake-embed"
+
+    def __init__(self) -> None:
+        self.retrieve_embeddings: list = []
+
+    async def embed(self, text: str) -> list[float]:
+        await asyncio.sleep(0.15)
+        return [1.0, 0.0]
+
+    async def retrieve(self, *, query_embedding=None, **kwargs):
+        self.retrieve_embeddings.append(query_embedding)
+        return [SimpleNamespace(chunk_id="c1", content="policy text", sim=0.8)]
+
+
+def test_policy_embedding_and_rule_retrieval_overlap(monkeypatch) -> None:
+    rule_calls: list[dict] = []
+
+    def _slow_rules(**kwargs):
+        rule_calls.append(kwargs)
+        time.sleep(0.15)
+        return [{"stable_key": "global.security.rag.block"}]
+
+    async def _fake_llm(prompt: str):
+        return SimpleNamespace(
+            text=json.dumps(
+                {
+                    "decision": "BLOCK",
+                    "confidence": 0.9,
+                    "rule_keys": ["global.security.rag.block"],
+                    "rationale": "x",
+                }
+            ),
+            model="fake",
+            provider="fake",
+            fallback_used=False,
+        )
+
+    monkeypatch.setattr(
+        rag_verifier_module, "retrieve_related_rules_for_runtime", _slow_rules
+    )
+    verifier = RagVerifier()
+    retriever = _FakeRetriever()
+    verifier.retriever = retriever
+    monkeypatch.setattr(verifier, "_call_llm", _fake_llm)
+
+    t0 = time.perf_counter()
+    out = asyncio.run(
+        verifier.decide(
+            session=_FakeSession(),
+            user_text="gui roadmap noi bo",
+            company_id=None,
+            user_id=None,
+            message_id=None,
+            runtime_scope=RuleScope.chat,
+            rule_query_embedding=[0.5, 0.5],
+        )
+    )
+    elapsed = time.perf_counter() - t0
+
+    assert out.decision == "BLOCK"
+    assert out.rule_keys == ["global.security.rag.block"]
+    assert retriever.retrieve_embeddings == [[1.0, 0.0]]
+    assert rule_calls[0]["query_embedding"] == [0.5, 0.5]
+    assert elapsed < 0.28
+
+
+def test_session_is_released_before_the_llm_call(monkeypatch) -> None:
+    events: list[str] = []
+
+    def _rules(**kwargs):
+        events.append("rules")
+        return [{"stable_key": "global.security.rag.block"}]
+
+    async def _release() -> None:
+        events.append("release")
+
+    async def _fake_llm(prompt: str):
+        events.append("llm")
+        return SimpleNamespace(
+            text=json.dumps({"decision": "ALLOW", "confidence": 0.7}),
+            model="fake",
+            provider="fake",
+            fallback_used=False,
+        )
+
+    monkeypatch.setattr(
+        rag_verifier_module, "retrieve_related_rules_for_runtime", _rules
+    )
+    verifier = RagVerifier()
+    verifier.retriever = _FakeRetriever()
+    monkeypatch.setattr(verifier, "_call_llm", _fake_llm)
+
+    asyncio.run(
+        verifier.decide(
+            session=_FakeSession(),
+            user_text="gui roadmap noi bo",
+            company_id=None,
+            user_id=None,
+            message_id=None,
+            runtime_scope=RuleScope.chat,
+            rule_query_embedding=[0.5, 0.5],
+            policy_query_embedding=[1.0, 0.0],
+            release_session=_release,
+        )
+    )
+
+    assert events == ["rules", "release", "llm"]
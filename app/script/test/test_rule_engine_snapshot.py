@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.common.enums import RuleAction
+from app.rule.condition_tree import parse_conditions
+from app.rule.engine import RuleEngine, RuleRuntime
+
+
+def _runtime(*, stable_key: str, conditions: dict, priority: int = 10) -> RuleRuntime:
+    return RuleRuntime(
+        rule_id=uuid4(),
+        stable_key=stable_key,
+        name=stable_key,
+        action=RuleAction.mask,
+        priority=priority,
+        conditions=conditions,
+    )
+
+
+class _CountingRuleEngine(RuleEngine):
+    def __init__(self, rules: list[RuleRuntime], personal_ids: set) -> None:
+        self.rules = rules
+        self.personal_ids = personal_ids
+        self.loads = 0
+
+    def _load_rules_uncached(self, *, session, company_id, user_id):
+        self.loads += 1
+        return list(self.rules), set(self.personal_ids)
+
+
+def test_evaluate_reuses_snapshot_without_touching_session() -> None:
+    company_id = uuid4()
+    RuleEngine.invalidate_cache(company_id)
+    global_rule = _runtime(
+        stable_key="global.pii.phone.mask",
+        conditions={"any": [{"entity_type": "PHONE", "min_score": 0.5}]},
+    )
+    custom_rule = _runtime(
+        stable_key="personal.phone.block",
+        conditions={"entity_type": "PHONE", "source": ["local_regex"]},
+    )
+    engine = _CountingRuleEngine([global_rule, custom_rule], {custom_rule.rule_id})
+    entities = [SimpleNamespace(type="PHONE", score=0.9, source="local_regex")]
+
+    first = engine.evaluate(
+        session=None, company_id=company_id, entities=entities, signals={}
+    )
+    second = engine.evaluate(
+        session=None, company_id=company_id, entities=entities, signals={}
+    )
+
+    assert engine.loads == 1
+    assert [m.stable_key for m in first] == ["personal.phone.block"]
+    assert [m.stable_key for m in second] == ["personal.phone.block"]
+
+
+def test_invalidate_cache_bumps_snapshot_version() -> None:
+    company_id = uuid4()
+    engine = _CountingRuleEngine([], set())
+
+    before = engine.load_snapshot(session=None, company_id=company_id)
+    RuleEngine.invalidate_cache(company_id)
+    after = engine.load_snapshot(session=None, company_id=company_id)
+
+    assert engine.loads == 2
+    assert after.version > before.version
+
+
+def test_snapshot_loaded_across_invalidation_is_not_cached() -> None:
+    company_id = uuid4()
+    RuleEngine.invalidate_cache(company_id)
+
+    class _RacingRuleEngine(_CountingRuleEngine):
+        def _load_rules_uncached(self, *, session, company_id, user_id):
+            out = super()._load_rules_uncached(
+                session=session, company_id=company_id, user_id=user_id
+            )
+            if self.loads == 1:
+                RuleEngine.invalidate_cache(company_id)
+            return out
+
+    engine = _RacingRuleEngine([], set())
+    engine.load_snapshot(session=None, company_id=company_id)
+    engine.load_snapshot(session=None, company_id=company_id)
+
+    assert engine.loads == 2
+
+
+def test_malformed_branch_only_fails_when_reached() -> None:
+    engine = RuleEngine()
+    entities = [SimpleNamespace(type="EMAIL", score=0.95, source="local_regex")]
+    conditions = {"any": [{"entity_type": "EMAIL"}, {"unsupported": True}]}
+
+    assert engine._match_conditions(conditions, entities=entities, signals={}) is True
+
+    try:
+        engine._match_conditions(conditions, entities=[], signals={})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected malformed branch to raise when evaluated")
+
+
+def test_compiled_signal_leaves_fold_operands_and_compile_regex_once() -> None:
+    engine = RuleEngine()
+    conditions = {
+        "all": [
+            {"signal": {"field": "persona", "equals": "Kế Toán"}},
+            {"signal": {"field": "context.keywords", "any_of": ["Lương"]}},
+            {"signal": {"field": "text", "regex": r"\bINV-\d{4}\b"}},
+        ]
+    }
+    signals = {
+        "persona": "ke   toan",
+        "context": {"keywords": "bang luong thang 5"},
+        "text": "see INV-2024",
+    }
+
+    node = parse_conditions(conditions)
+
+    assert node.matches([], signals) is True
+    assert node.matches([], {**signals, "text": "INV-20"}) is False
+    assert engine._match_conditions(conditions, entities=[], signals=signals) is True
+
+
+def test_invalid_regex_only_fails_for_string_values() -> None:
+    node = parse_conditions({"not": {"signal": {"field": "text", "regex": "("}}})
+
+    assert node.matches([], {}) is True
+    try:
+        node.matches([], {"text": "abc"})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected invalid regex to raise on string values")
+
+
+def test_rule_index_only_evaluates_rules_whose_keys_are_present() -> None:
+    phone = _runtime(
+        stable_key="global.pii.phone.mask",
+        conditions={"entity_type": "PHONE"},
+        priority=30,
+    )
+    persona = _runtime(
+        stable_key="global.persona.block",
+        conditions={
+            "all": [
+                {"signal": {"field": "persona", "equals": "dev"}},
+                {"any": [{"entity_type": "API_SECRET"}, {"entity_type": "EMAIL"}]},
+            ]
+        },
+        priority=20,
+    )
+    low_risk = _runtime(
+        stable_key="global.risk.low",
+        conditions={"signal": {"field": "risk_score", "lt": 0.5}},
+        priority=10,
+    )
+    engine = RuleEngine()
+    snapshot = engine._build_snapshot(
+        version=1, rules=[phone, persona, low_risk], personal_rule_ids=set()
+    )
+
+    assert snapshot.unindexed == (2,)
+    assert snapshot.candidate_positions(entities=[], signals={}) == [2]
+    assert snapshot.candidate_positions(
+        entities=[SimpleNamespace(type="EMAIL", score=0.9, source="local_regex")],
+        signals={},
+    ) == [2]
+    assert snapshot.candidate_positions(
+        entities=[SimpleNamespace(type="PHONE", score=0.9, source="local_regex")],
+        signals={"persona": "dev"},
+    ) == [0, 1, 2]
+
+    matches = engine.evaluate(
+        session=None,
+        company_id=None,
+        entities=[SimpleNamespace(type="PHONE", score=0.9, source="local_regex")],
+        signals={"risk_score": 0.9},
+        snapshot=snapshot,
+    )
+    assert [m.stable_key for m in matches] == ["global.pii.phone.mask"]
+
+
+def test_phase2_reevaluates_only_rag_dependent_rules() -> None:
+    phone = _runtime(
+        stable_key="global.pii.phone.mask",
+        conditions={"entity_type": "PHONE"},
+        priority=30,
+    )
+    rag_block = _runtime(
+        stable_key="global.security.rag.block",
+        conditions={"signal": {"field": "rag.decision", "equals": "BLOCK"}},
+        priority=20,
+    )
+    semantic = _runtime(
+        stable_key="global.semantic.enforced",
+        conditions={"signal": {"field": "semantic_verify_enforced", "equals": True}},
+        priority=10,
+    )
+    engine = RuleEngine()
+    snapshot = engine._build_snapshot(
+        version=1, rules=[phone, rag_block, semantic], personal_rule_ids=set()
+    )
+    entities = [SimpleNamespace(type="PHONE", score=0.9, source="local_regex")]
+    signals: dict = {"semantic_verify_enforced": False}
+
+    phase1 = engine.match_positions(snapshot=snapshot, entities=entities, signals=signals)
+    signals["rag"] = {"decision": "BLOCK", "confidence": 0.9, "rule_keys": []}
+    phase2 = engine.match_positions(
+        snapshot=snapshot,
+        entities=entities,
+        signals=signals,
+        only=snapshot.rag_dependent_positions,
+    )
+
+    assert snapshot.rag_dependent_positions == frozenset({1, 2})
+    assert phase1 == [0]
+    assert phase2 == [1]
+    assert [
+        m.stable_key
+        for m in engine.build_matches(
+            snapshot=snapshot, positions=phase1 + phase2, company_id=None
+        )
+    ] == ["global.pii.phone.mask", "global.security.rag.block"]
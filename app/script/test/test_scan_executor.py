@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.decision.scan_executor import ScanExecutor
+
+
+def test_stage_limit_caps_concurrent_calls() -> None:
+    executor = ScanExecutor(max_workers=8, stage_limits={"presidio": 2})
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def _work() -> str:
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return threading.current_thread().name
+
+    async def _main() -> list[str]:
+        return await asyncio.gather(*(executor.run("presidio", _work) for _ in range(6)))
+
+    try:
+        names = asyncio.run(_main())
+    finally:
+        executor.shutdown()
+
+    assert state["peak"] == 2
+    assert all(name.startswith("scan") for name in names)
+
+
+def test_event_loop_keeps_running_while_stage_blocks() -> None:
+    executor = ScanExecutor(max_workers=2, stage_limits={})
+    ticks: list[int] = []
+
+    async def _ticker() -> None:
+        for i in range(5):
+            ticks.append(i)
+            await asyncio.sleep(0.005)
+
+    async def _blocking() -> int:
+        await executor.run("detectors", time.sleep, 0.1)
+        return len(ticks)
+
+    async def _main() -> int:
+        ticks_seen, _ = await asyncio.gather(_blocking(), _ticker())
+        return ticks_seen
+
+    try:
+        ticks_seen = asyncio.run(_main())
+    finally:
+        executor.shutdown()
+
+    assert ticks_seen == 5
+
+
+def test_disabled_executor_runs_inline() -> None:
+    executor = ScanExecutor(max_workers=1, stage_limits={}, enabled=False)
+
+    async def _main() -> str:
+        return await executor.run("db", lambda: threading.current_thread().name)
+
+    assert asyncio.run(_main()) == threading.current_thread().name
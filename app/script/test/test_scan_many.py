@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import uuid4
+
+import app.decision.scan_engine_local as scan_engine_module
+from app.common.enums import RuleAction
+from app.decision.context_term_runtime import ContextRuntimeOverrides
+from app.decision.detectors.presidio_detector import Entity as PresidioEntity
+from app.decision.scan_engine_local import ScanEngineLocal
+from app.decision.scan_result_cache import ScanResultCache
+from app.rule.engine import RuleEngine, RuleRuntime
+
+
+class _RuleEngine(RuleEngine):
+    def __init__(self, rules: list[RuleRuntime]) -> None:
+        self.rules = rules
+        self.loads = 0
+
+    def _load_rules_uncached(self, *, session, company_id, user_id):
+        self.loads += 1
+        return list(self.rules), set()
+
+
+class _FakePresidio:
+    pooled = False
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def _entities(self, text: str) -> list[PresidioEntity]:
+        start = text.find("Anna")
+        if start < 0:
+            return []
+        return [PresidioEntity(type="PERSON_NAME", start=start, end=start + 4, score=0.8)]
+
+    def scan(self, text: str) -> list[PresidioEntity]:
+        return self._entities(text)
+
+    def scan_many(self, texts: list[str]) -> list[list[PresidioEntity]]:
+        self.batches.append(list(texts))
+        return [self._entities(t) for t in texts]
+
+
+def _engine(monkeypatch) -> ScanEngineLocal:
+    monkeypatch.setattr(
+        scan_engine_module,
+        "load_context_runtime_overrides",
+        lambda **kwargs: ContextRuntimeOverrides(
+            regex_hints={}, persona_keywords={}, exact_terms=[]
+        ),
+    )
+    monkeypatch.setattr(
+        scan_engine_module,
+        "evaluate_semantic_assist_candidates",
+        lambda **kwargs: {"called": False, "supported_rule_keys": []},
+    )
+    engine = ScanEngineLocal(context_yaml_path="app/config/context_base.yaml")
+    engine.rule_engine = _RuleEngine(
+        [
+            RuleRuntime(
+                rule_id=uuid4(),
+                stable_key="global.pii.phone.mask",
+                name="Mask phone",
+                action=RuleAction.mask,
+                priority=30,
+                conditions={"any": [{"entity_type": "PHONE", "min_score": 0.5}]},
+            )
+        ]
+    )
+    engine.presidio = _FakePresidio()
+    engine.result_cache = ScanResultCache(enabled=False, max_entries=1, ttl_seconds=1.0)
+    monkeypatch.setattr(
+        engine, "_should_run_presidio", lambda *, text, **kwargs: "ten" in text.raw
+    )
+    return engine
+
+
+def test_scan_many_matches_scan_and_batches_presidio(monkeypatch) -> None:
+    engine = _engine(monkeypatch)
+    company_id = uuid4()
+    RuleEngine.invalidate_cache(company_id)
+    texts = [
+        "goi cho minh so 0912345678 nhe",
+        "ten toi la Anna",
+        "hom nay troi dep",
+        "ten ban Anna, sdt 0987654321",
+    ]
+
+    async def _main() -> tuple[list, list]:
+        batch = await engine.scan_many(
+            session=object(), texts=texts, company_id=company_id, concurrency=1
+        )
+        single = [
+            await engine.scan(session=object(), text=t, company_id=company_id)
+            for t in texts
+        ]
+        return batch, single
+
+    batch, single = asyncio.run(_main())
+
+    assert engine.presidio.batches == [[texts[1], texts[3]]]
+    assert [r["final_action"] for r in batch] == [
+        RuleAction.mask,
+        RuleAction.allow,
+        RuleAction.allow,
+        RuleAction.mask,
+    ]
+    for got, want in zip(batch, single):
+        assert got["final_action"] == want["final_action"]
+        assert [(e.type, e.start, e.end) for e in got["entities"]] == [
+            (e.type, e.start, e.end) for e in want["entities"]
+        ]
+        assert [m.stable_key for m in got["matches"]] == [
+            m.stable_key for m in want["matches"]
+        ]
+
+
+def test_repeated_local_verdict_is_served_from_scan_cache(monkeypatch) -> None:
+    engine = _engine(monkeypatch)
+    # The seeded rag.decision rules make phase 2 normalize the rag signal.
+    engine.rule_engine.rules.append(
+        RuleRuntime(
+            rule_id=uuid4(),
+            stable_key="global.security.rag.block",
+            name="Rag block",
+            action=RuleAction.block,
+            priority=130,
+            conditions={"any": [{"signal": {"field": "rag.decision", "equals": "BLOCK"}}]},
+        )
+    )
+    engine.result_cache = ScanResultCache(enabled=True, max_entries=8, ttl_seconds=60.0)
+    company_id = uuid4()
+    RuleEngine.invalidate_cache(company_id)
+    texts = ["hom nay troi dep", "goi cho minh so 0912345678 nhe"]
+
+    async def _main() -> list[tuple[dict, dict]]:
+        out = []
+        for text in texts:
+            first = await engine.scan(session=object(), text=text, company_id=company_id)
+            second = await engine.scan(session=object(), text=text, company_id=company_id)
+            out.append((first, second))
+        return out
+
+    for first, second in asyncio.run(_main()):
+        assert first["cache_hit"] is False
+        assert second["cache_hit"] is True
+        assert second["final_action"] == first["final_action"]
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import uuid4
+
+from app.common.enums import RuleAction, RuleScope
+from app.decision.detectors.local_regex_detector import Entity
+import app.decision.scan_result_cache as scan_result_cache_module
+from app.decision.scan_result_cache import ScanResultCache, make_scan_cache_key
+from app.rule.engine import RuleMatch
+
+
+def _result(*, ambiguous: bool = False, verify_called: bool = False) -> dict:
+    return {
+        "entities": [
+            Entity(
+                type="PHONE",
+                start=4,
+                end=14,
+                score=0.9,
+                source="local_regex",
+                text="0901234567",
+                metadata={"context": "strong"},
+            )
+        ],
+        "signals": {
+            "persona": "dev",
+            "semantic_verify": {"called": verify_called},
+        },
+        "matches": [
+            RuleMatch(
+                rule_id=uuid4(),
+                stable_key="global.pii.phone.mask",
+                name="Mask phone",
+                action=RuleAction.mask,
+                priority=30,
+            )
+        ],
+        "final_action": RuleAction.mask,
+        "latency_ms": 120,
+        "timing_ms_by_stage": {"total": 120},
+        "risk_score": 0.9,
+        "ambiguous": ambiguous,
+    }
+
+
+def _cache(max_entries: int = 8) -> ScanResultCache:
+    return ScanResultCache(enabled=True, max_entries=max_entries, ttl_seconds=60.0)
+
+
+def test_hit_returns_fresh_objects_with_same_verdict() -> None:
+    cache = _cache()
+    original = _result()
+
+    async def _main() -> tuple[dict, dict]:
+        await cache.set("k", original)
+        first = await cache.get("k")
+        first["entities"][0].type = "MUTATED"
+        first["signals"]["persona"] = "other"
+        return first, await cache.get("k")
+
+    _, second = asyncio.run(_main())
+
+    assert second["final_action"] == RuleAction.mask
+    assert second["entities"][0].type == "PHONE"
+    assert second["entities"][0].metadata == {"context": "strong"}
+    assert second["signals"]["persona"] == "dev"
+    assert second["matches"] == original["matches"]
+    assert second["risk_score"] == 0.9
+    assert second["ambiguous"] is False
+
+
+def test_llm_dependent_verdicts_are_not_cached() -> None:
+    cache = _cache()
+
+    async def _main() -> list:
+        await cache.set("rag", _result(ambiguous=True))
+        await cache.set("verify", _result(verify_called=True))
+        return [await cache.get("rag"), await cache.get("verify")]
+
+    assert asyncio.run(_main()) == [None, None]
+
+
+def test_results_with_entities_are_not_written_to_redis(monkeypatch) -> None:
+    written: list[str] = []
+
+    class _FakeRedis:
+        async def set(self, key, payload, ex=None) -> None:
+            written.append(key)
+
+    monkeypatch.setattr(scan_result_cache_module, "listener_active", lambda: True)
+    monkeypatch.setattr(scan_result_cache_module, "_get_redis", lambda: _FakeRedis())
+    cache = _cache()
+    clean = {**_result(), "entities": [], "final_action": RuleAction.allow}
+
+    async def _main():
+        await cache.set("pii", _result())
+        await cache.set("clean", clean)
+        return await cache.get("pii")
+
+    local_hit = asyncio.run(_main())
+
+    assert written == ["clean"]
+    assert local_hit["entities"][0].text == "0901234567"
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = _cache(max_entries=2)
+
+    async def _main() -> list[bool]:
+        await cache.set("a", _result())
+        await cache.set("b", _result())
+        await cache.get("a")
+        await cache.set("c", _result())
+        return [await cache.get(k) is not None for k in ("a", "b", "c")]
+
+    assert asyncio.run(_main()) == [True, False, True]
+
+
+def test_key_tracks_rule_and_context_term_versions() -> None:
+    company_id = uuid4()
+    base = dict(
+        text="goi 0901234567",
+        scope=RuleScope.chat,
+        company_id=company_id,
+        user_id=uuid4(),
+        rules_version=3,
+        context_terms_version=1,
+    )
+
+    key = make_scan_cache_key(**base)
+
+    assert make_scan_cache_key(**{**base, "user_id": uuid4()}) == key
+    assert make_scan_cache_key(**{**base, "rules_version": 4}) != key
+    assert make_scan_cache_key(**{**base, "context_terms_version": 2}) != key
+    assert make_scan_cache_key(**{**base, "scope": RuleScope.prompt}) != key
+    assert make_scan_cache_key(**{**base, "text": "goi 0901234568"}) != key
+    assert make_scan_cache_key(
+        **{**base, "company_id": None}
+    ) != make_scan_cache_key(**{**base, "company_id": None, "user_id": uuid4()})
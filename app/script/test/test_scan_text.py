@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from app.decision.detectors.folded_text import fold_text
+from app.decision.detectors.obfuscated_email_detector import ObfuscatedEmailDetector
+from app.decision.detectors.spoken_number_detector import SpokenNumberDetector
+from app.decision.scan_text import ScanText
+
+
+def test_scan_text_views_match_standalone_folding() -> None:
+    raw = "Số   điện thoại của Đức: không chín tám"
+    scan_text = ScanText(raw)
+
+    assert scan_text.lower == raw.lower()
+    assert scan_text.folded == fold_text(raw)
+    assert scan_text.folded == "so dien thoai cua duc: khong chin tam"
+
+
+def test_folded_window_matches_folding_the_slice() -> None:
+    raw = "Liên hệ SĐT của mình nhé: không chín tám bảy sáu năm bốn ba hai một"
+    scan_text = ScanText(raw)
+
+    for start, end in ((0, 20), (5, 40), (30, len(raw)), (60, 200)):
+        assert " ".join(scan_text.folded_window(start, end).split()) == fold_text(
+            raw[start:end]
+        )
+
+
+def test_spoken_keyword_lookup_matches_window_folding() -> None:
+    detector = SpokenNumberDetector()
+    raw = (
+        "Liên hệ:  SĐT  của mình nhé --- không chín tám bảy sáu năm bốn ba hai một; "
+        "mã số thuế (MST): một hai ba bốn năm sáu bảy tám chín không, căn cước..."
+    )
+    scan_text = ScanText(raw)
+    keyword_sets = (detector.KW_PHONE, detector.KW_CCCD, detector.KW_TAX_STRONG)
+
+    for pos in range(0, len(raw), 3):
+        for window in (20, 60):
+            start = max(0, pos - window)
+            end = min(len(raw), pos + window)
+            ctx = detector._fold_text(raw[start:end])
+            for keywords in keyword_sets:
+                assert detector._has_keyword_near(scan_text, pos, window, keywords) == any(
+                    k in ctx for k in keywords
+                ), (pos, window, keywords)
+
+
+def test_detectors_accept_shared_scan_text() -> None:
+    raw = "email cua toi la nguyen van a a cong gmail cham com"
+    detector = ObfuscatedEmailDetector()
+
+    from_text = detector.scan(raw)
+    from_scan_text = detector.scan(ScanText(raw))
+
+    assert [(e.start, e.end, e.type) for e in from_text] == [
+        (e.start, e.end, e.type) for e in from_scan_text
+    ]
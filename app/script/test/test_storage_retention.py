@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.admin_monitoring import service as admin_service
+from app.common.enums import RuleAction
+from app.conversation import service as conversation_service
+from app.retention.service import (
+    RAG_RETRIEVAL_LOGS,
+    add_months,
+    expired_partitions,
+    parse_partition_month,
+    partition_name,
+)
+
+
+def test_monthly_partition_names_round_trip_across_year_end() -> None:
+    month = add_months(date(2026, 11, 1), 2)
+
+    assert month == date(2027, 1, 1)
+    assert partition_name(RAG_RETRIEVAL_LOGS, month) == "rag_retrieval_logs_p202701"
+    assert parse_partition_month(RAG_RETRIEVAL_LOGS, "rag_retrieval_logs_p202701") == month
+    assert parse_partition_month(RAG_RETRIEVAL_LOGS, "rag_retrieval_logs_default") is None
+
+
+def test_only_partitions_entirely_before_cutoff_expire() -> None:
+    names = [
+        "rag_retrieval_logs_p202606",
+        "rag_retrieval_logs_p202607",
+        "rag_retrieval_logs_p202608",
+        "rag_retrieval_logs_default",
+        "message_scan_diagnostics_p202601",
+    ]
+    cutoff = datetime(2026, 8, 1, tzinfo=timezone.utc)
+
+    assert expired_partitions(RAG_RETRIEVAL_LOGS, names, cutoff=cutoff) == [
+        "rag_retrieval_logs_p202606",
+        "rag_retrieval_logs_p202607",
+    ]
+
+
+def _message(*, entities_json: dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid4(),
+        conversation_id=uuid4(),
+        role="user",
+        sequence_number=1,
+        input_type="user_input",
+        content="xin chao",
+        content_hash=None,
+        content_masked=None,
+        scan_status="done",
+        pre_rag_action=None,
+        final_action=RuleAction.allow,
+        risk_score=0.0,
+        ambiguous=False,
+        matched_rule_ids=[],
+        entities_json=entities_json,
+        rag_evidence_json=None,
+        latency_ms=4,
+        created_at=datetime(2026, 10, 17),
+    )
+
+
+def test_scan_diagnostics_stay_out_of_message_row_until_detail_view() -> None:
+    scan = {
+        "final_action": RuleAction.allow,
+        "entities": [],
+        "matches": [],
+        "signals": {"persona": "dev"},
+        "risk_score": 0.0,
+        "ambiguous": False,
+        "timing_ms_by_stage": {"total": 4},
+    }
+
+    fields = conversation_service.build_message_scan_fields(
+        session=object(), content="xin chao", scan=scan
+    )
+    diagnostics = conversation_service.build_message_scan_diagnostics(scan)
+
+    assert fields["entities_json"] == {"entities": [], "matched_rules": []}
+    assert diagnostics == {
+        "signals": {"persona": "dev"},
+        "timing_ms_by_stage": {"total": 4},
+    }
+
+    message = _message(entities_json=fields["entities_json"])
+    summary = conversation_service.build_safe_message_detail(message=message)
+    detail = conversation_service.build_safe_message_detail(
+        message=message, diagnostics=diagnostics
+    )
+
+    assert "signals" not in summary["entities_json"]
+    assert detail["entities_json"]["signals"] == {"persona": "dev"}
+    assert detail["entities_json"]["entities"] == []
+
+
+def test_admin_message_page_merges_scan_diagnostics(monkeypatch) -> None:
+    message = _message(entities_json={"entities": []})
+    diagnostics = {"signals": {"persona": "dev"}, "timing_ms_by_stage": {"total": 4}}
+
+    class _Session:
+        def __init__(self) -> None:
+            self.results = [[message], [(message.id, diagnostics)]]
+
+        def exec(self, stmt):
+            rows = self.results.pop(0)
+            return SimpleNamespace(all=lambda: rows)
+
+    monkeypatch.setattr(
+        conversation_service, "get_conversation_or_404", lambda **kwargs: None
+    )
+    items, has_more, _, _, _ = admin_service.list_admin_conversation_messages_page(
+        session=_Session(), conversation_id=message.conversation_id, limit=20
+    )
+
+    assert has_more is False
+    assert items[0]["entities_json"]["signals"] == {"persona": "dev"}
+    assert items[0]["entities_json"]["timing_ms_by_stage"] == {"total": 4}
+    assert items[0]["entities_json"]["entities"] == []
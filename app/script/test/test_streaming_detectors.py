@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import random
+
+from app.decision.detectors.local_regex_detector import LocalRegexDetector
+from app.decision.detectors.obfuscated_email_detector import ObfuscatedEmailDetector
+from app.masking.service import MaskService
+
+_RECORDS = (
+    "lien he sdt 0912345678 hoac email thuy.dev@company.com nhe. ",
+    "the 4111 1111 1111 1111 het han, cccd 012345678901 con han. ",
+    "debug token sk-live-ABC123 va ghp_" + "a" * 36 + " khong duoc gui. ",
+    "mail cua minh la thuy dev demo a cong gmail cham com cho dung format. ",
+    "ma don hang zxq-unseen-9981 dang xu ly, mst 0101234567-001. ",
+    "van ban thuong khong co gi dac biet ca, chi la loi nhan xet dai dong. ",
+)
+
+
+def _document(n: int) -> str:
+    rng = random.Random(7)
+    return "".join(rng.choice(_RECORDS) for _ in range(n))
+
+
+def _chunks(text: str) -> list[str]:
+    rng = random.Random(11)
+    out, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 700)
+        out.append(text[i : i + size])
+        i += size
+    return out
+
+
+def _spans(entities) -> list[tuple]:
+    return sorted((e.type, e.start, e.end, round(e.score, 4)) for e in entities)
+
+
+def _run_stream(stream, chunks: list[str]) -> list:
+    entities = []
+    for chunk in chunks:
+        entities.extend(stream.feed(chunk))
+    entities.extend(stream.close())
+    return entities
+
+
+def test_local_regex_stream_matches_whole_text_scan_with_bounded_window() -> None:
+    detector = LocalRegexDetector()
+    text = _document(400)
+    stream = detector.stream()
+
+    entities = []
+    max_buffer = 0
+    for chunk in _chunks(text):
+        entities.extend(stream.feed(chunk))
+        max_buffer = max(max_buffer, stream.position - stream._offset)
+    entities.extend(stream.close())
+
+    assert _spans(entities) == _spans(detector.scan(text))
+    assert max_buffer < 2 * stream.lookback + 700
+
+
+def test_obfuscated_email_stream_matches_whole_text_scan() -> None:
+    detector = ObfuscatedEmailDetector()
+    text = _document(200)
+
+    entities = _run_stream(detector.stream(), _chunks(text))
+
+    assert entities
+    assert _spans(entities) == _spans(detector.scan(text))
+
+
+def test_mask_stream_releases_same_masked_text_as_mask() -> None:
+    detector = LocalRegexDetector()
+    service = MaskService()
+    text = _document(150)
+    terms = dict(extra_terms=["zxq-unseen-9981"], force_terms=["loi nhan xet"])
+
+    detect = detector.stream()
+    masker = service.stream(**terms)
+    released = []
+    for chunk in _chunks(text):
+        released.append(
+            masker.feed(
+                chunk,
+                entities=detect.feed(chunk),
+                final_upto=detect.finalized_upto,
+            )
+        )
+    released.append(masker.close(entities=detect.close()))
+
+    expected = service.mask(text, detector.scan(text), **terms)
+    assert "".join(released) == expected
+    assert "0912345678" not in expected
+    assert "[INTERNAL_CODE]" in expected
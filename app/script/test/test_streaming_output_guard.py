@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from types import SimpleNamespace
+
+from app.common.enums import RuleAction
+from app.conversation.streaming import StreamingOutputGuard
+
+_PHONE_RE = re.compile(r"0\d{9}")
+
+
+def _phone_scan(text: str) -> dict:
+    entities = [
+        SimpleNamespace(type="PHONE", start=m.start(), end=m.end(), score=0.9, source="regex")
+        for m in _PHONE_RE.finditer(text)
+    ]
+    return {
+        "final_action": RuleAction.mask if entities else RuleAction.allow,
+        "entities": entities,
+    }
+
+
+def _mask(segment: str, entities: list, scan: dict) -> str:
+    for e in sorted(entities, key=lambda x: x.start, reverse=True):
+        segment = segment[: e.start] + f"[{e.type}]" + segment[e.end :]
+    return segment
+
+
+def _guard(scan) -> StreamingOutputGuard:
+    return StreamingOutputGuard(
+        scan=scan,
+        mask=_mask,
+        holdback_chars=6,
+        scan_interval_chars=4,
+    )
+
+
+async def _feed_all(guard: StreamingOutputGuard, chunks: list[str]) -> list:
+    out = []
+    for chunk in chunks:
+        out.append(await guard.feed(chunk))
+    return out
+
+
+def test_partial_entity_is_held_back_and_masked_when_complete() -> None:
+    async def _scan(text: str) -> dict:
+        return _phone_scan(text)
+
+    guard = _guard(_scan)
+    chunks = ["goi so ", "09123", "45678 ", "nhe ban ", "oi"]
+    releases = asyncio.run(_feed_all(guard, chunks))
+    tail = guard.finish(_phone_scan(guard.text))
+
+    streamed = "".join(r.text for r in releases) + tail.text
+    assert "0912" not in streamed
+    assert streamed == "goi so [PHONE] nhe ban oi"
+
+
+def test_block_checkpoint_halts_stream_and_keeps_tail() -> None:
+    async def _scan(text: str) -> dict:
+        action = RuleAction.block if "secret" in text else RuleAction.allow
+        return {"final_action": action, "entities": []}
+
+    guard = _guard(_scan)
+    chunks = ["hello there ", "friend ", "the secret ", "is 42"]
+    releases = asyncio.run(_feed_all(guard, chunks))
+
+    assert releases[-2].halted and releases[-1].halted
+    assert "secret" not in "".join(r.text for r in releases)
+    assert guard.finish({"final_action": RuleAction.allow, "entities": []}).halted
+
+
+def test_checkpoints_scan_a_bounded_window_with_reply_offsets() -> None:
+    scanned: list[int] = []
+
+    async def _scan(text: str) -> dict:
+        scanned.append(len(text))
+        return _phone_scan(text)
+
+    guard = StreamingOutputGuard(
+        scan=_scan,
+        mask=_mask,
+        holdback_chars=6,
+        scan_interval_chars=4,
+        lookback_chars=12,
+    )
+    chunks = ["loi chao ban "] * 40 + ["goi so ", "09123", "45678 ", "nhe ban ", "oi"]
+    releases = asyncio.run(_feed_all(guard, chunks))
+    tail = guard.finish(_phone_scan(guard.text))
+
+    streamed = "".join(r.text for r in releases) + tail.text
+    assert streamed == "loi chao ban " * 40 + "goi so [PHONE] nhe ban oi"
+    assert max(scanned) < 60
@@ -40,6 +40,7 @@ from app.rule.service import (
     _sync_rule_context_term_links,
     _upsert_company_context_terms,
 )
+from app.rescan.service import schedule_message_rescan
 from app.rule_embedding.service import upsert_rule_embedding
 from app.suggestion.literal_detector import (
     LiteralDetectionResult,
@@ -2831,6 +2832,12 @@ def apply_rule_suggestion(
         session.rollback()
         raise
 
+    schedule_message_rescan(
+        session=session,
+        company_id=company_id,
+        requested_by=actor_user_id,
+        reason="suggestion.apply",
+    )
     return RuleSuggestionApplyOut(
         rule_id=rule_row.id,
         rule_set_id=company_id,